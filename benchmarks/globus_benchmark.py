@@ -0,0 +1,117 @@
+"""Latency of the Globus-dependent paths against the local Globus backend.
+
+    PYTHONPATH=. python benchmarks/globus_benchmark.py --latency-ms 50 --files 20
+
+Every Globus call sleeps for --latency-ms, so the timings reflect the number
+of round trips and how many of them overlap. The raw-file check runs
+anywhere; mkdir and teardown also record the uid mapping in mongo and are
+skipped unless MONGO_URI is set.
+"""
+
+import argparse
+import tempfile
+import time
+import uuid
+
+from sumstats_service import config
+from sumstats_service.resources import globus
+from sumstats_service.resources.globus_listing import get_listing_cache
+from sumstats_service.resources.globus_local import use_local_backend
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed * 1000:10.1f} ms")
+    return result
+
+
+def sequential_mkdir(uid, email):
+    """mkdir as it ran before the provisioning graph, one call at a time"""
+    transfer = globus.init_transfer_client()
+    gcs = globus.init_gcs_client()
+    globus.create_dir(transfer, uid)
+    user_id = globus.check_user(email)
+    collection_id = gcs.create_collection(
+        globus.guest_collection_document("/~/" + uid, uid[0:8])
+    )["id"]
+    globus.add_service_roles(gcs, collection_id)
+    globus.add_permissions_to_endpoint(collection_id, user_id)
+    return collection_id
+
+
+def bench_raw_file_checks(backend, files):
+    uid = str(uuid.uuid4())
+    globus.create_dir(globus.init_transfer_client(), uid)
+    paths = [f"{uid}/raw_{i}.tsv" for i in range(files)]
+    for path in paths:
+        backend.upload(path)
+    cache = get_listing_cache()
+    cache.clear()
+
+    def _uncached():
+        for path in paths:
+            cache.clear()
+            globus.filepath_exists(path)
+
+    timed(f"raw file check x{files}, no cache", _uncached)
+    cache.clear()
+    timed(
+        f"raw file check x{files}, listing cache",
+        lambda: [globus.filepath_exists(p) for p in paths],
+    )
+
+
+def bench_mkdir(email):
+    timed("mkdir, sequential", lambda: sequential_mkdir(str(uuid.uuid4()), email))
+    timings = {}
+    timed(
+        "mkdir, provisioning graph",
+        lambda: globus.provision_guest_collection(
+            str(uuid.uuid4()), email, timings=timings
+        ),
+    )
+    print(f"{'':<4}steps: {timings}")
+
+
+def bench_teardown(email, n):
+    uids = [str(uuid.uuid4()) for _ in range(2 * n)]
+    for uid in uids:
+        globus.provision_guest_collection(uid, email)
+    timed(
+        f"teardown x{n}, one uid at a time",
+        lambda: [globus.remove_endpoint_and_all_contents(uid) for uid in uids[:n]],
+    )
+    timed(
+        f"teardown x{n}, batched",
+        lambda: globus.remove_endpoints_and_all_contents(uids[n:]),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--endpoints", type=int, default=10)
+    parser.add_argument("--dir", help="directory for the local collection")
+    args = parser.parse_args()
+
+    config.MAPPED_COLLECTION_ID = config.MAPPED_COLLECTION_ID or "local"
+    email = "benchmark@example.com"
+    with tempfile.TemporaryDirectory(dir=args.dir) as root:
+        backend = use_local_backend(
+            root, latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000
+        )
+        bench_raw_file_checks(backend, args.files)
+        if config.MONGO_URI:
+            bench_mkdir(email)
+            bench_teardown(email, args.endpoints)
+        else:
+            print("MONGO_URI is not set, skipping mkdir and teardown")
+        print(f"globus calls: {backend.calls}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Compare md5 throughput of the hashing engine against the old 4 KiB loop.
+
+    PYTHONPATH=. python benchmarks/md5_benchmark.py --files 4 --size-mb 256
+
+Writes random test files to a temporary directory (or uses --dir) and
+reports GB/s for the old loop, md5_file with readinto/mmap and md5_files
+on the thread pool.
+"""
+
+import argparse
+import hashlib
+import os
+import tempfile
+import time
+
+from sumstats_service.resources import hashing
+
+
+def md5_4k_loop(path):
+    hash_md5 = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(4096), b""):
+            hash_md5.update(chunk)
+    return hash_md5.hexdigest()
+
+
+def make_files(directory, n, size_mb):
+    paths = []
+    block = os.urandom(1024 * 1024)
+    for i in range(n):
+        path = os.path.join(directory, f"bench_{i}.bin")
+        with open(path, "wb") as f:
+            for _ in range(size_mb):
+                f.write(block)
+        paths.append(path)
+    return paths
+
+
+def timed(label, total_bytes, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {elapsed:8.2f} s {total_bytes / elapsed / 1e9:8.2f} GB/s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=4)
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--dir", help="directory for the test files")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        paths = make_files(directory, args.files, args.size_mb)
+        total = sum(os.path.getsize(p) for p in paths)
+        # warm the page cache so that every run reads from memory
+        for p in paths:
+            md5_4k_loop(p)
+
+        expected = timed(
+            "4 KiB loop, sequential", total, lambda: [md5_4k_loop(p) for p in paths]
+        )
+        readinto = timed(
+            "readinto, sequential",
+            total,
+            lambda: [hashing.md5_file(p, use_mmap=False) for p in paths],
+        )
+        mmapped = timed(
+            "mmap, sequential",
+            total,
+            lambda: [hashing.md5_file(p, use_mmap=True) for p in paths],
+        )
+        parallel = timed(
+            f"readinto, {args.workers} threads",
+            total,
+            lambda: list(hashing.md5_files(paths, max_workers=args.workers).values()),
+        )
+        assert expected == readinto == mmapped == parallel
+
+
+if __name__ == "__main__":
+    main()
@@ -7,4 +7,5 @@ export QUEUE_PORT='5672'
 export MONGO_DB='sumstats-service'
 export MONGO_URI='mongodb://127.0.0.1:27017'
 
+python -m sumstats_service.resources.mongo_indexes
 gunicorn -b 0.0.0.0:8000 sumstats_service.app:app --log-level=debug
@@ -3,20 +3,26 @@ import logging
 import os
 import re
 import time
+from datetime import datetime, timedelta
 from typing import Union
 
+import shortuuid
 import simplejson
 from celery import Celery
-from celery.signals import task_failure
-from flask import Flask, Response, abort, jsonify, make_response, request
+from celery.signals import task_failure, worker_init
+from flask import Flask, Response, abort, g, jsonify, make_response, request
 
 import sumstats_service.resources.api_endpoints as endpoints
 import sumstats_service.resources.api_utils as au
 import sumstats_service.resources.globus as globus
+import sumstats_service.resources.globus_provider as globus_provider
+import sumstats_service.resources.local_validation as local_validation
 from sumstats_service import config, logger_config
 from sumstats_service.resources.error_classes import APIException
-from sumstats_service.resources.mongo_client import MongoClient
-from sumstats_service.resources.utils import send_mail
+from sumstats_service.resources.ftp_index import get_ftp_index
+from sumstats_service.resources.mongo_client import get_mongo_client
+from sumstats_service.resources.mongo_indexes import ensure_indexes
+from sumstats_service.resources.utils import send_mail, server_timing
 
 try:
     logger_config.setup_logging()
@@ -50,6 +56,69 @@ celery = Celery(
 )
 celery.conf.update(app.config)
 
+# --- Periodic tasks, run with `celery -A sumstats_service.app.celery beat` --- #
+beat_schedule = {
+    "sync-globus-transfer-events": {
+        "task": "sumstats_service.app.sync_globus_transfer_events",
+        "schedule": timedelta(minutes=config.GLOBUS_TRANSFER_SYNC_MINUTES),
+    },
+    "crawl-ftp-index": {
+        "task": "sumstats_service.app.crawl_ftp_index",
+        "schedule": timedelta(minutes=config.FTP_INDEX_CRAWL_MINUTES),
+    },
+}
+if config.GLOBUS_WARM_POOL_ENABLED:
+    beat_schedule.update(
+        {
+            "refill-globus-warm-pool": {
+                "task": "sumstats_service.app.refill_globus_warm_pool",
+                "schedule": timedelta(minutes=config.GLOBUS_WARM_POOL_REFILL_MINUTES),
+            },
+            "reap-globus-warm-pool": {
+                "task": "sumstats_service.app.reap_globus_warm_pool",
+                "schedule": timedelta(hours=config.GLOBUS_WARM_POOL_REAP_HOURS),
+            },
+        }
+    )
+if config.VALIDATION_BATCH_ENABLED:
+    beat_schedule.update(
+        {
+            "reap-validation-batches": {
+                "task": "sumstats_service.app.reap_validation_batches",
+                "schedule": timedelta(minutes=config.VALIDATION_BATCH_REAP_MINUTES),
+            },
+        }
+    )
+celery.conf.update({"CELERYBEAT_SCHEDULE": beat_schedule})
+
+
+# --- Mongo indexes --- #
+@worker_init.connect
+def ensure_indexes_on_worker_init(**kwargs) -> None:
+    """Create missing mongo indexes when a celery worker starts. The web
+    app does not, start_gunicorn.sh runs the mongo_indexes module first.
+    """
+    if not config.MONGO_ENSURE_INDEXES:
+        return
+    try:
+        ensure_indexes()
+    except Exception as e:
+        logger.error(f"Could not ensure mongo indexes: {e}")
+
+
+# --- Globus auth round trips per request --- #
+@app.before_request
+def count_globus_auth_round_trips():
+    g.globus_auth_round_trips = globus_provider.auth_round_trips()
+
+@app.after_request
+def log_globus_auth_round_trips(response):
+    if "globus_auth_round_trips" in g:
+        delta = globus_provider.auth_round_trips() - g.globus_auth_round_trips
+        if delta:
+            logger.info(f"Globus auth round trips for {request.path}: {delta}")
+    return response
+
 # --- Errors --- #
 @app.errorhandler(APIException)
 def handle_custom_api_exception(error):
@@ -114,12 +183,7 @@ def sumstats():
 
     logger.info(f"{minrows=} {force_valid=} {bypass=} {file_type=}")
 
-    mdb = MongoClient(
-        config.MONGO_URI,
-        config.MONGO_USER,
-        config.MONGO_PASSWORD,
-        config.MONGO_DB,
-    )
+    mdb = get_mongo_client()
 
     mdb.upsert_payload(
         callback_id=callback_id,
@@ -168,12 +232,7 @@ def validate_sumstats(callback_id: str):
         is_force_valid=bool(force_valid),
     )
 
-    mdb = MongoClient(
-        config.MONGO_URI,
-        config.MONGO_USER,
-        config.MONGO_PASSWORD,
-        config.MONGO_DB,
-    )
+    mdb = get_mongo_client()
 
     mdb.upsert_payload(
         callback_id=callback_id,
@@ -181,16 +240,13 @@ def validate_sumstats(callback_id: str):
         status=config.ValidationStatus.PENDING,
     )
 
-    validate_files_in_background.apply_async(
-        kwargs={
-            "callback_id": callback_id,
-            "minrows": minrows,
-            "forcevalid": force_valid,
-            "bypass": bypass,
-            "file_type": file_type,
-        },
-        link=store_validation_results.s(force_valid),
-        retry=True,
+    schedule_validation(
+        callback_id=callback_id,
+        content=content,
+        minrows=minrows,
+        forcevalid=force_valid,
+        bypass=bypass,
+        file_type=file_type,
     )
     return Response(status=200, mimetype="application/json")
 
@@ -211,68 +267,59 @@ def delete_sumstats(callback_id):
 
 @app.route("/v1/sum-stats/<string:callback_id>", methods=["PUT"])
 def update_sumstats(callback_id):
+    """Publish sumstats
+
+    Stores the publication details and returns 202 with a job ID straight away.
+    Staging and the per-study YAML conversion run in the background, and
+    their progress can be followed at /v1/sum-stats/jobs/<job_id>.
+    """
     content = request.get_json(force=True)
 
     resp = endpoints.update_sumstats(callback_id=callback_id, content=content)
     logger.info(f"PUT /v1/sum-stats/{callback_id}")
     logger.info(f">> {resp=}")
 
-    if resp:
-        try:
-            move_files_result = move_files_to_staging.apply_async(
-                args=[resp],
-                retry=True,
-            )
-            # Wait with a timeout to avoid indefinite hanging
-            timeout = 600
-            start_time = time.time()
-
-            while (time.time() - start_time) < timeout:
-                if move_files_result.ready():
-                    logger.info("Task move_files_result ready.")
-                    break
-                logger.info("Waiting for move_files_result task to complete.")
-                logger.info(f"Current state: {move_files_result.state}")
-                time.sleep(10)
-            else:
-                raise Exception(
-                    "Task move_files_result did not complete within the expected time."
-                )
+    if not resp:
+        logger.info(f"{callback_id=} :: Return status 200")
+        return Response(status=200, mimetype="application/json")
 
-            if move_files_result.successful():
-                logger.info(f"{callback_id=} :: move_files_result successful")
-                globus_endpoint_id = move_files_result.get()["globus_endpoint_id"]
-                for study in resp["studyList"]:
-                    metadata_conversion_result = convert_metadata_to_yaml.apply_async(
-                        args=[study["gcst"]],
-                        kwargs={
-                            "is_harmonised_included": False,
-                            "globus_endpoint_id": globus_endpoint_id,
-                        },
-                        retry=True,
-                    )
-
-                while (time.time() - start_time) < timeout:
-                    if metadata_conversion_result.ready():
-                        logger.info("Task metadata_conversion_result ready.")
-                        break
-                    logger.info(
-                        "Waiting for metadata_conversion_result task to complete."
-                    )
-                    logger.info(f"Current state: {metadata_conversion_result.state}")
-                    time.sleep(10)
-                else:
-                    raise Exception(
-                        "Task metadata_conversion_result did not complete in time."
-                    )
-            else:
-                raise Exception("Task move_files_result did not complete in time.")
-        except Exception as e:
-            logger.error(f"{callback_id=} :: Error {e=}")
-            return Response(status=500, mimetype="application/json")
+    # a study listed twice is converted once
+    gcst_ids = list(dict.fromkeys(study["gcst"] for study in resp["studyList"]))
+    job_id = shortuuid.uuid()
+    get_mongo_client().create_job(
+        job_id=job_id,
+        job_type="publish",
+        callback_id=callback_id,
+        items=gcst_ids,
+        status=config.JobStatus.STAGING,
+    )
 
-    logger.info(f"{callback_id=} :: Return status 200")
-    return Response(status=200, mimetype="application/json")
+    (
+        move_files_to_staging.s(resp)
+        | start_metadata_conversion.s(job_id=job_id, gcst_ids=gcst_ids)
+    ).apply_async(
+        link_error=fail_job.si(
+            job_id, "Staging files or starting the metadata conversion failed."
+        ),
+        retry=True,
+    )
+
+    logger.info(f"{callback_id=} :: {job_id=} :: Return status 202")
+    body = {
+        "callbackID": callback_id,
+        "jobID": job_id,
+        "status": config.JobStatus.STAGING.value,
+        "_links": {"job": au.create_href("get_job_status", {"job_id": job_id})},
+    }
+    return make_response(jsonify(body), 202)
+
+
+@app.route("/v1/sum-stats/jobs/<string:job_id>", methods=["GET"])
+def get_job_status(job_id):
+    job = get_mongo_client().get_job(job_id)
+    if job is None:
+        abort(404)
+    return make_response(jsonify(job), 200)
 
 # --- Globus methods --- #
 @app.route("/v1/sum-stats/globus/mkdir", methods=["POST"])
@@ -282,14 +329,23 @@ def make_dir():
     unique_id = req_data["uniqueID"]
     email = req_data["email"]
     globus_origin_id = None
-    if globus.list_dir(unique_id) is None:  # if not already exists
-        globus_origin_id = globus.mkdir(unique_id, email)
+    timings = {}
+    start = time.perf_counter()
+    exists = globus.list_dir(unique_id) is not None
+    timings["list_dir"] = round((time.perf_counter() - start) * 1000, 1)
+    if not exists:
+        globus_origin_id = globus.mkdir(unique_id, email, timings=timings)
+        if config.GLOBUS_WARM_POOL_ENABLED:
+            refill_globus_warm_pool.apply_async()
     if globus_origin_id:
         resp = {"globusOriginID": globus_origin_id}
-        return make_response(jsonify(resp), 201)
+        response = make_response(jsonify(resp), 201)
     else:
         resp = {"error": "Account not linked to Globus"}
-        return make_response(jsonify(resp), 200)
+        response = make_response(jsonify(resp), 200)
+    # per step durations, e.g. for the browser's network timing panel
+    response.headers["Server-Timing"] = server_timing(timings)
+    return response
 
 
 @app.route("/v1/sum-stats/globus/<unique_id>", methods=["DELETE"])
@@ -460,71 +516,44 @@ def update_file_types_async(
     
     # Connect to MongoDB
     try:
-        mdb = MongoClient(
-            config.MONGO_URI,
-            config.MONGO_USER,
-            config.MONGO_PASSWORD,
-            config.MONGO_DB,
-        )
+        mdb = get_mongo_client()
     except Exception as e:
         logger.error(
             f"Failed to initialise Mongo client in async task: {e}", exc_info=True
         )
         return
     
-    results = []
-    for gcst_id in gcst_ids:
-        logger.info(
-            f"Processing update for gcst_id='{gcst_id}' with file_type='{file_type}'"
+    # Resolve the latest entry per gcst_id and update them all in bulk
+    try:
+        update_results = mdb.bulk_update_file_type(
+            gcst_ids=gcst_ids, file_type=file_type
         )
+    except Exception as e:
+        logger.error(
+            f"""
+            An unexpected error occurred while updating file type
+            for {len(gcst_ids)} gcst_ids: {e}
+            """,
+            exc_info=True,
+        )
+        update_results = [
+            {
+                "gcst_id": gcst_id,
+                "success": False,
+                "message": "An unexpected internal server error occurred.",
+            }
+            for gcst_id in gcst_ids
+        ]
 
-        try:
-            update_result = mdb.update_file_type(gcst_id=gcst_id, file_type=file_type)
-        except Exception as e:
+    results = []
+    for update_result in update_results:
+        if not update_result["success"]:
             logger.error(
-                f"""
-                An unexpected error occurred while updating file type
-                for gcst_id='{gcst_id}': {e}
-                """,
-                exc_info=True,
-            )
-            results.append(
-                {
-                    "gcst_id": gcst_id,
-                    "file_type": file_type,
-                    "success": False,
-                    "message": "An unexpected internal server error occurred.",
-                }
+                f"Update file type failed for gcst_id='{update_result['gcst_id']}'. "
+                f"Reason: {update_result['message']}"
             )
-            continue
+        results.append({**update_result, "file_type": file_type})
 
-        if update_result is None or not update_result.get("success"):
-            error_message = (
-                update_result.get("message", "An error occurred during the update.")
-                if update_result
-                else "An unknown error occurred during the update."
-            )
-            logger.error(
-                f"Update file type failed for gcst_id='{gcst_id}'. Reason: {error_message}"
-            )
-            results.append(
-                {
-                    "gcst_id": gcst_id,
-                    "file_type": file_type,
-                    "success": False,
-                    "message": error_message,
-                }
-            )
-        else:
-            results.append(
-                {
-                    "gcst_id": gcst_id,
-                    "file_type": file_type,
-                    "success": True,
-                    "message": update_result["message"],
-                }
-            )
-    
     # Calculate summary statistics
     success_gcst_ids = [r["gcst_id"] for r in results if r["success"]]
     failed_gcst_ids = [r["gcst_id"] for r in results if not r["success"]]
@@ -592,31 +621,74 @@ def process_studies(
     logger.info(f"{callback_id=} with {minrows=} {forcevalid=} {bypass=} {file_type=}")
 
     # get payload from db
-    mdb = MongoClient(
-        config.MONGO_URI,
-        config.MONGO_USER,
-        config.MONGO_PASSWORD,
-        config.MONGO_DB,
-    )
+    mdb = get_mongo_client()
     content = mdb.get_payload(callback_id)
 
     if endpoints.create_studies(
         callback_id=callback_id, file_type=file_type, content=content
     ):
         logger.info(f"endpoints.create_studies: True for {callback_id=}")
-        validate_files_in_background.apply_async(
-            kwargs={
-                "callback_id": callback_id,
-                "minrows": minrows,
-                "forcevalid": forcevalid,
-                "bypass": bypass,
-                "file_type": file_type,
-            },
-            link=store_validation_results.s(forcevalid),
-            retry=True,
+        schedule_validation(
+            callback_id=callback_id,
+            content=content,
+            minrows=minrows,
+            forcevalid=forcevalid,
+            bypass=bypass,
+            file_type=file_type,
         )
 
 
+def schedule_validation(
+    callback_id: str,
+    content: dict,
+    minrows: Union[int, None] = None,
+    forcevalid: bool = False,
+    bypass: bool = False,
+    file_type: Union[str, None] = None,
+):
+    """Start the validation of a callback. With VALIDATION_BATCH_ENABLED,
+    callbacks that would be validated with nextflow are queued and run
+    together by flush_validation_batch, otherwise they are validated on
+    their own by validate_files_in_background.
+    """
+    if (
+        config.VALIDATION_BATCH_ENABLED
+        and bypass is not True
+        and local_validation.select_engine(content) == "nextflow"
+    ):
+        mdb = get_mongo_client()
+        queued = mdb.queue_validation(
+            callback_id=callback_id,
+            minrows=minrows,
+            forcevalid=forcevalid,
+            file_type=file_type,
+            size=local_validation.payload_size(content) or 0,
+        )
+        logger.info(f"queued {callback_id=} for batch validation: {queued=}")
+        if (
+            queued["count"] >= config.VALIDATION_BATCH_MAX_CALLBACKS
+            or queued["size"] >= config.VALIDATION_BATCH_MAX_MB * 1024 * 1024
+        ):
+            flush_validation_batch.apply_async(retry=True)
+        elif queued["count"] == 1:
+            # first callback of a new window
+            flush_validation_batch.apply_async(
+                countdown=config.VALIDATION_BATCH_WINDOW_SECONDS, retry=True
+            )
+        return
+    validate_files_in_background.apply_async(
+        kwargs={
+            "callback_id": callback_id,
+            "minrows": minrows,
+            "forcevalid": forcevalid,
+            "bypass": bypass,
+            "file_type": file_type,
+        },
+        link=store_validation_results.s(forcevalid),
+        retry=True,
+    )
+
+
 @celery.task(queue=config.CELERY_QUEUE1, options={"queue": config.CELERY_QUEUE1})
 def validate_files_in_background(
     callback_id: str,
@@ -626,12 +698,7 @@ def validate_files_in_background(
     file_type: Union[str, None] = None,
 ):
     logger.info(">>> [validate_files_in_background]")
-    mdb = MongoClient(
-        config.MONGO_URI,
-        config.MONGO_USER,
-        config.MONGO_PASSWORD,
-        config.MONGO_DB,
-    )
+    mdb = get_mongo_client()
     content = mdb.get_payload(callback_id)
     logger.info(f"{content=}")
     logger.info(f"{callback_id=} with {minrows=} {forcevalid=} {bypass=} {file_type=}")
@@ -672,6 +739,73 @@ def validate_files_in_background(
     return results
 
 
+@celery.task(queue=config.CELERY_QUEUE1, options={"queue": config.CELERY_QUEUE1})
+def flush_validation_batch():
+    """Validate the queued callbacks with one nextflow run and pass each
+    callback's results on to store_validation_results.
+    """
+    logger.info(">>> [flush_validation_batch]")
+    mdb = get_mongo_client()
+    batch_id = shortuuid.uuid()
+    batch = mdb.claim_validation_batch(
+        batch_id=batch_id,
+        max_callbacks=config.VALIDATION_BATCH_MAX_CALLBACKS,
+        max_size=config.VALIDATION_BATCH_MAX_MB * 1024 * 1024,
+    )
+    if not batch:
+        return None
+    minrows, forcevalid = batch[0]["minrows"], batch[0]["forcevalid"]
+    logger.info(f"{batch_id=} with {len(batch)} callbacks {minrows=} {forcevalid=}")
+
+    callbacks = []
+    for entry in batch:
+        callback_id = entry["callback_id"]
+        mdb.upsert_payload(
+            callback_id=callback_id,
+            status=config.ValidationStatus.IN_PROGRESS,
+        )
+        au.store_validation_method(
+            callback_id=callback_id, bypass_validation=forcevalid
+        )
+        callbacks.append(
+            {
+                "callback_id": callback_id,
+                "content": mdb.get_payload(callback_id),
+                "file_type": entry["file_type"],
+            }
+        )
+
+    try:
+        results = au.validate_files_batch(
+            batch_id=batch_id,
+            callbacks=callbacks,
+            minrows=minrows,
+            forcevalid=forcevalid,
+        )
+    except Exception as e:
+        logger.error(f"Batch validation {batch_id} failed: {e}", exc_info=True)
+        results = {}
+
+    for item in callbacks:
+        callback_id = item["callback_id"]
+        callback_results = results.get(callback_id) or json.dumps(
+            au.results_if_failure(callback_id, item["content"])
+        )
+        mdb.upsert_payload(
+            callback_id=callback_id,
+            status=config.ValidationStatus.COMPLETED,
+        )
+        store_validation_results.apply_async(
+            args=[callback_results, forcevalid], retry=True
+        )
+    mdb.finish_validation_batch(batch_id)
+
+    # callbacks left over by the budget, or queued with other options
+    if mdb.count_queued_validations():
+        flush_validation_batch.apply_async(retry=True)
+    return {"batch_id": batch_id, "callbacks": [i["callback_id"] for i in callbacks]}
+
+
 @celery.task(queue=config.CELERY_QUEUE2, options={"queue": config.CELERY_QUEUE2})
 def store_validation_results(results, force_valid):
     logger.info(">>> [store_validation_results]")
@@ -707,12 +841,7 @@ def convert_metadata_to_yaml(gcst_id, **kwargs):
     logger.info(f">>>>>>>>>>>>>> {is_save=}")
     logger.info(f">>>>>>>>>>>>>> {globus_endpoint_id=}")
 
-    mdb = MongoClient(
-        config.MONGO_URI,
-        config.MONGO_USER,
-        config.MONGO_PASSWORD,
-        config.MONGO_DB,
-    )
+    mdb = get_mongo_client()
 
     # Explicitly set otherwise in nightly cron scripts.
     try:
@@ -733,6 +862,8 @@ def convert_metadata_to_yaml(gcst_id, **kwargs):
             else:
                 logger.info(f"No globus endpoint id found for {gcst_id}.")
     except Exception as e:
+        # the outcome is returned so that linked tasks, e.g.
+        # record_conversion_result, can tell a handled failure from success
         study_data = mdb.get_study(gcst_id=gcst_id)
         if study_data and study_data.get("summaryStatisticsFile", "") == config.NR:
             info = f"""Skipping {gcst_id=} hm: {is_harmonised_included}
@@ -744,6 +875,7 @@ def convert_metadata_to_yaml(gcst_id, **kwargs):
                 is_harmonised=is_harmonised_included,
                 additional_info={"info": info},
             )
+            return config.MetadataYamlStatus.SKIPPED.value
         else:
             logger.info(
                 f"""Adding {gcst_id=} hm: {is_harmonised_included}
@@ -755,6 +887,78 @@ def convert_metadata_to_yaml(gcst_id, **kwargs):
                 is_harmonised=is_harmonised_included,
                 additional_info={"exception": str(e)},
             )
+            return config.MetadataYamlStatus.FAILED.value
+
+
+@celery.task(queue=config.CELERY_QUEUE3, options={"queue": config.CELERY_QUEUE3})
+def crawl_ftp_index(buckets=None):
+    """Refresh the index of harmonised FTP directories, for the given
+    buckets or for all of them.
+    """
+    logger.info(f">>> [crawl_ftp_index] {buckets=}")
+    return get_ftp_index().crawl(buckets)
+
+
+@celery.task(queue=config.CELERY_QUEUE2, options={"queue": config.CELERY_QUEUE2})
+def start_metadata_conversion(move_files_result, job_id, gcst_ids):
+    """Fan out the YAML conversion of each study of a publish job.
+    Each conversion reports back with record_job_result, the last one
+    to report completes the job (a chord tracked in mongo, as the rpc
+    result backend does not support celery chords).
+    """
+    logger.info(f">>> [start_metadata_conversion] {job_id=} {move_files_result=}")
+    globus_endpoint_id = move_files_result["globus_endpoint_id"]
+    mdb = get_mongo_client()
+    if not gcst_ids:
+        # nothing to convert, so no result would ever complete the job
+        mdb.update_job_status(
+            job_id, config.JobStatus.COMPLETED, staging=move_files_result
+        )
+        return
+    mdb.update_job_status(
+        job_id, config.JobStatus.CONVERTING, staging=move_files_result
+    )
+    for gcst_id in gcst_ids:
+        convert_metadata_to_yaml.apply_async(
+            args=[gcst_id],
+            kwargs={
+                "is_harmonised_included": False,
+                "globus_endpoint_id": globus_endpoint_id,
+            },
+            link=record_conversion_result.s(job_id, gcst_id),
+            link_error=record_job_result.si(
+                job_id, gcst_id, False, "Metadata conversion failed."
+            ),
+            retry=True,
+        )
+
+
+@celery.task(queue=config.CELERY_QUEUE2, options={"queue": config.CELERY_QUEUE2})
+def record_job_result(job_id, item, success, message=None):
+    job = get_mongo_client().record_job_item_result(job_id, item, success, message)
+    if job and job["pending"] == 0:
+        logger.info(f"{job_id=} finished with status {job['status']}")
+
+
+@celery.task(queue=config.CELERY_QUEUE2, options={"queue": config.CELERY_QUEUE2})
+def record_conversion_result(conversion_status, job_id, gcst_id):
+    """Record the outcome returned by convert_metadata_to_yaml, which
+    handles its own failures instead of raising.
+    """
+    if conversion_status == config.MetadataYamlStatus.FAILED.value:
+        return record_job_result(job_id, gcst_id, False, "Metadata conversion failed.")
+    message = None
+    if conversion_status == config.MetadataYamlStatus.SKIPPED.value:
+        message = "Skipped, no summary statistics file."
+    return record_job_result(job_id, gcst_id, True, message)
+
+
+@celery.task(queue=config.CELERY_QUEUE2, options={"queue": config.CELERY_QUEUE2})
+def fail_job(job_id, message=None):
+    logger.error(f"{job_id=} failed: {message}")
+    get_mongo_client().update_job_status(
+        job_id, config.JobStatus.FAILED, message=message
+    )
 
 
 @celery.task(queue=config.CELERY_QUEUE1, options={"queue": config.CELERY_QUEUE1})
@@ -763,6 +967,71 @@ def delete_globus_endpoint(globus_endpoint_id):
     return au.delete_globus_endpoint(globus_endpoint_id)
 
 
+@celery.task(queue=config.CELERY_QUEUE1, options={"queue": config.CELERY_QUEUE1})
+def delete_globus_endpoints(globus_endpoint_ids):
+    """Tear down many endpoints in one go, returns the outcome per uid"""
+    logger.info(f">>> [delete_globus_endpoints] for {len(globus_endpoint_ids)} uids")
+    return au.delete_globus_endpoints(globus_endpoint_ids)
+
+
+@celery.task(queue=config.CELERY_QUEUE1, options={"queue": config.CELERY_QUEUE1})
+def reap_validation_batches():
+    """Requeue or fail batched callbacks whose batch never finished, then
+    flush anything left queued, run periodically.
+    """
+    logger.info(">>> [reap_validation_batches]")
+    mdb = get_mongo_client()
+    reaped = mdb.reap_validation_batches(
+        updated_before=datetime.now()
+        - timedelta(minutes=config.VALIDATION_BATCH_TIMEOUT_MINUTES),
+        max_requeues=config.VALIDATION_BATCH_MAX_REQUEUES,
+    )
+    for entry in reaped["failed"]:
+        callback_id = entry["callback_id"]
+        logger.error(f"Batch validation of {callback_id=} never finished")
+        mdb.upsert_payload(
+            callback_id=callback_id,
+            status=config.ValidationStatus.COMPLETED,
+        )
+        store_validation_results.apply_async(
+            args=[
+                json.dumps(
+                    au.results_if_failure(callback_id, mdb.get_payload(callback_id))
+                ),
+                entry["forcevalid"],
+            ],
+            retry=True,
+        )
+    if mdb.count_queued_validations():
+        flush_validation_batch.apply_async(retry=True)
+    return {key: [e["callback_id"] for e in entries] for key, entries in reaped.items()}
+
+
+@celery.task(queue=config.CELERY_QUEUE1, options={"queue": config.CELERY_QUEUE1})
+def refill_globus_warm_pool():
+    """Top up the pool of pre-provisioned guest collections when it is
+    below the low-water mark.
+    """
+    logger.info(">>> [refill_globus_warm_pool]")
+    return globus.refill_warm_pool()
+
+
+@celery.task(queue=config.CELERY_QUEUE1, options={"queue": config.CELERY_QUEUE1})
+def reap_globus_warm_pool():
+    """Remove stale and failed pool entries, run periodically"""
+    logger.info(">>> [reap_globus_warm_pool]")
+    return globus.reap_warm_pool()
+
+
+@celery.task(queue=config.CELERY_QUEUE1, options={"queue": config.CELERY_QUEUE1})
+def sync_globus_transfer_events():
+    """Store transfer events that completed since the last sync, run
+    periodically so that upload status lookups stay current.
+    """
+    logger.info(">>> [sync_globus_transfer_events]")
+    return globus.sync_transfer_events()
+
+
 @task_failure.connect
 def task_failure_handler(sender=None, **kwargs) -> None:
     logger.info(">>> [task_failure_handler]")
@@ -784,12 +1053,7 @@ def task_failure_handler(sender=None, **kwargs) -> None:
         is_hm = args[1] if args else "Unknown HM"
 
         # Save to MongoDB
-        mdb = MongoClient(
-            config.MONGO_URI,
-            config.MONGO_USER,
-            config.MONGO_PASSWORD,
-            config.MONGO_DB,
-        )
+        mdb = get_mongo_client()
         study_data = mdb.get_study(gcst_id=gcst_id)
         if not study_data or study_data.get("summaryStatisticsFile", "") != config.NR:
             logger.info(f"Adding {gcst_id=} to the task failures collection")
@@ -41,6 +41,38 @@ REMOTE_HTTP_PROXY = _env_variable_else("REMOTE_HTTP_PROXY", None)
 REMOTE_HTTPS_PROXY = _env_variable_else("REMOTE_HTTPS_PROXY", None)
 SINGULARITY_IMAGE = _env_variable_else("SINGULARITY_IMAGE", "gwas-sumstats-service")
 SINGULARITY_TAG = _env_variable_else("SINGULARITY_TAG", "latest")
+# "nextflow" validates on the cluster, "local" on a process pool in the
+# preval worker, "auto" locally when the submitted files total at most
+# VALIDATION_LOCAL_MAX_MB
+VALIDATION_ENGINE = _env_variable_else("VALIDATION_ENGINE", "nextflow")
+VALIDATION_LOCAL_MAX_MB = int(_env_variable_else("VALIDATION_LOCAL_MAX_MB", 100))
+VALIDATION_LOCAL_WORKERS = int(_env_variable_else("VALIDATION_LOCAL_WORKERS", 2))
+# nextflow validations are queued for up to VALIDATION_BATCH_WINDOW_SECONDS
+# and run together, until VALIDATION_BATCH_MAX_CALLBACKS callbacks or
+# VALIDATION_BATCH_MAX_MB of submitted files are queued
+VALIDATION_BATCH_ENABLED = (
+    _env_variable_else("VALIDATION_BATCH_ENABLED", "False") == "True"
+)
+VALIDATION_BATCH_WINDOW_SECONDS = int(
+    _env_variable_else("VALIDATION_BATCH_WINDOW_SECONDS", 30)
+)
+VALIDATION_BATCH_MAX_CALLBACKS = int(
+    _env_variable_else("VALIDATION_BATCH_MAX_CALLBACKS", 20)
+)
+VALIDATION_BATCH_MAX_MB = int(_env_variable_else("VALIDATION_BATCH_MAX_MB", 500))
+# batched callbacks not finished within VALIDATION_BATCH_TIMEOUT_MINUTES (e.g.
+# their worker died) are queued again, at most VALIDATION_BATCH_MAX_REQUEUES
+# times, then failed. Checked every VALIDATION_BATCH_REAP_MINUTES, together
+# with a flush of whatever is left queued
+VALIDATION_BATCH_TIMEOUT_MINUTES = int(
+    _env_variable_else("VALIDATION_BATCH_TIMEOUT_MINUTES", 180)
+)
+VALIDATION_BATCH_MAX_REQUEUES = int(
+    _env_variable_else("VALIDATION_BATCH_MAX_REQUEUES", 1)
+)
+VALIDATION_BATCH_REAP_MINUTES = int(
+    _env_variable_else("VALIDATION_BATCH_REAP_MINUTES", 10)
+)
 
 # --- MONGO DB --- #
 
@@ -48,6 +80,21 @@ MONGO_URI = _env_variable_else("MONGO_URI", None)
 MONGO_USER = _env_variable_else("MONGO_USER", "")
 MONGO_PASSWORD = _env_variable_else("MONGO_PASSWORD", "")
 MONGO_DB = _env_variable_else("MONGO_DB", None)
+MONGO_INSERT_BATCH_SIZE = int(_env_variable_else("MONGO_INSERT_BATCH_SIZE", 1000))
+# create any missing collection indexes when the celery workers start
+MONGO_ENSURE_INDEXES = _env_variable_else("MONGO_ENSURE_INDEXES", "True") != "False"
+# md5 checksums are cached per file identity (path, inode, size, mtime)
+# entries not used for this many days are evicted by a TTL index
+MD5_CACHE_ENABLED = _env_variable_else("MD5_CACHE_ENABLED", "True") != "False"
+MD5_CACHE_TTL_DAYS = int(_env_variable_else("MD5_CACHE_TTL_DAYS", 90))
+
+
+# --- Hashing --- #
+
+HASH_BUFFER_SIZE = int(_env_variable_else("HASH_BUFFER_SIZE", 8 * 1024 * 1024))
+HASH_WORKERS = int(_env_variable_else("HASH_WORKERS", 4))
+HASH_USE_MMAP = _env_variable_else("HASH_USE_MMAP", "False") == "True"
+
 NR = "NR"
 
 # --- File transfer (FTP nad Globus) config --- #
@@ -57,6 +104,18 @@ FTP_USERNAME = _env_variable_else("FTP_USERNAME", None)
 FTP_PASSWORD = _env_variable_else("FTP_PASSWORD", None)
 FTP_SERVER_EBI = _env_variable_else("FTP_SERVER_EBI", "ftp.ebi.ac.uk")
 FTP_PREFIX = _env_variable_else("FTP_PREFIX", "/pub/databases/gwas/summary_statistics")
+# pooled FTP sessions, per server, per worker process
+FTP_POOL_SIZE = int(_env_variable_else("FTP_POOL_SIZE", 4))
+FTP_TIMEOUT = int(_env_variable_else("FTP_TIMEOUT", 60))
+FTP_KEEPALIVE_SECONDS = int(_env_variable_else("FTP_KEEPALIVE_SECONDS", 30))
+FTP_IDLE_TIMEOUT_SECONDS = int(_env_variable_else("FTP_IDLE_TIMEOUT_SECONDS", 300))
+FTP_LISTING_TTL_SECONDS = int(_env_variable_else("FTP_LISTING_TTL_SECONDS", 120))
+# the index of harmonised directories is re-crawled every FTP_INDEX_CRAWL_MINUTES
+FTP_INDEX_CRAWL_MINUTES = int(_env_variable_else("FTP_INDEX_CRAWL_MINUTES", 60))
+# "ftp" or "local": read the public FTP tree from FTP_MIRROR_PATH, a local
+# mount of FTP_PREFIX, falling back to FTP for anything not readable there
+REMOTE_TREE_BACKEND = _env_variable_else("REMOTE_TREE_BACKEND", "ftp")
+FTP_MIRROR_PATH = _env_variable_else("FTP_MIRROR_PATH", None)
 
 TOKEN_FILE = "refresh-tokens.json"
 REDIRECT_URI = "https://auth.globus.org/v2/web/auth-code"
@@ -74,6 +133,52 @@ STORAGE_GATEWAY_ID = _env_variable_else("STORAGE_GATEWAY_ID", None)
 GWAS_IDENTITY = _env_variable_else(
     "GWAS_IDENTITY", "66dab3b3-b880-4017-b496-9643da909b89"
 )
+# cached Globus tokens are renewed this many seconds before they expire
+GLOBUS_TOKEN_REFRESH_MARGIN = int(
+    _env_variable_else("GLOBUS_TOKEN_REFRESH_MARGIN", 300)
+)
+# concurrent collection deletions and paths per DeleteData in batch teardown
+GLOBUS_TEARDOWN_WORKERS = int(_env_variable_else("GLOBUS_TEARDOWN_WORKERS", 4))
+GLOBUS_DELETE_BATCH_SIZE = int(_env_variable_else("GLOBUS_DELETE_BATCH_SIZE", 500))
+# directory listings used for existence checks are cached this many seconds
+GLOBUS_LISTING_TTL_SECONDS = int(_env_variable_else("GLOBUS_LISTING_TTL_SECONDS", 30))
+# transfer events are synced into mongo every GLOBUS_TRANSFER_SYNC_MINUTES.
+# The first sync reads the tasks of the last ..._LOOKBACK_DAYS (0: all)
+GLOBUS_TRANSFER_SYNC_MINUTES = int(
+    _env_variable_else("GLOBUS_TRANSFER_SYNC_MINUTES", 5)
+)
+GLOBUS_TRANSFER_SYNC_LOOKBACK_DAYS = int(
+    _env_variable_else("GLOBUS_TRANSFER_SYNC_LOOKBACK_DAYS", 30)
+)
+# "local" serves Globus calls from a directory (see globus_local), for
+# benchmarks and tests. GLOBUS_LOCAL_ROOT defaults to DEPO_PATH.
+GLOBUS_BACKEND = _env_variable_else("GLOBUS_BACKEND", "globus")
+GLOBUS_LOCAL_ROOT = _env_variable_else("GLOBUS_LOCAL_ROOT", None)
+GLOBUS_LOCAL_LATENCY_MS = float(_env_variable_else("GLOBUS_LOCAL_LATENCY_MS", 0))
+GLOBUS_LOCAL_JITTER_MS = float(_env_variable_else("GLOBUS_LOCAL_JITTER_MS", 0))
+# pre-provisioned guest collections claimed by mkdir
+GLOBUS_WARM_POOL_ENABLED = (
+    _env_variable_else("GLOBUS_WARM_POOL_ENABLED", "False") == "True"
+)
+GLOBUS_WARM_POOL_DIR = _env_variable_else("GLOBUS_WARM_POOL_DIR", ".warm-pool")
+# refill to GLOBUS_WARM_POOL_SIZE when fewer than the low-water mark are ready
+GLOBUS_WARM_POOL_SIZE = int(_env_variable_else("GLOBUS_WARM_POOL_SIZE", 10))
+GLOBUS_WARM_POOL_LOW_WATER = int(_env_variable_else("GLOBUS_WARM_POOL_LOW_WATER", 5))
+GLOBUS_WARM_POOL_MAX_AGE_DAYS = int(
+    _env_variable_else("GLOBUS_WARM_POOL_MAX_AGE_DAYS", 7)
+)
+# celery beat schedule of the pool refill and reap tasks
+GLOBUS_WARM_POOL_REFILL_MINUTES = int(
+    _env_variable_else("GLOBUS_WARM_POOL_REFILL_MINUTES", 10)
+)
+GLOBUS_WARM_POOL_REAP_HOURS = int(_env_variable_else("GLOBUS_WARM_POOL_REAP_HOURS", 24))
+# placeholders still provisioning after this long are reaped by the next refill
+GLOBUS_WARM_POOL_PROVISIONING_TIMEOUT_MINUTES = int(
+    _env_variable_else(
+        "GLOBUS_WARM_POOL_PROVISIONING_TIMEOUT_MINUTES",
+        3 * GLOBUS_WARM_POOL_REFILL_MINUTES,
+    )
+)
 
 # --- Mail --- #
 
@@ -238,6 +343,28 @@ class ValidationStatus(Enum):
     SKIPPED = "skipped"
 
 
+class JobStatus(Enum):
+    PENDING = "pending"
+    STAGING = "staging"
+    CONVERTING = "converting"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class WarmCollectionStatus(Enum):
+    PROVISIONING = "provisioning"
+    READY = "ready"
+    CLAIMED = "claimed"
+    FAILED = "failed"
+    REAPED = "reaped"
+
+
+class ValidationBatchStatus(Enum):
+    QUEUED = "queued"
+    BATCHED = "batched"
+    DONE = "done"
+
+
 class FileType(Enum):
     GWAS_SSF = "GWAS-SSF v1.0"
     PRE_GWAS_SSF = "pre-GWAS-SSF"
@@ -1,9 +1,8 @@
 import json
 from collections import OrderedDict
 
-import sumstats_service.config as config
 import sumstats_service.resources.api_utils as au
-from sumstats_service.resources.mongo_client import MongoClient
+from sumstats_service.resources.mongo_client import get_mongo_client
 
 
 def root():
@@ -49,9 +48,7 @@ def get_content(callback_id: str) -> dict:
     Returns:
         dict of submission contents
     """
-    mdb = MongoClient(
-        config.MONGO_URI, config.MONGO_USER, config.MONGO_PASSWORD, config.MONGO_DB
-    )
+    mdb = get_mongo_client()
     data = [i for i in mdb.study_collection.find({"callbackID": callback_id})]
     content = {"requestEntries": []}
     for i in data:
@@ -1,6 +1,5 @@
 import ftplib
 import glob
-import hashlib
 import json
 import logging
 import os
@@ -16,16 +15,18 @@ from gwas_sumstats_tools.interfaces.metadata import (
     MetadataClient,
     metadata_dict_from_gwas_cat,
 )
-from pymongo import UpdateOne
 
+import sumstats_service.resources.checksum_cache as checksum_cache
 import sumstats_service.resources.globus as globus
+import sumstats_service.resources.local_validation as local_validation
 import sumstats_service.resources.payload as pl
 import sumstats_service.resources.study_service as st
 import sumstats_service.resources.validate_payload as vp
 from sumstats_service import config, logger_config
 from sumstats_service.resources.error_classes import RequestedNotFound
-from sumstats_service.resources.mongo_client import MongoClient
-from sumstats_service.resources.utils import download_with_requests
+from sumstats_service.resources.mongo_client import get_mongo_client
+from sumstats_service.resources.remote_tree import FTPTree, get_remote_tree
+from sumstats_service.resources.utils import download_with_requests, generate_path
 
 try:
     logger_config.setup_logging()
@@ -71,36 +72,27 @@ def store_validation_results_in_db(validation_response, is_force_valid=False):
     validation_list = json.loads(validation_response)["validationList"]
     callback_id = json.loads(validation_response)["callbackID"]
 
-    bulk_operations = []
+    batch = get_mongo_client().study_update_batch()
 
     for item in validation_list:
-        study_id = item["id"]
-        study = st.Study(study_id)
+        study = st.Study(item["id"])
         study.retrieved = item["retrieved"]
         study.data_valid = item["dataValid"]
         study.error_code = item["errorCode"]
-        # study.store_validation_statuses()
-
-        update_fields = {
-            "retrieved": study.retrieved,
-            "dataValid": study.data_valid,
-            "errorCode": study.error_code,
-        }
-
-        if is_force_valid:
-            update_fields["fileType"] = determine_file_type(
-                is_in_file=True, is_force_valid=True
-            )
-
-        update_operation = UpdateOne({"studyID": study_id}, {"$set": update_fields})
-
-        bulk_operations.append(update_operation)
+        batch.set(
+            study.study_id,
+            study.validation_status_fields(is_force_valid=is_force_valid),
+        )
 
         if study.error_code:
             valid = False
 
-    if bulk_operations:
-        study.bulk_store_validation_statuses(bulk_operations)
+    result = batch.execute()
+    if result["missing"]:
+        logger.error(
+            f"{callback_id=} :: no study entries for {result['missing']}, "
+            "validation results not stored for them"
+        )
 
     if not valid:
         """
@@ -118,6 +110,11 @@ def delete_globus_endpoint(globus_uuid):
     return status
 
 
+def delete_globus_endpoints(globus_uuids):
+    logger.info(f">> delete {len(globus_uuids)} globus endpoints")
+    return globus.remove_endpoints_and_all_contents(globus_uuids)
+
+
 def skip_validation_completely(callback_id, content, file_type=None):
     results = {"callbackID": callback_id, "validationList": []}
     payload = pl.Payload(callback_id=callback_id, payload=content, file_type=file_type)
@@ -176,6 +173,8 @@ def validate_files(
         return validate_metadata
 
     print("No error code.")
+    engine = local_validation.select_engine(content)
+    print(f"Validation engine: {engine}")
     (
         wd,
         payload_path,
@@ -183,42 +182,56 @@ def validate_files(
         log_dir,
         nf_script_path,
     ) = setup_dir_for_validation(callback_id)
-    nextflow_cmd = nextflow_command_string(
-        callback_id=callback_id,
-        payload_path=payload_path,
-        log_dir=log_dir,
-        minrows=minrows,
-        forcevalid=forcevalid,
-        nextflow_config_path=nextflow_config_path,
-        wd=wd,
-        nf_script_path=nf_script_path,
-    )
-    print(nextflow_cmd)
     write_data_to_path(data=json.dumps(content), path=payload_path)
-    write_data_to_path(data=config.NEXTFLOW_CONFIG, path=nextflow_config_path)
-    with open(
-        os.path.join(
-            os.path.dirname(__file__), "../../workflows/process_submission.nf"
-        ),
-        "r",
-    ) as f:
-        write_data_to_path(data=f.read(), path=nf_script_path)
-
     try:
-        print("Running NextFlow command...")
-        result = subprocess.run(
-            nextflow_cmd, capture_output=True, text=True, shell=True
-        )
-
-        if result.returncode != 0:
-            print("Error in submitting job: ", result.stderr)
+        if engine == "local":
+            local_validation.validate_payload(
+                callback_id, content, minrows=minrows, forcevalid=forcevalid
+            )
         else:
-            print("No error. Command output: ", result.stdout)
+            nextflow_cmd = nextflow_command_string(
+                callback_id=callback_id,
+                payload_path=payload_path,
+                log_dir=log_dir,
+                minrows=minrows,
+                forcevalid=forcevalid,
+                nextflow_config_path=nextflow_config_path,
+                wd=wd,
+                nf_script_path=nf_script_path,
+            )
+            print(nextflow_cmd)
+            write_data_to_path(data=config.NEXTFLOW_CONFIG, path=nextflow_config_path)
+            with open(
+                os.path.join(
+                    os.path.dirname(__file__), "../../workflows/process_submission.nf"
+                ),
+                "r",
+            ) as f:
+                write_data_to_path(data=f.read(), path=nf_script_path)
+
+            print("Running NextFlow command...")
+            result = subprocess.run(
+                nextflow_cmd, capture_output=True, text=True, shell=True
+            )
+
+            if result.returncode != 0:
+                print("Error in submitting job: ", result.stderr)
+            else:
+                print("No error. Command output: ", result.stdout)
 
     except Exception as e:
         print("=== EXCEPTION ===")
         print(e)
 
+    return collect_validation_results(callback_id, content, wd)
+
+
+def collect_validation_results(callback_id, content, wd) -> str:
+    """Gather the per study result json files of a validation run
+
+    Returns:
+        json dumped results of the callback
+    """
     json_out_files = [
         f
         for f in glob.glob(os.path.join(wd, "*.json"))
@@ -239,6 +252,100 @@ def validate_files(
     return results_json_dumped
 
 
+def validate_files_batch(
+    batch_id: str,
+    callbacks: list,
+    minrows: Union[int, None] = None,
+    forcevalid: bool = False,
+) -> dict:
+    """Validate the files of several callbacks with one nextflow run
+    of workflows/process_submission_batch.nf. Callbacks whose metadata is
+    invalid are answered straight away, as in validate_files.
+
+    Arguments:
+        batch_id -- batch id, names the nextflow work dir
+        callbacks -- list of dicts with callback_id, content and file_type
+
+    Keyword Arguments:
+        minrows -- minimum number of rows, shared by the batch (default: {None})
+        forcevalid -- force valid, shared by the batch (default: {False})
+
+    Returns:
+        dict of callback id to json dumped results
+    """
+    results = {}
+    entries = []
+    wds = {}
+    for item in callbacks:
+        callback_id, content = item["callback_id"], item["content"]
+        validate_metadata = vp.validate_metadata_for_payload(
+            callback_id, content, item.get("file_type")
+        )
+        if any(
+            [i["errorCode"] for i in json.loads(validate_metadata)["validationList"]]
+        ):
+            results[callback_id] = validate_metadata
+            continue
+        wd, payload_path, _, _, _ = setup_dir_for_validation(callback_id)
+        write_data_to_path(data=json.dumps(content), path=payload_path)
+        wds[callback_id] = wd
+        entries.extend(
+            {
+                "cid": callback_id,
+                "id": entry["id"],
+                "payload": payload_path,
+                "analysisSoftware": bool(entry.get("analysisSoftware")),
+            }
+            for entry in content.get("requestEntries", [])
+        )
+
+    if entries:
+        batch_wd = os.path.join(config.VALIDATED_PATH, "batches", batch_id)
+        log_dir = os.path.join(batch_wd, "logs")
+        Path(log_dir).mkdir(parents=True, exist_ok=True)
+        manifest_path = os.path.join(batch_wd, "batch.json")
+        nextflow_config_path = os.path.join(batch_wd, "nextflow.config")
+        nf_script_path = os.path.join(batch_wd, "validate_submission_batch.nf")
+        write_data_to_path(data=json.dumps(entries), path=manifest_path)
+        write_data_to_path(data=config.NEXTFLOW_CONFIG, path=nextflow_config_path)
+        with open(
+            os.path.join(
+                os.path.dirname(__file__), "../../workflows/process_submission_batch.nf"
+            ),
+            "r",
+        ) as f:
+            write_data_to_path(data=f.read(), path=nf_script_path)
+        nextflow_cmd = nextflow_command_string(
+            callback_id=batch_id,
+            payload_path=manifest_path,
+            log_dir=log_dir,
+            minrows=minrows,
+            forcevalid=forcevalid,
+            nextflow_config_path=nextflow_config_path,
+            wd=batch_wd,
+            nf_script_path=nf_script_path,
+        )
+        print(nextflow_cmd)
+        try:
+            print(f"Running NextFlow command for {len(wds)} callbacks...")
+            result = subprocess.run(
+                nextflow_cmd, capture_output=True, text=True, shell=True
+            )
+            if result.returncode != 0:
+                print("Error in submitting job: ", result.stderr)
+        except Exception as e:
+            print("=== EXCEPTION ===")
+            print(e)
+
+    for item in callbacks:
+        callback_id = item["callback_id"]
+        if callback_id in wds:
+            results[callback_id] = collect_validation_results(
+                callback_id, item["content"], wds[callback_id]
+            )
+    return results
+
+
 def write_data_to_path(data, path):
     with open(path, "w") as f:
         f.write(data)
@@ -398,12 +505,7 @@ def get_template(callback_id):
 def get_file_type_from_mongo(gcst) -> str:
     try:
         logger.debug(f"Fetching the `file_type` for {gcst=}")
-        mdb = MongoClient(
-            config.MONGO_URI,
-            config.MONGO_USER,
-            config.MONGO_PASSWORD,
-            config.MONGO_DB,
-        )
+        mdb = get_mongo_client()
         study_metadata = mdb.get_study_metadata_by_gcst(gcst)
         return study_metadata["fileType"]
     except Exception as e:
@@ -419,12 +521,7 @@ def save_convert_metadata_to_yaml(
         and hm: {is_harmonised_included}"""
     )
 
-    mdb = MongoClient(
-        config.MONGO_URI,
-        config.MONGO_USER,
-        config.MONGO_PASSWORD,
-        config.MONGO_DB,
-    )
+    mdb = get_mongo_client()
     study_data = mdb.get_study(gcst_id=gcst_id)
     if not study_data or study_data.get("summaryStatisticsFile", "") != config.NR:
         logger.info(f"Adding {gcst_id=} to the metadata yaml collection")
@@ -490,10 +587,6 @@ def generate_yaml_hm(accession_id, is_harmonised_included):
     metadata_from_gwas_cat["coordinate_system"] = config.HM_COORDINATE_SYSTEM
     metadata_from_gwas_cat["genome_assembly"] = config.LATEST_ASSEMBLY
     metadata_from_gwas_cat["is_harmonised"] = True
-    metadata_from_gwas_cat["is_sorted"] = get_is_sorted(
-        config.FTP_SERVER_EBI,
-        f"{config.FTP_PREFIX}/{generate_path(accession_id)}/{accession_id}/harmonised",
-    )
     metadata_from_gwas_cat["gwas_id"] = accession_id
     metadata_from_gwas_cat["gwas_catalog_api"] = (
         f"{config.GWAS_CATALOG_REST_API_STUDY_URL}{accession_id}"
@@ -501,10 +594,22 @@ def generate_yaml_hm(accession_id, is_harmonised_included):
 
     # We don't use staging ftp because old harmonised files are not in there
     # but only in public ftp
+    # The tree is read from a local mount if one is configured
+    tree = get_remote_tree()
+    try:
+        hm_listing = tree.harmonised_listing(accession_id)
+    except Exception as e:
+        logger.error(f"Harmonised listing failed for {accession_id}: {e}")
+        hm_listing = None
+    # from the same listing as the data file, so the two agree
+    metadata_from_gwas_cat["is_sorted"] = get_is_sorted(accession_id, hm_listing)
     filenames_to_md5_values = compute_md5_for_ftp_files(
         config.FTP_SERVER_EBI,
-        f"{config.FTP_PREFIX}/{generate_path(accession_id)}/{accession_id}/harmonised",
+        tree.harmonised_dir(accession_id),
         accession_id,
+        is_harmonised=True,
+        listing=hm_listing,
+        tree=tree,
     )
     filename_to_md5sum_hm = get_md5_for_accession(
         filenames_to_md5_values,
@@ -655,12 +760,7 @@ def convert_metadata_to_yaml(accession_id: str, is_harmonised_included: bool):
         else:
             generate_yaml_hm(accession_id, is_harmonised_included)
 
-        mdb = MongoClient(
-            config.MONGO_URI,
-            config.MONGO_USER,
-            config.MONGO_PASSWORD,
-            config.MONGO_DB,
-        )
+        mdb = get_mongo_client()
         mdb.insert_or_update_metadata_yaml_request(
             gcst_id=accession_id,
             status=config.MetadataYamlStatus.COMPLETED,
@@ -673,64 +773,51 @@ def convert_metadata_to_yaml(accession_id: str, is_harmonised_included: bool):
         raise
 
 
-def generate_path(gcst_id):
-    if not gcst_id.startswith("GCST"):
-        raise ValueError("Invalid GCST ID format.")
-
-    # Note that -1 required for edge cases,
-    # e.g., 'GCST90427001-GCST90428000/GCST90428000'
-    num_part = int(gcst_id[4:]) - 1
-
-    lower_bound = (num_part // 1000) * 1000 + 1
-    upper_bound = lower_bound + 999
-    num_digits = len(gcst_id) - 4
-
-    # Do zero-padding accordingly
-    return f"GCST{lower_bound:0{num_digits}d}-GCST{upper_bound:0{num_digits}d}"
-
-
-def get_is_sorted(ftp_server: str, ftp_directory: str):
+def get_is_sorted(accession_id: str, listing=None) -> bool:
+    """Whether the harmonised directory has a tabix index. Without a
+    listing of the directory it is looked up, e.g. in the FTP index.
+    """
     try:
-        with ftplib.FTP(ftp_server) as ftp:
-            ftp.login()
-            ftp.cwd(ftp_directory)
-            return any(f.endswith(".tbi") for f in ftp.nlst())
+        if listing is None:
+            listing = get_remote_tree().harmonised_listing(accession_id)
+        return any(f.endswith(".tbi") for f in listing)
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
         return False
 
 
-def compute_md5_for_ftp_files(ftp_server: str, ftp_directory: str, file_id: str):
-    """Compute MD5 checksums for files in an FTP directory."""
-    filename_to_md5 = {}
+def compute_md5_for_ftp_files(
+    ftp_server: str,
+    ftp_directory: str,
+    file_id: str,
+    is_harmonised=False,
+    listing=None,
+    tree=None,
+):
+    """Get MD5 checksums for files in a directory of the public FTP tree.
 
-    try:
-        with ftplib.FTP(ftp_server) as ftp:
-            try:
-                ftp.login()
-                ftp.cwd(ftp_directory)
-                files = ftp.nlst()
-            except ftplib.error_perm as e:
-                logger.error(f"FTP error: {e}")
-                return {}
-
-            # Filter out hidden files
-            files_of_interest = [f for f in files if not f.startswith(".")]
-
-            for filename in files_of_interest:
-                try:
-                    md5_checksum = compute_md5_ftp(ftp, ftp_directory, filename)
-                    filename_to_md5[filename] = md5_checksum
-                except Exception as e:
-                    logger.error(f"Error computing MD5 for {filename}: {e}")
-                    continue
+    Checksums come from the directory's md5sum.txt or the checksum cache where
+    possible, and only the data file for file_id is downloaded and hashed
+    if its checksum is not known. A listing of the directory can be given,
+    e.g. from the FTP index; the directory is listed if the listing is not
+    given or has no data file. The tree defaults to FTP on ftp_server.
+    """
 
+    def select_data_file(filenames):
+        return get_md5_for_accession(dict.fromkeys(filenames), file_id, is_harmonised)
+
+    tree = tree if tree else FTPTree(ftp_server)
+    try:
+        return tree.md5_checksums(
+            ftp_directory, select=select_data_file, listing=listing
+        )
+    except ftplib.error_perm as e:
+        logger.error(f"FTP error: {e}")
+        return {}
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
         return {}
 
-    return filename_to_md5
-
 
 def write_md5_for_files(filename_to_md5: dict, output_file: str) -> None:
     with open(output_file, "w") as f:
@@ -758,10 +845,10 @@ def compute_md5_for_local_files(accession_id, path):
     ]
     logger.info(f"{files_of_interest=}")
 
-    # Compute MD5 for each file and store the line for the output file
-    for filename in files_of_interest:
-        file_path = os.path.join(path, filename)
-        md5_checksum = compute_md5_local(file_path)
+    # Compute MD5 for the files in parallel, reusing cached checksums
+    file_paths = {os.path.join(path, f): f for f in files_of_interest}
+    for file_path, md5_checksum in checksum_cache.md5_many(file_paths).items():
+        filename = file_paths[file_path]
         md5_lines.append(f"{md5_checksum} {filename}")
         filename_to_md5[filename] = md5_checksum
 
@@ -771,25 +858,9 @@ def compute_md5_for_local_files(accession_id, path):
 
 
 def compute_md5_local(file_path: str) -> str:
-    """Compute the MD5 checksum of a file."""
-    hash_md5 = hashlib.md5()
-    with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_md5.update(chunk)
-    return hash_md5.hexdigest()
-
-
-def compute_md5_ftp(ftp: ftplib.FTP, ftp_path: str, filename: str) -> str:
-    """Compute MD5 checksum for a single file on an FTP server using an existing
-    FTP connection."""
-    md5 = hashlib.md5()
-
-    def handle_binary(m):
-        md5.update(m)
-
-    ftp.retrbinary(f"RETR {filename}", handle_binary)
-
-    return md5.hexdigest()
+    """Compute the MD5 checksum of a file, reusing the cached checksum if
+    the file has not changed since it was last hashed."""
+    return checksum_cache.md5(file_path)
 
 
 def get_md5_for_accession(
@@ -0,0 +1,149 @@
+"""md5 checksums cached by file identity.
+
+A cached checksum is only used while the file still has the same path,
+inode, size and mtime_ns, so a file that is rewritten or replaced is hashed
+again. Entries live in the sumstats-md5-cache collection and are evicted by
+a TTL index once they have not been used for config.MD5_CACHE_TTL_DAYS.
+If mongo is not configured or cannot be reached the file is simply hashed,
+and after the first failure the cache is not tried again by this process.
+"""
+
+import logging
+import os
+
+from pymongo.errors import PyMongoError
+
+from sumstats_service import config
+from sumstats_service.resources import hashing
+from sumstats_service.resources.mongo_client import get_mongo_client
+
+logger = logging.getLogger(__name__)
+
+_unavailable = False
+
+
+def file_identity(path: str) -> tuple:
+    """(path, inode, size, mtime_ns) of a file"""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    return path, stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def hash_file(path: str) -> str:
+    """Compute the md5 of a file, bypassing the cache"""
+    return hashing.md5_file(path)
+
+
+def md5(path: str) -> str:
+    """md5 of a file, from the cache if the file is unchanged
+
+    Arguments:
+        path -- path to the file
+
+    Returns:
+        hex digest
+    """
+    if not _cache_enabled():
+        return hash_file(path)
+    identity = file_identity(path)
+    cached = lookup(identity)
+    if cached:
+        logger.debug(f"md5 cache hit for {identity[0]}")
+        return cached
+    checksum = hash_file(path)
+    store(identity, checksum)
+    return checksum
+
+
+def md5_many(paths) -> dict:
+    """md5 of many files. Cached checksums are reused and the rest
+    are hashed in parallel.
+
+    Arguments:
+        paths -- iterable of file paths
+
+    Returns:
+        dict of path (as given) to hex digest
+    """
+    paths = list(paths)
+    if not _cache_enabled():
+        return hashing.md5_files(paths, hasher=hash_file)
+    checksums = {}
+    misses = {}
+    for path in paths:
+        identity = file_identity(path)
+        cached = lookup(identity)
+        if cached:
+            checksums[path] = cached
+        else:
+            misses[path] = identity
+    if misses:
+        logger.debug(f"md5 cache misses: {len(misses)} of {len(paths)}")
+        for path, checksum in hashing.md5_files(misses, hasher=hash_file).items():
+            checksums[path] = checksum
+            store(misses[path], checksum)
+    return {path: checksums[path] for path in paths}
+
+
+def record(path: str, checksum: str) -> None:
+    """Cache a checksum that was computed elsewhere, e.g. while the
+    file was being written.
+
+    Arguments:
+        path -- path to the file as it is now
+        checksum -- md5 hex digest of its content
+    """
+    if _cache_enabled():
+        store(file_identity(path), checksum)
+
+
+def lookup(identity: tuple):
+    """Cached md5 for an identity, or None
+
+    Arguments:
+        identity -- (path, inode, size, mtime_ns). Remote files use
+        their URL as path and 0 as inode.
+    """
+    if not _cache_enabled():
+        return None
+    try:
+        return get_mongo_client().get_cached_md5(*identity)
+    except PyMongoError as e:
+        _disable(e)
+        return None
+
+
+def store(identity: tuple, checksum: str) -> None:
+    """Cache the md5 for an identity, see lookup()"""
+    if not _cache_enabled():
+        return
+    try:
+        get_mongo_client().set_cached_md5(*identity, checksum)
+    except PyMongoError as e:
+        _disable(e)
+
+
+def evict(paths) -> int:
+    """Drop cached checksums for the given paths
+
+    Returns:
+        number of entries removed
+    """
+    if not _cache_enabled():
+        return 0
+    paths = [os.path.abspath(p) for p in paths]
+    try:
+        return get_mongo_client().evict_cached_md5(paths)
+    except PyMongoError as e:
+        _disable(e)
+        return 0
+
+
+def _cache_enabled() -> bool:
+    return config.MD5_CACHE_ENABLED and bool(config.MONGO_URI) and not _unavailable
+
+
+def _disable(error) -> None:
+    global _unavailable
+    _unavailable = True
+    logger.warning(f"md5 cache unavailable, hashing files directly: {error}")
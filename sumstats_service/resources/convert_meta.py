@@ -18,7 +18,7 @@ from packaging import version
 from pydantic import validator
 
 from sumstats_service import config
-from sumstats_service.resources.mongo_client import MongoClient
+from sumstats_service.resources.mongo_client import get_mongo_client
 from sumstats_service.resources.utils import download_with_requests
 
 logging.basicConfig(level=logging.DEBUG, format="(%(levelname)s): %(message)s")
@@ -358,12 +358,7 @@ class MetadataConverter:
         if not self._in_file:
             file_type += "-incomplete-meta"
         if self._callback_id:
-            mdb = MongoClient(
-                config.MONGO_URI,
-                config.MONGO_USER,
-                config.MONGO_PASSWORD,
-                config.MONGO_DB,
-            )
+            mdb = get_mongo_client()
             if mdb.get_bypass_validation_status(callback_id=self._callback_id):
                 file_type = "Non-GWAS-SSF"
         return file_type
@@ -0,0 +1,76 @@
+"""Process-local cache of the validation error catalogue.
+
+The error texts are static (see config.VALIDATION_ERRORS) so they are loaded
+once per process, from the error collection or from config if the collection
+is empty, and then served from memory. Call invalidate() after changing the
+error collection to force a reload on the next lookup.
+"""
+
+import threading
+
+from sumstats_service import config
+from sumstats_service.resources.mongo_client import MongoClient, get_mongo_client
+
+
+class ErrorCatalogue:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._errors = None
+        self.version = 0
+        self.source = None
+
+    def load(self, mdb: MongoClient = None) -> dict:
+        """(Re)load the catalogue, seeding the error collection
+        from config if it is empty.
+
+        Keyword Arguments:
+            mdb -- mongo client (default: {shared client})
+
+        Returns:
+            dict of error code to error text
+        """
+        mdb = mdb if mdb else get_mongo_client()
+        errors = {
+            e["id"]: e["errorText"]
+            for e in mdb.error_collection.find({}, {"_id": 0, "id": 1, "errorText": 1})
+        }
+        source = "mongo"
+        if not errors:
+            mdb.create_error_table()
+            errors = {e["id"]: e["errorText"] for e in config.VALIDATION_ERRORS}
+            source = "config"
+        with self._lock:
+            self._errors = errors
+            self.version += 1
+            self.source = source
+        return errors
+
+    def get_text(self, code):
+        """Error text for a code, or None if the code is unknown"""
+        errors = self._errors
+        if errors is None:
+            errors = self.load()
+        return errors.get(code)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._errors = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._errors is not None
+
+
+_catalogue = ErrorCatalogue()
+
+
+def get_error_text(code):
+    return _catalogue.get_text(code)
+
+
+def invalidate() -> None:
+    _catalogue.invalidate()
+
+
+def catalogue_version() -> int:
+    return _catalogue.version
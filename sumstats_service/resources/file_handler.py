@@ -1,17 +1,19 @@
 import csv
 import gzip
 import hashlib
+import json
 import logging
 import os
 import pathlib
 import shutil
 import urllib
+import zlib
 from glob import glob
 from urllib.parse import urlparse
 
-import magic
 from gwas_sumstats_tools.validate import Validator
 
+import sumstats_service.resources.checksum_cache as checksum_cache
 import sumstats_service.resources.globus as globus
 from sumstats_service import config
 from sumstats_service.resources.convert_meta import MetadataConverter
@@ -20,6 +22,11 @@ from sumstats_service.resources.utils import download_with_requests
 logging.basicConfig(level=logging.DEBUG, format="(%(levelname)s): %(message)s")
 logger = logging.getLogger(__name__)
 
+GZIP_MAGIC = b"\x1f\x8b"
+INGEST_CHUNK_SIZE = 1024 * 1024
+# Give up sniffing if the first (decompressed) line is longer than this
+HEAD_LIMIT = 64 * 1024
+
 
 class SumStatFile:
     def __init__(
@@ -54,6 +61,11 @@ class SumStatFile:
         self.store_path = None
         self.parent_path = None
         self.genome_assembly = None
+        # facts recorded by ingest so later steps need not reread the file
+        self.md5 = None
+        self.is_gzip = None
+        self.delimiter = None
+        self.size = None
 
     def set_logfile(self):
         for handler in logger.handlers[:]:  # remove all old handlers
@@ -83,14 +95,67 @@ class SumStatFile:
         self.make_parent_dir()
         self.set_store_path()
         source_path = self._get_source_file()
-        # copy from source_path to store_path
+        # copy from source_path to store_path, collecting md5, compression
+        # and delimiter on the way so the file is only read once
         try:
-            shutil.copyfile(source_path, self.store_path)
-            self.rename_file_with_ext()
-            return True
+            facts = ingest_file(source_path, self.store_path)
         except FileNotFoundError:
             logger.error(f"Could not find {source_path}")
             return False
+        self.set_ingest_facts(facts)
+        self.rename_file_with_ext()
+        self.write_ingest_facts()
+        checksum_cache.record(self.store_path, self.md5)
+        return True
+
+    def set_ingest_facts(self, facts: dict) -> None:
+        self.md5 = facts["md5"]
+        self.is_gzip = facts["is_gzip"]
+        self.delimiter = facts["delimiter"]
+        self.size = facts["size"]
+
+    def _get_ingest_facts_path(self):
+        # hidden so that it is not matched by the study_id* globs
+        return os.path.join(self.parent_path, "." + str(self.study_id) + ".ingest")
+
+    def write_ingest_facts(self) -> None:
+        """Store the ingest facts next to the stored file, so that
+        steps run in other processes can reuse them.
+        """
+        stat = os.stat(self.store_path)
+        facts = {
+            "store_path": self.store_path,
+            "md5": self.md5,
+            "is_gzip": self.is_gzip,
+            "delimiter": self.delimiter,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+        with open(self._get_ingest_facts_path(), "w") as f:
+            json.dump(facts, f)
+
+    def load_ingest_facts(self) -> bool:
+        """Load the ingest facts for the stored file if they are still valid
+
+        Returns:
+            True if the facts were loaded
+        """
+        if not self.parent_path:
+            self.set_parent_path()
+        try:
+            with open(self._get_ingest_facts_path()) as f:
+                facts = json.load(f)
+            stat = os.stat(facts["store_path"])
+        except (OSError, ValueError, KeyError):
+            return False
+        if (
+            facts["store_path"] != self.store_path
+            or facts["size"] != stat.st_size
+            or facts["mtime_ns"] != stat.st_mtime_ns
+        ):
+            return False
+        self.set_ingest_facts(facts)
+        return True
 
     def _get_source_dir(self):
         return os.path.join(config.DEPO_PATH, self.entryUUID)
@@ -137,24 +202,32 @@ class SumStatFile:
             with open(readme_path, "w") as readme:
                 readme.write(self.readme)
 
-    def md5_ok(self):
+    def get_md5(self):
+        """md5 of the stored file, from ingest if available"""
         f = self.glob_store_path()
-        logger.info("md5: " + md5_check(f))
-        if self.md5exp == md5_check(f):
+        if self.md5 is None and not self.load_ingest_facts():
+            self.md5 = md5_check(f)
+        return self.md5
+
+    def md5_ok(self):
+        md5 = self.get_md5()
+        logger.info("md5: " + md5)
+        if self.md5exp == md5:
             return True
         return False
 
     def get_ext(self):
-        detect = magic.Magic(uncompress=True)
-        description = detect.from_file(self.store_path)
-        logger.info("file type description: " + description)
-        if "gzip" in description:
-            with gzip.open(self.store_path, "rt") as f:
-                ext = self.get_dialect(f) + ".gz"
-        else:
-            with open(self.store_path, "r") as f:
+        if self.size is None:
+            # not ingested, so look at the head of the stored file
+            with open(self.store_path, "rb") as f:
+                self.is_gzip = f.read(len(GZIP_MAGIC)) == GZIP_MAGIC
+            opener = gzip.open if self.is_gzip else open
+            with opener(self.store_path, "rt") as f:
                 ext = self.get_dialect(f)
-        return ext
+        else:
+            ext = self.ext_for_delimiter(self.delimiter)
+        logger.info(f"gzip: {self.is_gzip}, ext: {ext}")
+        return ext + ".gz" if self.is_gzip else ext
 
     def rename_file_with_ext(self):
         ext = self.get_ext()
@@ -197,24 +270,26 @@ class SumStatFile:
 
     def get_dialect(self, csv_file):
         try:
-            detect = csv.Sniffer().sniff(csv_file.readline()).delimiter
-            if str(detect) == "\t":
-                return ".tsv"
-            elif str(detect) == ",":
-                return ".csv"
-            else:
-                ext = pathlib.Path(self.file_path).suffix
-                if ext:
-                    return ext
-                else:
-                    logger.error(
-                        "Unable to determine file type/extension setting to .tsv"
-                    )
-                    return ".tsv"
+            self.delimiter = sniff_delimiter(csv_file.readline())
         except Exception as e:
             logger.error(e)
+        return self.ext_for_delimiter(self.delimiter)
+
+    def ext_for_delimiter(self, delimiter):
+        if delimiter is None:
             logger.error("Guessing extension, setting to .tsv")
             return ".tsv"
+        if str(delimiter) == "\t":
+            return ".tsv"
+        elif str(delimiter) == ",":
+            return ".csv"
+        else:
+            ext = pathlib.Path(self.file_path).suffix
+            if ext:
+                return ext
+            else:
+                logger.error("Unable to determine file type/extension setting to .tsv")
+                return ".tsv"
 
     def write_metadata_file(
         self,
@@ -360,12 +435,71 @@ def filepath_exists_with_globus(path):
     return globus.filepath_exists(path)
 
 
-def md5_check(file):
+def sniff_delimiter(line):
+    """Delimiter of a header line, or None if it cannot be sniffed"""
+    try:
+        return csv.Sniffer().sniff(line).delimiter
+    except csv.Error as e:
+        logger.error(e)
+        return None
+
+
+def ingest_file(source, dest, chunk_size=INGEST_CHUNK_SIZE) -> dict:
+    """Copy source to dest in a single pass, and on the way compute
+    the md5, detect gzip from the magic bytes and sniff the delimiter
+    from the first (decompressed) line.
+
+    Arguments:
+        source -- path to read
+        dest -- path to write
+
+    Keyword Arguments:
+        chunk_size -- bytes per read (default: {INGEST_CHUNK_SIZE})
+
+    Returns:
+        dict with md5, is_gzip, delimiter and size
+    """
     hash_md5 = hashlib.md5()
-    with open(file, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
+    size = 0
+    is_gzip = None
+    decompressor = None
+    head = b""
+    sniffing = True
+    with open(source, "rb") as src, open(dest, "wb") as dst:
+        for chunk in iter(lambda: src.read(chunk_size), b""):
+            dst.write(chunk)
             hash_md5.update(chunk)
-    return hash_md5.hexdigest()
+            size += len(chunk)
+            if is_gzip is None:
+                is_gzip = chunk[: len(GZIP_MAGIC)] == GZIP_MAGIC
+                if is_gzip:
+                    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+            if sniffing:
+                if decompressor is None:
+                    head += chunk[: HEAD_LIMIT - len(head)]
+                else:
+                    try:
+                        head += decompressor.decompress(
+                            decompressor.unconsumed_tail + chunk,
+                            HEAD_LIMIT - len(head),
+                        )
+                    except zlib.error as e:
+                        logger.error(f"Could not decompress {source}: {e}")
+                        sniffing = False
+                sniffing = (
+                    sniffing and b"\n" not in head and len(head) < HEAD_LIMIT
+                )
+    first_line = head.split(b"\n", 1)[0].decode("utf-8", errors="replace")
+    return {
+        "md5": hash_md5.hexdigest(),
+        "is_gzip": bool(is_gzip),
+        "delimiter": sniff_delimiter(first_line + "\n") if first_line else None,
+        "size": size,
+    }
+
+
+def md5_check(file):
+    return checksum_cache.md5(file)
 
 
 def remove_payload(callback_id):
@@ -0,0 +1,172 @@
+"""md5 checksums of files in a remote FTP directory.
+
+Downloading a file just to hash it is the last resort. The checksums are
+taken, in order, from:
+
+1. an md5sum.txt (or md5sums.txt) manifest in the directory,
+2. the checksum cache, keyed by the file URL, SIZE and MDTM,
+3. streaming the file with RETR and hashing it. This is only done for
+   the files that are actually needed, e.g. the data file.
+"""
+
+import ftplib
+import hashlib
+import logging
+from datetime import datetime, timezone
+
+from sumstats_service.resources import checksum_cache
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAMES = ("md5sum.txt", "md5sums.txt")
+RETR_BLOCK_SIZE = 1024 * 1024
+
+
+def parse_md5_manifest(text: str) -> dict:
+    """Parse md5sum output, i.e. lines of '<md5> <filename>', where the
+    filename may be prefixed with '*' (binary mode) or './'.
+
+    Returns:
+        dict of filename to md5
+    """
+    checksums = {}
+    for line in text.splitlines():
+        parts = line.strip().split(maxsplit=1)
+        if len(parts) != 2 or len(parts[0]) != 32:
+            continue
+        md5, filename = parts
+        filename = filename.lstrip("*")
+        if filename.startswith("./"):
+            filename = filename[2:]
+        checksums[filename] = md5.lower()
+    return checksums
+
+
+def parse_ftp_time(value: str) -> int:
+    """MDTM/MLSD modify time (YYYYMMDDHHMMSS[.sss], UTC) in nanoseconds"""
+    seconds, _, fraction = value.partition(".")
+    timestamp = datetime.strptime(seconds, "%Y%m%d%H%M%S").replace(tzinfo=timezone.utc)
+    fraction_ns = int(fraction.ljust(9, "0")[:9]) if fraction else 0
+    return int(timestamp.timestamp()) * 1_000_000_000 + fraction_ns
+
+
+def list_directory(ftp: ftplib.FTP) -> dict:
+    """List the current directory, with size and modify time where the
+    server supports MLSD.
+
+    Returns:
+        dict of filename to (size, mtime_ns), or to None when unknown
+    """
+    try:
+        return {
+            name: _stats_from_facts(facts)
+            for name, facts in ftp.mlsd(facts=["type", "size", "modify"])
+            if facts.get("type", "file") == "file"
+        }
+    except ftplib.error_perm:
+        return {name: None for name in ftp.nlst()}
+
+
+def _stats_from_facts(facts: dict):
+    try:
+        return int(facts["size"]), parse_ftp_time(facts["modify"])
+    except (KeyError, ValueError):
+        return None
+
+
+def file_stats(ftp: ftplib.FTP, filename: str):
+    """(size, mtime_ns) of a file using SIZE and MDTM, or None"""
+    try:
+        ftp.voidcmd("TYPE I")
+        size = ftp.size(filename)
+        mtime_ns = parse_ftp_time(ftp.voidcmd(f"MDTM {filename}").split()[-1])
+    except (ftplib.error_perm, ValueError):
+        return None
+    if size is None:
+        return None
+    return size, mtime_ns
+
+
+def read_manifest(ftp: ftplib.FTP, names) -> dict:
+    """Checksums from the first manifest found among names"""
+    for manifest in MANIFEST_NAMES:
+        if manifest not in names:
+            continue
+        lines = []
+        try:
+            ftp.retrlines(f"RETR {manifest}", lines.append)
+        except ftplib.error_perm as e:
+            logger.error(f"Could not read {manifest}: {e}")
+            continue
+        return parse_md5_manifest("\n".join(lines))
+    return {}
+
+
+def stream_md5(ftp: ftplib.FTP, filename: str) -> str:
+    """Hash a remote file by streaming it with RETR"""
+    md5 = hashlib.md5()
+    ftp.retrbinary(f"RETR {filename}", md5.update, blocksize=RETR_BLOCK_SIZE)
+    return md5.hexdigest()
+
+
+def ftp_md5_checksums(
+    ftp: ftplib.FTP, ftp_server: str, ftp_directory: str, select=None, listing=None
+) -> dict:
+    """md5 checksums for the files in an FTP directory
+
+    Arguments:
+        ftp -- logged in FTP connection
+        ftp_server -- server name, used to key the cache
+        ftp_directory -- directory to look in
+
+    Keyword Arguments:
+        select -- function of the list of filenames returning the ones
+        that must have a checksum, downloading them if need be
+        (default: {all files})
+        listing -- listing of the directory, as from list_directory()
+        (default: {list the directory})
+
+    Returns:
+        dict of filename to md5, for the files whose checksum is known
+    """
+    ftp.cwd(ftp_directory)
+    if listing is None:
+        listing = list_directory(ftp)
+    listing = {
+        name: stats for name, stats in listing.items() if not name.startswith(".")
+    }
+    names = list(listing)
+    needed = set(names if select is None else select(names)) & set(listing)
+
+    manifest = read_manifest(ftp, names)
+    checksums = {name: manifest[name] for name in names if name in manifest}
+
+    identities = {}
+    for name in names:
+        if name in checksums:
+            continue
+        stats = listing[name]
+        if stats is None and name in needed:
+            stats = file_stats(ftp, name)
+        if stats is None:
+            continue
+        identities[name] = (
+            f"ftp://{ftp_server}{ftp_directory.rstrip('/')}/{name}",
+            0,
+            *stats,
+        )
+        cached = checksum_cache.lookup(identities[name])
+        if cached:
+            checksums[name] = cached
+
+    for name in sorted(needed - set(checksums)):
+        logger.info(f"No known md5 for {name}, streaming it from {ftp_server}")
+        checksums[name] = stream_md5(ftp, name)
+        if name in identities:
+            checksum_cache.store(identities[name], checksums[name])
+
+    logger.info(
+        f"md5 for {ftp_directory}: {len(manifest)} from manifest, "
+        f"{len(checksums)} known of {len(names)} files"
+    )
+    return {name: checksums[name] for name in names if name in checksums}
@@ -0,0 +1,203 @@
+"""Index of the harmonised directories on the public FTP.
+
+Accessions are grouped on the FTP in 1000-wide buckets (see generate_path).
+crawl_bucket() walks a whole bucket over one pooled session with MLSD and
+records, per accession, the files in its harmonised directory (name, size,
+modify time) and whether there is a .tbi. Entries are stored in the
+sumstats-ftp-index collection so that get_is_sorted and the harmonised file
+lookups do not need a network round trip.
+
+Crawls are incremental: an accession whose directory has not changed since
+the last crawl and which had no harmonised directory is not listed again,
+and only entries whose content changed are rewritten. The crawl runs
+periodically from celery beat (crawl_ftp_index), lookups only go to the
+FTP for accessions that are not in the index yet.
+"""
+
+import ftplib
+import logging
+import time
+from datetime import datetime
+
+from sumstats_service import config
+from sumstats_service.resources.ftp_checksums import parse_ftp_time
+from sumstats_service.resources.ftp_pool import FTPPool, get_ftp_pool
+from sumstats_service.resources.mongo_client import MongoClient, get_mongo_client
+from sumstats_service.resources.utils import generate_path
+
+logger = logging.getLogger(__name__)
+
+MLSD_FACTS = ["type", "size", "modify"]
+
+
+class FTPIndex:
+    def __init__(
+        self,
+        mdb: MongoClient = None,
+        pool: FTPPool = None,
+        prefix: str = None,
+    ):
+        self.mdb = mdb if mdb else get_mongo_client()
+        self.pool = pool if pool else get_ftp_pool(config.FTP_SERVER_EBI)
+        self.prefix = (prefix if prefix is not None else config.FTP_PREFIX).rstrip("/")
+
+    def bucket_path(self, bucket: str) -> str:
+        return f"{self.prefix}/{bucket}"
+
+    def harmonised_path(self, gcst_id: str) -> str:
+        return f"{self.bucket_path(generate_path(gcst_id))}/{gcst_id}/harmonised"
+
+    def _list_harmonised(self, ftp: ftplib.FTP, gcst_id: str):
+        """Files of an accession's harmonised directory, or None if there
+        is no harmonised directory.
+        """
+        try:
+            entries = ftp.mlsd(self.harmonised_path(gcst_id), facts=MLSD_FACTS)
+            files = []
+            for name, facts in entries:
+                if facts.get("type") != "file" or name.startswith("."):
+                    continue
+                files.append(
+                    {
+                        "name": name,
+                        "size": int(facts["size"]) if "size" in facts else None,
+                        "mtime_ns": (
+                            parse_ftp_time(facts["modify"])
+                            if "modify" in facts
+                            else None
+                        ),
+                    }
+                )
+        except ftplib.error_perm:
+            return None
+        return sorted(files, key=lambda f: f["name"])
+
+    def _entry(self, gcst_id, files, dir_mtime_ns=None) -> dict:
+        return {
+            "gcst_id": gcst_id,
+            "bucket": generate_path(gcst_id),
+            "dir_mtime_ns": dir_mtime_ns,
+            "harmonised": files is not None,
+            "files": files or [],
+            "has_tbi": any(f["name"].endswith(".tbi") for f in files or []),
+        }
+
+    def crawl_bucket(self, bucket: str) -> dict:
+        """List every accession of a bucket and update the index
+
+        Arguments:
+            bucket -- e.g. GCST90427001-GCST90428000
+
+        Returns:
+            dict of counts: accessions, listed, updated
+        """
+        start = time.monotonic()
+        existing = self.mdb.get_ftp_index_entries(bucket)
+
+        def crawl(ftp):
+            changed, unchanged, listed = [], [], 0
+            for name, facts in ftp.mlsd(self.bucket_path(bucket), facts=MLSD_FACTS):
+                if facts.get("type") != "dir" or not name.startswith("GCST"):
+                    continue
+                dir_mtime_ns = (
+                    parse_ftp_time(facts["modify"]) if "modify" in facts else None
+                )
+                previous = existing.get(name)
+                if (
+                    previous
+                    and dir_mtime_ns is not None
+                    and previous.get("dir_mtime_ns") == dir_mtime_ns
+                    and not previous.get("harmonised")
+                ):
+                    # no harmonised directory has appeared since the last crawl
+                    unchanged.append(name)
+                    continue
+                listed += 1
+                entry = self._entry(
+                    name, self._list_harmonised(ftp, name), dir_mtime_ns
+                )
+                if previous and all(previous.get(k) == v for k, v in entry.items()):
+                    unchanged.append(name)
+                else:
+                    changed.append(entry)
+            return changed, unchanged, listed
+
+        changed, unchanged, listed = self.pool.run(crawl)
+        now = datetime.now()
+        for entry in changed:
+            entry["checked"] = now
+        self.mdb.upsert_ftp_index_entries(changed)
+        if unchanged:
+            self.mdb.touch_ftp_index_entries(unchanged, now)
+        result = {
+            "accessions": len(changed) + len(unchanged),
+            "listed": listed,
+            "updated": len(changed),
+        }
+        logger.info(f"Crawled {bucket} in {time.monotonic() - start:.1f}s: {result}")
+        return result
+
+    def crawl(self, buckets=None) -> dict:
+        """Crawl the given buckets, or every bucket under the prefix
+
+        Returns:
+            dict of bucket to crawl_bucket() counts
+        """
+        if buckets is None:
+            buckets = sorted(
+                name
+                for name, facts in self.pool.run(
+                    lambda ftp: list(ftp.mlsd(self.prefix, facts=["type"]))
+                )
+                if facts.get("type") == "dir" and name.startswith("GCST")
+            )
+        return {bucket: self.crawl_bucket(bucket) for bucket in buckets}
+
+    def refresh(self, gcst_id: str) -> dict:
+        """List one accession's harmonised directory and update its entry"""
+        files = self.pool.run(lambda ftp: self._list_harmonised(ftp, gcst_id))
+        previous = self.mdb.get_ftp_index_entry(gcst_id) or {}
+        entry = self._entry(gcst_id, files, previous.get("dir_mtime_ns"))
+        entry["checked"] = datetime.now()
+        self.mdb.upsert_ftp_index_entries([entry])
+        return entry
+
+    def get(self, gcst_id: str, refresh_missing: bool = True) -> dict:
+        """Index entry for an accession, as of the last crawl. An accession
+        that is not indexed yet is listed first, unless refresh_missing is
+        False.
+
+        Returns:
+            the entry, or None if it is not indexed and not refreshed
+        """
+        entry = self.mdb.get_ftp_index_entry(gcst_id)
+        if entry is None and refresh_missing:
+            entry = self.refresh(gcst_id)
+        return entry
+
+    def is_sorted(self, gcst_id: str) -> bool:
+        entry = self.get(gcst_id)
+        return bool(entry and entry["has_tbi"])
+
+    def harmonised_listing(self, gcst_id: str) -> dict:
+        """Harmonised files of an accession in the shape returned by
+        ftp_checksums.list_directory()
+
+        Returns:
+            dict of filename to (size, mtime_ns) or None
+        """
+        entry = self.get(gcst_id)
+        if not entry:
+            return {}
+        return {
+            f["name"]: (
+                (f["size"], f["mtime_ns"])
+                if f["size"] is not None and f["mtime_ns"] is not None
+                else None
+            )
+            for f in entry["files"]
+        }
+
+
+def get_ftp_index() -> FTPIndex:
+    return FTPIndex()
@@ -0,0 +1,234 @@
+"""Pooled FTP sessions with a per-directory listing cache.
+
+One FTPPool per server and credentials is shared by everything in a worker
+process (see get_ftp_pool), so consecutive FTP helpers, and consecutive
+tasks, reuse logged-in connections instead of opening a new one each time.
+
+- At most max_connections sessions are open at once; callers wait for a
+  free one.
+- Idle sessions are checked with NOOP before reuse once they have been idle
+  longer than the keepalive interval, and are dropped after idle_timeout.
+- Sessions that fail with a connection error are discarded, and run()
+  retries once on a new session.
+- Directory listings (MLSD where available) are cached for listing_ttl
+  seconds.
+"""
+
+import ftplib
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from sumstats_service import config
+from sumstats_service.resources.ftp_checksums import list_directory
+
+logger = logging.getLogger(__name__)
+
+# errors after which a session cannot be trusted any more
+CONNECTION_ERRORS = (OSError, EOFError, ftplib.error_temp, ftplib.error_reply)
+
+
+class FTPPool:
+    def __init__(
+        self,
+        host,
+        port=21,
+        user="",
+        passwd="",
+        max_connections=None,
+        timeout=None,
+        keepalive=None,
+        idle_timeout=None,
+        listing_ttl=None,
+    ):
+        self.host = host
+        self.port = port
+        self.user = user or ""
+        self.passwd = passwd or ""
+        self.max_connections = max_connections or config.FTP_POOL_SIZE
+        self.timeout = timeout or config.FTP_TIMEOUT
+        self.keepalive = (
+            config.FTP_KEEPALIVE_SECONDS if keepalive is None else keepalive
+        )
+        self.idle_timeout = (
+            config.FTP_IDLE_TIMEOUT_SECONDS if idle_timeout is None else idle_timeout
+        )
+        self.listing_ttl = (
+            config.FTP_LISTING_TTL_SECONDS if listing_ttl is None else listing_ttl
+        )
+        self._slots = threading.BoundedSemaphore(self.max_connections)
+        self._lock = threading.Lock()
+        self._idle = deque()
+        self._listings = {}
+        self.stats = {
+            "connects": 0,
+            "reuses": 0,
+            "discarded": 0,
+            "listing_hits": 0,
+            "listing_misses": 0,
+        }
+
+    def _connect(self) -> ftplib.FTP:
+        ftp = ftplib.FTP(timeout=self.timeout)
+        ftp.connect(self.host, self.port)
+        ftp.login(self.user, self.passwd)
+        with self._lock:
+            self.stats["connects"] += 1
+        return ftp
+
+    def _checkout(self) -> ftplib.FTP:
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                ftp, idle_since = self._idle.pop()
+            idle_for = time.monotonic() - idle_since
+            if idle_for > self.idle_timeout:
+                self._discard(ftp)
+                continue
+            if idle_for > self.keepalive:
+                try:
+                    ftp.voidcmd("NOOP")
+                except (*CONNECTION_ERRORS, ftplib.error_perm):
+                    self._discard(ftp)
+                    continue
+            with self._lock:
+                self.stats["reuses"] += 1
+            return ftp
+        return self._connect()
+
+    def _checkin(self, ftp: ftplib.FTP) -> None:
+        with self._lock:
+            self._idle.append((ftp, time.monotonic()))
+
+    def _discard(self, ftp: ftplib.FTP) -> None:
+        with self._lock:
+            self.stats["discarded"] += 1
+        try:
+            ftp.close()
+        except Exception:
+            pass
+
+    @contextmanager
+    def session(self):
+        """Check out a logged in session, returned to the pool on exit.
+        A session that raised a connection error is closed instead.
+        """
+        with self._slots:
+            ftp = self._checkout()
+            try:
+                yield ftp
+            except CONNECTION_ERRORS:
+                self._discard(ftp)
+                raise
+            except BaseException:
+                self._checkin(ftp)
+                raise
+            else:
+                self._checkin(ftp)
+
+    def run(self, func, retries=1):
+        """Call func(ftp) with a pooled session, retrying on a fresh
+        session if the connection fails.
+
+        Arguments:
+            func -- function of an ftplib.FTP
+
+        Keyword Arguments:
+            retries -- attempts after the first (default: {1})
+
+        Returns:
+            the return value of func
+        """
+        for attempt in range(retries + 1):
+            try:
+                with self.session() as ftp:
+                    return func(ftp)
+            except CONNECTION_ERRORS as e:
+                if attempt == retries:
+                    raise
+                logger.warning(f"FTP connection to {self.host} failed, retrying: {e}")
+
+    def list_directory(self, directory: str, ftp: ftplib.FTP = None) -> dict:
+        """Cached listing of a directory, see ftp_checksums.list_directory.
+        The session, if given, is left in that directory.
+
+        Returns:
+            dict of filename to (size, mtime_ns) or None
+        """
+        with self._lock:
+            cached = self._listings.get(directory)
+        if cached and time.monotonic() - cached[0] < self.listing_ttl:
+            with self._lock:
+                self.stats["listing_hits"] += 1
+            if ftp is not None:
+                ftp.cwd(directory)
+            return dict(cached[1])
+
+        def _list(session):
+            session.cwd(directory)
+            return list_directory(session)
+
+        listing = _list(ftp) if ftp is not None else self.run(_list)
+        with self._lock:
+            self.stats["listing_misses"] += 1
+            self._listings[directory] = (time.monotonic(), listing)
+        return dict(listing)
+
+    def invalidate(self, directory: str = None) -> None:
+        """Drop the cached listing of a directory, or of all directories"""
+        with self._lock:
+            if directory is None:
+                self._listings.clear()
+            else:
+                self._listings.pop(directory, None)
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+            self._listings.clear()
+        for ftp, _ in idle:
+            try:
+                ftp.quit()
+            except Exception:
+                ftp.close()
+
+
+# Process-wide registry of pools, reset in forked children because
+# sockets must not be shared across a fork.
+_pools_lock = threading.Lock()
+_pools = {}
+
+
+def _reset_pools_after_fork():
+    global _pools_lock
+    _pools_lock = threading.Lock()
+    _pools.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_pools_after_fork)
+
+
+def get_ftp_pool(host, port=21, user="", passwd="") -> FTPPool:
+    """Return the shared pool for a server and credentials,
+    creating it on first use.
+    """
+    key = (host, port, user or "", passwd or "")
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = FTPPool(host, port=port, user=user, passwd=passwd)
+            _pools[key] = pool
+    return pool
+
+
+def close_all_pools() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -1,22 +1,26 @@
 import os
 import pathlib
-from datetime import date
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
 from typing import Any, Union
 from urllib.parse import unquote
 
 from globus_sdk import (
     ClientCredentialsAuthorizer,
-    ConfidentialAppAuthClient,
     DeleteData,
     GCSClient,
     GlobusAPIError,
     GuestCollectionDocument,
     TransferAPIError,
     TransferClient,
-    scopes,
 )
 
 from sumstats_service import config, logger_config
+from sumstats_service.resources.globus_listing import get_listing_cache
+from sumstats_service.resources.globus_provider import get_provider
+from sumstats_service.resources.mongo_client import get_mongo_client
+from sumstats_service.resources.utils import run_steps
 import logging
 
 try:
@@ -28,7 +32,10 @@ except Exception as e:
     logger.error(f"Logging setup failed: {e}")
 
 
-def mkdir(unique_id: str, email_address: str = None) -> str:
+TRANSFER_EVENTS_SYNC = "globus-transfer-events"
+
+
+def mkdir(unique_id: str, email_address: str = None, timings: dict = None) -> str:
     """Create a globus guest collection on a specific
     directory and return collection id
 
@@ -37,14 +44,23 @@ def mkdir(unique_id: str, email_address: str = None) -> str:
 
     Keyword Arguments:
         email_address -- globus account (default: {None})
+        timings -- dict filled with the duration in ms of each
+        provisioning step (default: {None})
 
     Returns:
         globus collection id
     """
-    transfer_client = init_transfer_client()
-    create_dir(transfer_client, dirname=unique_id)
-    endpoint_id = create_guest_collection(unique_id, email_address)
-    return endpoint_id
+    timings = {} if timings is None else timings
+    if not config.GLOBUS_WARM_POOL_ENABLED:
+        return provision_guest_collection(unique_id, email_address, timings=timings)
+    start = time.perf_counter()
+    # resolved once, for both the claim and the fallback
+    user_id = check_user(email_address)
+    endpoint_id = claim_warm_collection(unique_id, user_id) if user_id else None
+    timings["warm_claim"] = round((time.perf_counter() - start) * 1000, 1)
+    if endpoint_id or not user_id:
+        return endpoint_id
+    return provision_guest_collection(unique_id, user_id=user_id, timings=timings)
 
 
 def list_dir(unique_id):
@@ -54,7 +70,8 @@ def list_dir(unique_id):
 
 def get_authorizer(scope: Any) -> ClientCredentialsAuthorizer:
     """Get a Globus client authorizer
-    which can be used to authenticate the GCS and transfer clients
+    which can be used to authenticate the GCS and transfer clients.
+    Authorizers are cached per scope and renew their token before it expires.
 
     Arguments:
         scope -- Globus scope
@@ -62,42 +79,25 @@ def get_authorizer(scope: Any) -> ClientCredentialsAuthorizer:
     Returns:
         ClientCredentialsAuthorizer
     """
-    confidential_client = ConfidentialAppAuthClient(
-        client_id=config.CLIENT_ID, client_secret=config.CLIENT_SECRET
-    )
-    authorizer = ClientCredentialsAuthorizer(confidential_client, scopes=scope)
-    return authorizer
+    return get_provider().get_authorizer(scope)
 
 
 def init_transfer_client() -> TransferClient:
-    """Initialise transfer client
+    """Get the shared transfer client
 
     Returns:
         Globus transfer client
     """
-    scope = (
-        "urn:globus:auth:scope:transfer.api.globus.org:all"
-        f"[*https://auth.globus.org/scopes/{config.MAPPED_COLLECTION_ID}/data_access]"
-    )
-    transfer_client = TransferClient(authorizer=get_authorizer(scope=scope))
-    transfer_client.endpoint_autoactivate(config.MAPPED_COLLECTION_ID)
-    return transfer_client
+    return get_provider().transfer_client()
 
 
 def init_gcs_client() -> GCSClient:
-    """Initialise a globus connect server client
+    """Get the shared globus connect server client
 
     Returns:
         GCSClient
     """
-    scope = scopes.GCSEndpointScopeBuilder(config.GWAS_ENDPOINT_ID).make_mutable(
-        "manage_collections"
-    )
-    scope.add_dependency(
-        scopes.GCSCollectionScopeBuilder(config.MAPPED_COLLECTION_ID).data_access
-    )
-    client = GCSClient(config.GLOBUS_HOSTNAME, authorizer=get_authorizer(scope=scope))
-    return client
+    return get_provider().gcs_client()
 
 
 def dir_contents(transfer, unique_id) -> Union[list, None]:
@@ -113,24 +113,94 @@ def dir_contents(transfer, unique_id) -> Union[list, None]:
     return contents
 
 
-def get_upload_status(transfer, unique_id, files):
-    return_files = {}
-    for file in files:
-        return_files[file] = False
-    for task in transfer.task_list(filter="status:SUCCEEDED/type:TRANSFER"):
-        for event in transfer.task_successful_transfers(task_id=task["task_id"]):
-            print(event)
-            path = event["destination_path"]
-            for file in files:
-                if "/" + unique_id + "/" in path and file in unquote(path):
-                    return_files[file] = True
-    return return_files
+def transfer_event(task: dict, event: dict) -> dict:
+    """Document for a successful transfer of one file"""
+    path = unquote(event["destination_path"])
+    return {
+        "task_id": task["task_id"],
+        "completion_time": task.get("completion_time"),
+        "destination_path": event["destination_path"],
+        "path_parts": [part for part in path.split("/") if part][:-1],
+        "filename": os.path.basename(path),
+    }
+
+
+def sync_transfer_events(transfer=None, mdb=None) -> dict:
+    """Store the events of transfer tasks that succeeded since the last sync.
+
+    Tasks are read in order of completion time from the stored high
+    watermark onwards, and the watermark is moved after each page, so an
+    interrupted sync resumes where it stopped. Tasks completed exactly at
+    the watermark are read again; their events are only stored once.
+    Without a watermark, the first sync starts
+    GLOBUS_TRANSFER_SYNC_LOOKBACK_DAYS ago.
+
+    Keyword Arguments:
+        transfer -- transfer client (default: {shared client})
+        mdb -- mongo client (default: {shared client})
+
+    Returns:
+        dict with the number of tasks read and new events stored
+    """
+    transfer = transfer if transfer else init_transfer_client()
+    mdb = mdb if mdb else get_mongo_client()
+    watermark = mdb.get_sync_watermark(TRANSFER_EVENTS_SYNC)
+    if not watermark and config.GLOBUS_TRANSFER_SYNC_LOOKBACK_DAYS:
+        since = datetime.now(timezone.utc) - timedelta(
+            days=config.GLOBUS_TRANSFER_SYNC_LOOKBACK_DAYS
+        )
+        watermark = since.strftime("%Y-%m-%dT%H:%M:%S")
+    task_filter = "status:SUCCEEDED/type:TRANSFER"
+    if watermark:
+        task_filter += f"/completion_time:{watermark},"
+    tasks = transfer.paginated.task_list(
+        filter=task_filter, query_params={"orderby": "completion_time ASC"}
+    )
+    result = {"tasks": 0, "events": 0}
+    for page in tasks:
+        events = []
+        for task in page:
+            result["tasks"] += 1
+            for event in transfer.paginated.task_successful_transfers(
+                task["task_id"]
+            ).items():
+                events.append(transfer_event(task, event))
+            if task.get("completion_time"):
+                watermark = max(watermark or "", task["completion_time"])
+        result["events"] += mdb.upsert_transfer_events(events)
+        if watermark:
+            mdb.set_sync_watermark(TRANSFER_EVENTS_SYNC, watermark)
+    logger.info(f"Synced globus transfer events: {result}, {watermark=}")
+    return result
+
+
+def get_upload_status(transfer, unique_id, files, sync=False, mdb=None):
+    """Whether each file has been transferred into the unique_id directory,
+    from the transfer events stored by the periodic
+    sync_globus_transfer_events task.
+
+    Arguments:
+        transfer -- transfer client, only used with sync
+        unique_id -- upload directory name
+        files -- filenames
+
+    Keyword Arguments:
+        sync -- sync new transfer events before the lookup (default: {False})
+        mdb -- mongo client (default: {shared client})
+
+    Returns:
+        dict of filename to bool
+    """
+    mdb = mdb if mdb else get_mongo_client()
+    if sync:
+        sync_transfer_events(transfer, mdb=mdb)
+    transferred = mdb.get_transferred_filenames(unique_id, files)
+    return {file: file in transferred for file in files}
 
 
 def check_user(email: str) -> Union[str, None]:
     if email:
-        auth_client = ConfidentialAppAuthClient(config.CLIENT_ID, config.CLIENT_SECRET)
-        user_info = auth_client.get_identities(usernames=email)
+        user_info = get_provider().get_identities(usernames=email)
         user_identity = user_info.data["identities"]
         identity_id = user_identity[0]["id"] if user_identity else None
         return identity_id
@@ -151,6 +221,7 @@ def create_dir(transfer_client: TransferClient, dirname: str) -> None:
         transfer_client.operation_mkdir(config.MAPPED_COLLECTION_ID, dirname)
     except GlobusAPIError as error:
         print(error)
+    get_listing_cache().invalidate(config.MAPPED_COLLECTION_ID, dirname)
 
 
 def guest_collection_document(
@@ -179,34 +250,299 @@ def create_guest_collection(uid: str, email: str = None) -> str:
     Returns:
         guest collection/endpoint id
     """
-    user_id = check_user(email)
-    if user_id:
-        """create shared endpoint"""
-        dirname = "/~/" + uid
-        display_name = "-".join([str(date.today()), uid[0:8]])
-        collection_document = guest_collection_document(dirname, display_name)
-        gcs_client = init_gcs_client()
-        response = gcs_client.create_collection(collection_document)
-        endpoint_id = response["id"]
-        """ add role for administrator"""
-        gcs_client.create_role(
-            role_data(
-                collection_id=endpoint_id,
-                identity=f"urn:globus:auth:identity:{config.GWAS_IDENTITY}",
+    return provision_guest_collection(uid, email, create_directory=False)
+
+
+def provision_guest_collection(
+    uid: str,
+    email: str = None,
+    create_directory: bool = True,
+    timings: dict = None,
+    user_id: str = None,
+) -> Union[str, None]:
+    """Create the directory and guest collection for an upload.
+    The independent Globus calls run concurrently:
+
+        identity ─┐                ┌─ admin_role
+                  ├─ collection ───┼─ group_role
+        dir ──────┘                ├─ acl
+                                   └─ record
+
+    Arguments:
+        uid -- upload uid
+
+    Keyword Arguments:
+        email -- globus account (default: {None})
+        create_directory -- also create the directory (default: {True})
+        timings -- dict filled with the duration in ms of each step
+        (default: {None})
+        user_id -- globus identity, if already resolved from the email
+        (default: {None})
+
+    Returns:
+        guest collection/endpoint id, or None if the account is not
+        linked to Globus
+    """
+    timings = {} if timings is None else timings
+    display_name = "-".join([str(date.today()), uid[0:8]])
+
+    def _collection(results):
+        if not results["identity"]:
+            return None
+        collection_document = guest_collection_document("/~/" + uid, display_name)
+        return init_gcs_client().create_collection(collection_document)["id"]
+
+    def _admin_role(results):
+        if results["collection"]:
+            init_gcs_client().create_role(
+                role_data(
+                    collection_id=results["collection"],
+                    identity=f"urn:globus:auth:identity:{config.GWAS_IDENTITY}",
+                )
             )
-        )
-        """ add role for gwas group"""
-        gcs_client.create_role(
-            role_data(
-                collection_id=endpoint_id,
-                identity=f"urn:globus:groups:id:{config.GWAS_GLOBUS_GROUP}",
+
+    def _group_role(results):
+        if results["collection"]:
+            init_gcs_client().create_role(
+                role_data(
+                    collection_id=results["collection"],
+                    identity=f"urn:globus:groups:id:{config.GWAS_GLOBUS_GROUP}",
+                )
+            )
+
+    def _acl(results):
+        if results["collection"]:
+            add_permissions_to_endpoint(
+                collection_id=results["collection"], user_id=results["identity"]
+            )
+
+    def _record(results):
+        if results["collection"]:
+            get_mongo_client().insert_guest_collection(
+                uid, results["collection"], display_name
             )
+
+    steps = {
+        "identity": (lambda results: user_id or check_user(email), []),
+        "collection": (_collection, ["identity"]),
+        "admin_role": (_admin_role, ["collection"]),
+        "group_role": (_group_role, ["collection"]),
+        "acl": (_acl, ["collection"]),
+        "record": (_record, ["collection"]),
+    }
+    if create_directory:
+        steps["dir"] = (
+            lambda results: create_dir(init_transfer_client(), dirname=uid),
+            [],
+        )
+        steps["collection"] = (_collection, ["identity", "dir"])
+    results = run_steps(steps, timings=timings)
+    logger.info(f"Provisioned guest collection for {uid=} :: {timings=}")
+    return results["collection"]
+
+
+def add_service_roles(gcs_client: GCSClient, collection_id: str) -> None:
+    """Add the administrator and gwas group roles to a guest collection"""
+    gcs_client.create_role(
+        role_data(
+            collection_id=collection_id,
+            identity=f"urn:globus:auth:identity:{config.GWAS_IDENTITY}",
+        )
+    )
+    gcs_client.create_role(
+        role_data(
+            collection_id=collection_id,
+            identity=f"urn:globus:groups:id:{config.GWAS_GLOBUS_GROUP}",
+        )
+    )
+
+
+def provision_warm_collection(token: str) -> Union[str, None]:
+    """Create a directory and guest collection for a reserved pool slot,
+    with the administrator and group roles in place, and mark it ready.
+    If provisioning fails the entry is marked failed, giving up its slot,
+    and whatever was created is removed by reap_warm_pool.
+
+    Arguments:
+        token -- pool token from MongoClient.reserve_warm_collections
+
+    Returns:
+        pool token, or None if provisioning failed
+    """
+    mdb = get_mongo_client()
+    dirname = f"{config.GLOBUS_WARM_POOL_DIR}/{token}"
+    fields = {"path": dirname}
+    try:
+        transfer_client = init_transfer_client()
+        create_dir(transfer_client, dirname=config.GLOBUS_WARM_POOL_DIR)
+        create_dir(transfer_client, dirname=dirname)
+        gcs_client = init_gcs_client()
+        collection_document = guest_collection_document(
+            "/~/" + dirname, f"warm-{token[0:8]}"
+        )
+        fields["collection_id"] = gcs_client.create_collection(collection_document)[
+            "id"
+        ]
+        add_service_roles(gcs_client, fields["collection_id"])
+    except GlobusAPIError as e:
+        logger.error(f"Provisioning warm collection {token} failed: {e}")
+        mdb.set_warm_collection_status(
+            token, config.WarmCollectionStatus.FAILED, error=str(e), **fields
+        )
+        return None
+    mdb.set_warm_collection_status(token, config.WarmCollectionStatus.READY, **fields)
+    return token
+
+
+def claim_warm_collection(uid: str, user_id: str) -> Union[str, None]:
+    """Hand a pre-provisioned guest collection to an upload. The pooled
+    directory is renamed to the uid, the collection base path and display
+    name are updated to match and the user ACL is added.
+
+    If the pool is empty or any step fails, None is returned and the caller
+    falls back to creating the collection from scratch. An entry that failed
+    half way is marked failed and removed by reap_warm_pool.
+
+    Arguments:
+        uid -- upload uid
+        user_id -- globus identity of the uploader, see check_user
+
+    Returns:
+        guest collection id or None
+    """
+    mdb = get_mongo_client()
+    entry = mdb.take_warm_collection(config.WarmCollectionStatus.CLAIMED, uid=uid)
+    if not entry:
+        logger.info("Globus warm pool is empty")
+        return None
+    endpoint_id = entry["collection_id"]
+    display_name = "-".join([str(date.today()), uid[0:8]])
+    try:
+        transfer_client = init_transfer_client()
+        transfer_client.operation_rename(
+            config.MAPPED_COLLECTION_ID, entry["path"], uid
+        )
+        get_listing_cache().invalidate(config.MAPPED_COLLECTION_ID, entry["path"])
+        get_listing_cache().invalidate(config.MAPPED_COLLECTION_ID, uid)
+        init_gcs_client().update_collection(
+            endpoint_id,
+            GuestCollectionDocument(
+                collection_base_path="/~/" + uid, display_name=display_name
+            ),
         )
-        """ add user to endpoint"""
         add_permissions_to_endpoint(collection_id=endpoint_id, user_id=user_id)
-        return endpoint_id
-    else:
+    except GlobusAPIError as e:
+        logger.error(f"Claiming warm collection {entry['token']} failed: {e}")
+        mdb.set_warm_collection_status(
+            entry["token"], config.WarmCollectionStatus.FAILED, error=str(e)
+        )
         return None
+    mdb.insert_guest_collection(uid, endpoint_id, display_name)
+    return endpoint_id
+
+
+def refill_warm_pool(low_water: int = None, size: int = None) -> int:
+    """Provision collections into the free pool slots when fewer than
+    low_water are ready. Placeholders stuck provisioning, left by a worker
+    that died, are reaped first so that their slots can be refilled.
+
+    Keyword Arguments:
+        low_water -- low-water mark (default: {config})
+        size -- pool size to refill to (default: {config})
+
+    Returns:
+        number of collections provisioned
+    """
+    low_water = config.GLOBUS_WARM_POOL_LOW_WATER if low_water is None else low_water
+    size = config.GLOBUS_WARM_POOL_SIZE if size is None else size
+    mdb = get_mongo_client()
+    reap_warm_entries(
+        config.WarmCollectionStatus.PROVISIONING,
+        created_before=datetime.now()
+        - timedelta(minutes=config.GLOBUS_WARM_POOL_PROVISIONING_TIMEOUT_MINUTES),
+    )
+    if mdb.count_warm_collections() >= low_water:
+        return 0
+    # slots are reserved atomically, so concurrent refills share the deficit
+    tokens = mdb.reserve_warm_collections(size)
+    provisioned = [t for t in tokens if provision_warm_collection(t)]
+    logger.info(f"Provisioned {len(provisioned)} of {len(tokens)} warm collections")
+    return len(provisioned)
+
+
+def reap_warm_entries(
+    from_status: config.WarmCollectionStatus, created_before: datetime = None
+) -> list:
+    """Remove the pool entries with from_status, created before
+    created_before if given. An entry that cannot be removed is still
+    marked reaped, with the error, so it is not retried.
+
+    Returns:
+        list of reaped tokens
+    """
+    mdb = get_mongo_client()
+    reaped = []
+    while True:
+        entry = mdb.take_warm_collection(
+            config.WarmCollectionStatus.REAPED,
+            created_before=created_before,
+            from_status=from_status,
+        )
+        if not entry:
+            break
+        try:
+            if entry.get("path"):
+                remove_path(entry["path"])
+            if entry.get("collection_id"):
+                deactivate_endpoint(entry["collection_id"])
+        except GlobusAPIError as e:
+            logger.error(f"Reaping warm collection {entry['token']} failed: {e}")
+            mdb.set_warm_collection_status(
+                entry["token"], config.WarmCollectionStatus.REAPED, error=str(e)
+            )
+            continue
+        reaped.append(entry["token"])
+    return reaped
+
+
+def reap_warm_pool(
+    max_age_days: int = None, provisioning_timeout_minutes: int = None
+) -> list:
+    """Remove pool entries that stayed unclaimed longer than max_age_days,
+    so that no collection lingers with stale roles or settings.
+
+    Entries whose provisioning or claim failed are removed too, as are
+    provisioning placeholders older than provisioning_timeout_minutes,
+    left by a worker that died.
+
+    Keyword Arguments:
+        max_age_days -- maximum age of a ready entry (default: {config})
+        provisioning_timeout_minutes -- maximum age of a placeholder
+        (default: {config})
+
+    Returns:
+        list of reaped tokens
+    """
+    max_age_days = (
+        config.GLOBUS_WARM_POOL_MAX_AGE_DAYS if max_age_days is None else max_age_days
+    )
+    provisioning_timeout_minutes = (
+        config.GLOBUS_WARM_POOL_PROVISIONING_TIMEOUT_MINUTES
+        if provisioning_timeout_minutes is None
+        else provisioning_timeout_minutes
+    )
+    now = datetime.now()
+    return (
+        reap_warm_entries(
+            config.WarmCollectionStatus.READY,
+            created_before=now - timedelta(days=max_age_days),
+        )
+        + reap_warm_entries(
+            config.WarmCollectionStatus.PROVISIONING,
+            created_before=now - timedelta(minutes=provisioning_timeout_minutes),
+        )
+        + reap_warm_entries(config.WarmCollectionStatus.FAILED)
+    )
 
 
 def add_permissions_to_endpoint(collection_id: str, user_id: str) -> None:
@@ -236,18 +572,34 @@ def rename_file(dest_dir, source, dest):
         files = [os.path.join(dest_dir, f["name"]) for f in dir_ls]
         if dest not in files:
             transfer.operation_rename(config.MAPPED_COLLECTION_ID, source, dest)
+            listings = get_listing_cache()
+            listings.invalidate(config.MAPPED_COLLECTION_ID, source)
+            listings.invalidate(config.MAPPED_COLLECTION_ID, dest)
     except TransferAPIError as e:
         logger.info(e)
         return False
     return True
 
 
+def list_names(directory) -> frozenset:
+    """Names in a directory of the mapped collection, served from the
+    listing cache for GLOBUS_LISTING_TTL_SECONDS after the first listing.
+    Raises TransferAPIError if the directory cannot be listed.
+    """
+
+    def _ls():
+        transfer = init_transfer_client()
+        dir_ls = transfer.operation_ls(config.MAPPED_COLLECTION_ID, path=str(directory))
+        return [f["name"] for f in dir_ls]
+
+    return get_listing_cache().get(config.MAPPED_COLLECTION_ID, directory, _ls)
+
+
 def list_files(directory):
-    transfer = init_transfer_client()
     files = []
     try:
-        dir_ls = transfer.operation_ls(config.MAPPED_COLLECTION_ID, path=directory)
-        files = [os.path.join(directory, f["name"]) for f in dir_ls]
+        names = sorted(list_names(directory))
+        files = [os.path.join(directory, name) for name in names]
     except TransferAPIError as e:
         logger.info(e)
     return files
@@ -256,8 +608,10 @@ def list_files(directory):
 def filepath_exists(path):
     pardir = pathlib.Path(path).parent
     filename = pathlib.Path(path).name
-    if filename in list_files(pardir):
-        return True
+    try:
+        return filename in list_names(pardir)
+    except TransferAPIError as e:
+        logger.info(e)
     return False
 
 
@@ -266,6 +620,7 @@ def remove_path(path_to_remove, transfer_client=None):
     ddata = DeleteData(transfer, config.MAPPED_COLLECTION_ID, recursive=True)
     ddata.add_item(path_to_remove)
     delete_result = transfer.submit_delete(ddata)
+    get_listing_cache().invalidate(config.MAPPED_COLLECTION_ID, path_to_remove)
     return delete_result
 
 
@@ -281,10 +636,101 @@ def remove_endpoint_and_all_contents(uid):
             logger.info(f">> remove_endpoint_and_all_contents {uid=} :: remove_path true")
             deactivate_status = deactivate_endpoint(endpoint_id)
             logger.info(f">> remove_endpoint_and_all_contents {uid=} :: {deactivate_status=}")
+            get_mongo_client().mark_guest_collection_deleted(uid)
 
     return deactivate_status
 
 
+def remove_paths(paths, transfer_client=None, batch_size=None) -> list:
+    """Delete many paths from the mapped collection with one DeleteData
+    submission per batch_size paths. Missing paths are ignored so that one
+    of them does not fail the whole task.
+
+    Arguments:
+        paths -- paths to remove, relative to the mapped collection
+
+    Keyword Arguments:
+        transfer_client -- transfer client (default: {None})
+        batch_size -- max paths per submission (default: {config})
+
+    Returns:
+        list of submission results
+    """
+    transfer = transfer_client if transfer_client else init_transfer_client()
+    batch_size = batch_size if batch_size else config.GLOBUS_DELETE_BATCH_SIZE
+    results = []
+    for i in range(0, len(paths), batch_size):
+        ddata = DeleteData(
+            transfer, config.MAPPED_COLLECTION_ID, recursive=True, ignore_missing=True
+        )
+        for path in paths[i : i + batch_size]:
+            ddata.add_item(path)
+        results.append(transfer.submit_delete(ddata))
+    listings = get_listing_cache()
+    for path in paths:
+        listings.invalidate(config.MAPPED_COLLECTION_ID, path)
+    return results
+
+
+def remove_endpoints_and_all_contents(uids, max_workers=None) -> dict:
+    """Batch version of remove_endpoint_and_all_contents. The directories
+    of all the uids are removed in a single delete submission and the guest
+    collections are then deleted, max_workers at a time.
+
+    Arguments:
+        uids -- upload uids to tear down
+
+    Keyword Arguments:
+        max_workers -- concurrent collection deletions (default: {config})
+
+    Returns:
+        dict of uid to outcome dict with endpoint_id, status and error
+    """
+    max_workers = max_workers if max_workers else config.GLOBUS_TEARDOWN_WORKERS
+    transfer = init_transfer_client()
+    gcs = init_gcs_client()
+    outcomes = {
+        uid: {"endpoint_id": None, "status": False, "error": None}
+        for uid in dict.fromkeys(uids)
+    }
+    for uid, outcome in outcomes.items():
+        try:
+            outcome["endpoint_id"] = get_endpoint_id_from_uid(uid, transfer)
+        except GlobusAPIError as e:
+            outcome["error"] = str(e)
+        else:
+            if not outcome["endpoint_id"]:
+                outcome["error"] = "endpoint not found"
+    found = [uid for uid, outcome in outcomes.items() if outcome["endpoint_id"]]
+    if not found:
+        return outcomes
+
+    try:
+        remove_paths(found, transfer_client=transfer)
+    except GlobusAPIError as e:
+        logger.error(f"Batch delete of {len(found)} paths failed: {e}")
+        for uid in found:
+            outcomes[uid]["error"] = str(e)
+        return outcomes
+
+    def _deactivate(uid):
+        outcome = outcomes[uid]
+        try:
+            outcome["status"] = deactivate_endpoint(
+                outcome["endpoint_id"], gcs_client=gcs
+            )
+        except GlobusAPIError as e:
+            outcome["error"] = str(e)
+        else:
+            get_mongo_client().mark_guest_collection_deleted(uid)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(_deactivate, found))
+    failed = [uid for uid, outcome in outcomes.items() if outcome["error"]]
+    logger.info(f">> remove_endpoints_and_all_contents {len(outcomes)} uids, {failed=}")
+    return outcomes
+
+
 def deactivate_endpoint(endpoint_id, gcs_client=None):
     logger.info(f">> deactivate_endpoint {endpoint_id=}")
     gcs = gcs_client if gcs_client else init_gcs_client()
@@ -294,12 +740,28 @@ def deactivate_endpoint(endpoint_id, gcs_client=None):
 
 
 def get_endpoint_id_from_uid(uid: str, transfer_client: TransferClient = None) -> Union[str, None]:
+    """Guest collection ID for an upload uid, from the recorded mapping.
+    Collections created before the mapping was recorded are looked up with
+    an endpoint search and then recorded.
+    """
+    endpoint_id = get_mongo_client().get_guest_collection_id(uid)
+    if endpoint_id:
+        return endpoint_id
     transfer = transfer_client if transfer_client else init_transfer_client()
     search_pattern = f"-{uid[0:8]}"
-    endpoint_id = None
     results = transfer.endpoint_search(search_pattern, filter_scope="shared-by-me")
-    if results.get("DATA"):
-        endpoint_id = results.get("DATA")[0].get("id")
+    matches = results.get("DATA") or []
+    # prefer the collection whose display name ends with the uid prefix
+    matches = sorted(
+        matches,
+        key=lambda e: not (e.get("display_name") or "").endswith(search_pattern),
+    )
+    if matches:
+        endpoint_id = matches[0].get("id")
+        logger.info(f"Recording legacy guest collection {endpoint_id} for {uid=}")
+        get_mongo_client().insert_guest_collection(
+            uid, endpoint_id, matches[0].get("display_name"), legacy=True
+        )
     return endpoint_id
 
 
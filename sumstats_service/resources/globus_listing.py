@@ -0,0 +1,104 @@
+"""Process-local TTL cache of Globus directory listings.
+
+Existence checks (globus.filepath_exists) list the parent directory, and a
+callback with many raw files would list the same entryUUID directory once
+per file. Listings are cached per (collection, path) for ttl seconds and
+are invalidated explicitly by the globus helpers that change a directory
+(mkdir, rename_file, remove_path), so membership checks after the first
+listing are set lookups. A listing loaded while an invalidation happened
+is returned but not cached, as it may predate the change.
+"""
+
+import posixpath
+import threading
+import time
+
+from sumstats_service import config
+
+
+def normalise_path(path) -> str:
+    """Cache key for a path. "uid", "/~/uid" and "~/uid/" all refer to
+    the same directory of the mapped collection.
+    """
+    path = posixpath.normpath(str(path))
+    for prefix in ("/~/", "~/"):
+        if path.startswith(prefix):
+            path = path[len(prefix) :]
+    return "" if path in ("/~", "~", ".") else path
+
+
+class ListingCache:
+    def __init__(self, ttl=None):
+        self.ttl = config.GLOBUS_LISTING_TTL_SECONDS if ttl is None else ttl
+        self._lock = threading.Lock()
+        self._listings = {}
+        # bumped by every invalidation, to spot loads that raced one
+        self._generation = 0
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, collection, path, loader) -> frozenset:
+        """Names in a directory, from the cache or from loader()
+
+        Arguments:
+            collection -- collection id
+            path -- directory path
+            loader -- callable returning the names in the directory. If it
+            raises, nothing is cached.
+
+        Returns:
+            frozenset of names
+        """
+        key = (collection, normalise_path(path))
+        with self._lock:
+            cached = self._listings.get(key)
+            if cached and time.monotonic() - cached[0] < self.ttl:
+                self.stats["hits"] += 1
+                return cached[1]
+            self.stats["misses"] += 1
+            generation = self._generation
+        names = frozenset(loader())
+        with self._lock:
+            if generation == self._generation:
+                self._listings[key] = (time.monotonic(), names)
+        return names
+
+    def invalidate(self, collection=None, path=None) -> None:
+        """Drop the listings of a path, its parent and anything below it.
+        Without a path, drop every listing (of the collection, if given).
+        """
+        with self._lock:
+            self._generation += 1
+            self.stats["invalidations"] += 1
+            if path is None:
+                stale = [k for k in self._listings if collection in (None, k[0])]
+            else:
+                path = normalise_path(path)
+                parent = normalise_path(posixpath.dirname(path) or ".")
+                stale = [
+                    k
+                    for k in self._listings
+                    if collection in (None, k[0])
+                    and (
+                        k[1] in (path, parent)
+                        or path == ""
+                        or k[1].startswith(path + "/")
+                    )
+                ]
+            for key in stale:
+                del self._listings[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._listings.clear()
+
+
+_cache = ListingCache()
+
+
+def get_listing_cache() -> ListingCache:
+    return _cache
+
+
+def cache_stats() -> dict:
+    return dict(_cache.stats)
@@ -0,0 +1,345 @@
+"""Filesystem-backed stand-in for the Globus transfer and GCS clients.
+
+LocalGlobusBackend implements the subset of TransferClient and GCSClient
+that the globus module uses, on top of a local directory that plays the
+mapped collection (paths like "/~/uid" resolve under root). Guest
+collections, roles, ACL rules and tasks are kept in memory. Every call
+sleeps for the configured latency (plus optional random jitter) so that the
+Globus-dependent endpoints can be benchmarked repeatably without
+credentials, and operations can be made to fail to exercise error paths.
+
+Use it for a whole process with GLOBUS_BACKEND=local (root defaults to
+DEPO_PATH), or install it explicitly:
+
+    backend = use_local_backend("/tmp/depo", latency=0.05)
+"""
+
+import os
+import random
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from globus_sdk import GlobusAPIError, TransferAPIError
+from requests import Request, Response
+
+from sumstats_service import config
+from sumstats_service.resources.globus_provider import set_provider
+
+
+def api_error(status_code, code, message, error_class=GlobusAPIError):
+    """An SDK API error as raised for a response with this status and body"""
+    response = Response()
+    response.status_code = status_code
+    response.headers["Content-Type"] = "application/json"
+    response._content = (
+        '{"code": "%s", "message": "%s"}' % (code, message.replace('"', "'"))
+    ).encode()
+    response.request = Request("POST", "https://globus.local").prepare()
+    return error_class(response)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S+00:00")
+
+
+class _Pages:
+    def __init__(self, pages):
+        self.pages = pages
+
+    def __iter__(self):
+        return iter(self.pages)
+
+    def items(self):
+        return (item for page in self.pages for item in page)
+
+
+class _Paginated:
+    """The backend's .paginated view, pages of page_size items"""
+
+    def __init__(self, backend, page_size=100):
+        self.backend = backend
+        self.page_size = page_size
+
+    def _paged(self, items):
+        size = self.page_size
+        return _Pages([items[i : i + size] for i in range(0, len(items), size)])
+
+    def task_list(self, **kwargs):
+        return self._paged(self.backend.task_list(**kwargs))
+
+    def task_successful_transfers(self, task_id, **kwargs):
+        return self._paged(self.backend.task_successful_transfers(task_id))
+
+
+class LocalGlobusBackend:
+    def __init__(self, root, latency=0.0, jitter=0.0):
+        self.root = os.path.realpath(root)
+        self.latency = latency
+        self.jitter = jitter
+        self.collections = {}
+        self.roles = []
+        self.acl_rules = []
+        self.tasks = []
+        self.events = {}
+        self.calls = {}
+        # operations that raise a GlobusAPIError, to test error handling
+        self.failures = set()
+        self.paginated = _Paginated(self)
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _call(self, operation) -> None:
+        with self._lock:
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay:
+            time.sleep(delay)
+        if operation in self.failures:
+            raise api_error(409, "Conflict", f"{operation} failed")
+
+    def _local(self, path) -> str:
+        """Local path under root for a collection path. Paths are relative
+        to root, with or without a leading "/~/".
+        """
+        path = str(path or "")
+        if path.startswith("/~"):
+            path = path[2:]
+        local = os.path.realpath(os.path.join(self.root, path.lstrip("/")))
+        if local != self.root and not local.startswith(self.root + os.sep):
+            raise api_error(403, "PermissionDenied", path, TransferAPIError)
+        return local
+
+    # --- TransferClient --- #
+
+    def endpoint_autoactivate(self, endpoint_id, **kwargs):
+        self._call("endpoint_autoactivate")
+        return {"code": "AutoActivated.CachedCredential"}
+
+    def operation_ls(self, endpoint_id, path=None, **kwargs):
+        self._call("operation_ls")
+        local = self._local(path)
+        if not os.path.isdir(local):
+            raise api_error(404, "ClientError.NotFound", str(path), TransferAPIError)
+        entries = []
+        with os.scandir(local) as it:
+            for entry in sorted(it, key=lambda e: e.name):
+                stat = entry.stat()
+                entries.append(
+                    {
+                        "DATA_TYPE": "file",
+                        "name": entry.name,
+                        "type": "dir" if entry.is_dir() else "file",
+                        "size": stat.st_size,
+                        "last_modified": datetime.fromtimestamp(
+                            stat.st_mtime, timezone.utc
+                        ).strftime("%Y-%m-%d %H:%M:%S+00:00"),
+                    }
+                )
+        return entries
+
+    def operation_mkdir(self, endpoint_id, path, **kwargs):
+        self._call("operation_mkdir")
+        try:
+            os.mkdir(self._local(path))
+        except FileExistsError:
+            raise api_error(
+                502, "ExternalError.MkdirFailed.Exists", str(path), TransferAPIError
+            )
+        except FileNotFoundError:
+            raise api_error(404, "ClientError.NotFound", str(path), TransferAPIError)
+        return {"code": "DirectoryCreated"}
+
+    def operation_rename(self, endpoint_id, oldpath, newpath, **kwargs):
+        self._call("operation_rename")
+        try:
+            os.rename(self._local(oldpath), self._local(newpath))
+        except OSError as e:
+            raise api_error(404, "ClientError.NotFound", str(e), TransferAPIError)
+        return {"code": "FileRenamed"}
+
+    def get_submission_id(self, **kwargs):
+        return {"value": str(uuid.uuid4())}
+
+    def submit_delete(self, data):
+        """Delete the items straight away and record a finished task"""
+        self._call("submit_delete")
+        for item in data["DATA"]:
+            local = self._local(item["path"])
+            if os.path.isdir(local) and data.get("recursive"):
+                shutil.rmtree(local)
+            elif os.path.lexists(local):
+                os.remove(local)
+            elif not data.get("ignore_missing"):
+                raise api_error(
+                    404, "ClientError.NotFound", item["path"], TransferAPIError
+                )
+        task_id = self._add_task("DELETE", [])
+        return {"code": "Accepted", "task_id": task_id}
+
+    def endpoint_search(self, filter_fulltext=None, filter_scope=None, **kwargs):
+        self._call("endpoint_search")
+        return {
+            "DATA": [
+                {"id": collection_id, **collection}
+                for collection_id, collection in self.collections.items()
+                if filter_fulltext in collection.get("display_name", "")
+            ]
+        }
+
+    def add_endpoint_acl_rule(self, endpoint_id, rule_data):
+        self._call("add_endpoint_acl_rule")
+        self.acl_rules.append({"endpoint_id": endpoint_id, **dict(rule_data)})
+        return {"code": "Created", "access_id": len(self.acl_rules)}
+
+    def task_list(self, filter=None, query_params=None, **kwargs):
+        """Tasks matching a filter such as
+        "status:SUCCEEDED/type:TRANSFER/completion_time:<start>,<end>"
+        """
+        self._call("task_list")
+        tasks = list(self.tasks)
+        for clause in (filter or "").split("/"):
+            if not clause:
+                continue
+            key, value = clause.split(":", 1)
+            if key == "completion_time":
+                start, _, end = value.partition(",")
+                tasks = [
+                    t
+                    for t in tasks
+                    if (not start or t["completion_time"] >= start)
+                    and (not end or t["completion_time"] <= end)
+                ]
+            else:
+                tasks = [t for t in tasks if t[key] in value.split(",")]
+        if (query_params or {}).get("orderby") == "completion_time ASC":
+            tasks.sort(key=lambda t: t["completion_time"])
+        return tasks
+
+    def task_successful_transfers(self, task_id, **kwargs):
+        self._call("task_successful_transfers")
+        return list(self.events.get(task_id, []))
+
+    def _add_task(self, task_type, events) -> str:
+        task_id = str(uuid.uuid4())
+        with self._lock:
+            self.tasks.append(
+                {
+                    "task_id": task_id,
+                    "type": task_type,
+                    "status": "SUCCEEDED",
+                    "completion_time": _now(),
+                }
+            )
+            self.events[task_id] = events
+        return task_id
+
+    def upload(self, path, content=b"") -> str:
+        """Write a file as if a user had transferred it in, and record
+        the successful transfer task.
+
+        Arguments:
+            path -- collection path of the file, e.g. "uid/file.tsv"
+
+        Keyword Arguments:
+            content -- file contents (default: {b""})
+
+        Returns:
+            transfer task id
+        """
+        local = self._local(path)
+        with open(local, "wb") as f:
+            f.write(content)
+        destination = "/~/" + os.path.relpath(local, self.root)
+        return self._add_task("TRANSFER", [{"destination_path": destination}])
+
+    # --- GCSClient --- #
+
+    def create_collection(self, collection_data):
+        self._call("create_collection")
+        collection_id = str(uuid.uuid4())
+        self.collections[collection_id] = dict(collection_data)
+        return {"id": collection_id, **self.collections[collection_id]}
+
+    def update_collection(self, collection_id, collection_data, **kwargs):
+        self._call("update_collection")
+        if collection_id not in self.collections:
+            raise api_error(404, "not_found", collection_id)
+        self.collections[collection_id].update(dict(collection_data))
+        return {"id": collection_id, **self.collections[collection_id]}
+
+    def delete_collection(self, collection_id, **kwargs):
+        self._call("delete_collection")
+        if self.collections.pop(collection_id, None) is None:
+            raise api_error(404, "not_found", collection_id)
+        return SimpleNamespace(http_status=200, data={"id": collection_id})
+
+    def create_role(self, data, **kwargs):
+        self._call("create_role")
+        self.roles.append(dict(data))
+        return {"id": str(uuid.uuid4()), **dict(data)}
+
+
+class LocalGlobusProvider:
+    """Client provider (see globus_provider) serving the local backend.
+    Identity lookups return a stable id for every username."""
+
+    def __init__(self, backend: LocalGlobusBackend):
+        self.backend = backend
+        self.stats = {"identity_lookups": 0}
+
+    def auth_round_trips(self) -> int:
+        return 0
+
+    def get_authorizer(self, scope):
+        return None
+
+    def transfer_client(self) -> LocalGlobusBackend:
+        return self.backend
+
+    def gcs_client(self) -> LocalGlobusBackend:
+        return self.backend
+
+    def get_identities(self, usernames=None, **kwargs):
+        self.stats["identity_lookups"] += 1
+        self.backend._call("get_identities")
+        names = usernames if isinstance(usernames, (list, tuple)) else [usernames]
+        return SimpleNamespace(
+            data={
+                "identities": [
+                    {"id": str(uuid.uuid5(uuid.NAMESPACE_URL, name)), "username": name}
+                    for name in names
+                    if name
+                ]
+            }
+        )
+
+
+def local_provider_from_config() -> LocalGlobusProvider:
+    backend = LocalGlobusBackend(
+        config.GLOBUS_LOCAL_ROOT or config.DEPO_PATH,
+        latency=config.GLOBUS_LOCAL_LATENCY_MS / 1000,
+        jitter=config.GLOBUS_LOCAL_JITTER_MS / 1000,
+    )
+    return LocalGlobusProvider(backend)
+
+
+def use_local_backend(root, latency=0.0, jitter=0.0) -> LocalGlobusBackend:
+    """Serve Globus calls in this process from a local directory
+
+    Arguments:
+        root -- directory playing the mapped collection
+
+    Keyword Arguments:
+        latency -- seconds added to every call (default: {0.0})
+        jitter -- max random seconds added on top (default: {0.0})
+
+    Returns:
+        the backend
+    """
+    backend = LocalGlobusBackend(root, latency=latency, jitter=jitter)
+    set_provider(LocalGlobusProvider(backend))
+    return backend
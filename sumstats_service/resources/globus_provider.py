@@ -0,0 +1,189 @@
+"""Process-level cache of Globus authorizers and clients.
+
+Building a ConfidentialAppAuthClient, fetching a client credentials token and
+autoactivating the endpoint used to happen on every Globus call. The
+provider does each of them once per process and scope, and renews a token
+only when it is about to expire (config.GLOBUS_TOKEN_REFRESH_MARGIN).
+
+Every request to Globus Auth is counted in provider.stats, so the number of
+auth round trips per API request can be checked (see auth_round_trips()).
+
+set_provider() replaces the process provider, e.g. with a fake in tests.
+"""
+
+import logging
+import os
+import threading
+import time
+
+from globus_sdk import (
+    ClientCredentialsAuthorizer,
+    ConfidentialAppAuthClient,
+    GCSClient,
+    TransferClient,
+    scopes,
+)
+
+from sumstats_service import config
+
+logger = logging.getLogger(__name__)
+
+
+class RenewingClientCredentialsAuthorizer(ClientCredentialsAuthorizer):
+    """Client credentials authorizer that renews its token refresh_margin
+    seconds before expiry, and only once when used from several threads.
+    """
+
+    def __init__(self, *args, refresh_margin: int = None, **kwargs):
+        self._lock = threading.Lock()
+        self.refresh_margin = (
+            config.GLOBUS_TOKEN_REFRESH_MARGIN
+            if refresh_margin is None
+            else refresh_margin
+        )
+        super().__init__(*args, **kwargs)
+
+    def ensure_valid_token(self) -> None:
+        with self._lock:
+            if (
+                self.access_token is not None
+                and self.expires_at is not None
+                and time.time() <= self.expires_at - self.refresh_margin
+            ):
+                return
+            self._get_new_access_token()
+
+
+class GlobusClientProvider:
+    def __init__(self, client_id=None, client_secret=None, refresh_margin=None):
+        self.client_id = client_id or config.CLIENT_ID
+        self.client_secret = client_secret or config.CLIENT_SECRET
+        self.refresh_margin = refresh_margin
+        self._lock = threading.RLock()
+        self._auth_client = None
+        self._authorizers = {}
+        self._transfer_client = None
+        self._gcs_client = None
+        self._autoactivated = set()
+        self.stats = {
+            "token_requests": 0,
+            "identity_lookups": 0,
+            "autoactivations": 0,
+            "clients_created": 0,
+        }
+
+    def _incr(self, key) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def auth_round_trips(self) -> int:
+        with self._lock:
+            return self.stats["token_requests"] + self.stats["identity_lookups"]
+
+    def auth_client(self) -> ConfidentialAppAuthClient:
+        with self._lock:
+            if self._auth_client is None:
+                self._auth_client = ConfidentialAppAuthClient(
+                    client_id=self.client_id, client_secret=self.client_secret
+                )
+            return self._auth_client
+
+    def get_authorizer(self, scope) -> ClientCredentialsAuthorizer:
+        """Shared authorizer for a scope, fetching its first token on creation"""
+        key = str(scope)
+        with self._lock:
+            authorizer = self._authorizers.get(key)
+            if authorizer is None:
+                authorizer = RenewingClientCredentialsAuthorizer(
+                    self.auth_client(),
+                    scopes=scope,
+                    on_refresh=lambda _: self._incr("token_requests"),
+                    refresh_margin=self.refresh_margin,
+                )
+                self._authorizers[key] = authorizer
+            return authorizer
+
+    def transfer_scope(self) -> str:
+        return (
+            "urn:globus:auth:scope:transfer.api.globus.org:all"
+            f"[*https://auth.globus.org/scopes/{config.MAPPED_COLLECTION_ID}"
+            "/data_access]"
+        )
+
+    def gcs_scope(self):
+        scope = scopes.GCSEndpointScopeBuilder(config.GWAS_ENDPOINT_ID).make_mutable(
+            "manage_collections"
+        )
+        scope.add_dependency(
+            scopes.GCSCollectionScopeBuilder(config.MAPPED_COLLECTION_ID).data_access
+        )
+        return scope
+
+    def transfer_client(self) -> TransferClient:
+        with self._lock:
+            if self._transfer_client is None:
+                self._transfer_client = TransferClient(
+                    authorizer=self.get_authorizer(self.transfer_scope())
+                )
+                self._incr("clients_created")
+            client = self._transfer_client
+            if config.MAPPED_COLLECTION_ID not in self._autoactivated:
+                client.endpoint_autoactivate(config.MAPPED_COLLECTION_ID)
+                self._autoactivated.add(config.MAPPED_COLLECTION_ID)
+                self._incr("autoactivations")
+            return client
+
+    def gcs_client(self) -> GCSClient:
+        with self._lock:
+            if self._gcs_client is None:
+                self._gcs_client = GCSClient(
+                    config.GLOBUS_HOSTNAME,
+                    authorizer=self.get_authorizer(self.gcs_scope()),
+                )
+                self._incr("clients_created")
+            return self._gcs_client
+
+    def get_identities(self, **kwargs):
+        self._incr("identity_lookups")
+        return self.auth_client().get_identities(**kwargs)
+
+
+_provider_lock = threading.Lock()
+_provider = None
+
+
+def _reset_provider_after_fork():
+    global _provider_lock, _provider
+    _provider_lock = threading.Lock()
+    _provider = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_provider_after_fork)
+
+
+def get_provider() -> GlobusClientProvider:
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            if config.GLOBUS_BACKEND == "local":
+                from sumstats_service.resources.globus_local import (
+                    local_provider_from_config,
+                )
+
+                _provider = local_provider_from_config()
+            else:
+                _provider = GlobusClientProvider()
+        return _provider
+
+
+def set_provider(provider) -> None:
+    """Replace the process provider; None resets it to the default"""
+    global _provider
+    with _provider_lock:
+        _provider = provider
+
+
+def auth_round_trips() -> int:
+    """Globus Auth requests made by this process so far"""
+    return get_provider().auth_round_trips()
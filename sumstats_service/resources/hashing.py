@@ -0,0 +1,87 @@
+"""md5 hashing of local files.
+
+Files are read with readinto() into a large buffer that is reused by each
+thread, so hashing a GB takes hundreds rather than hundreds of thousands of
+Python-level iterations. hashlib releases the GIL while it hashes a large
+buffer, so several files can be hashed in parallel on a thread pool.
+"""
+
+import hashlib
+import logging
+import mmap
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from sumstats_service import config
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+def _get_buffer(buffer_size: int) -> memoryview:
+    buffer = getattr(_local, "buffer", None)
+    if buffer is None or len(buffer) != buffer_size:
+        buffer = memoryview(bytearray(buffer_size))
+        _local.buffer = buffer
+    return buffer
+
+
+def md5_file(path: str, buffer_size: int = None, use_mmap: bool = None) -> str:
+    """Compute the md5 of a file
+
+    Arguments:
+        path -- path to the file
+
+    Keyword Arguments:
+        buffer_size -- bytes per read (default: {config.HASH_BUFFER_SIZE})
+        use_mmap -- hash a memory map of the file instead of reading it
+        (default: {config.HASH_USE_MMAP})
+
+    Returns:
+        hex digest
+    """
+    buffer_size = buffer_size or config.HASH_BUFFER_SIZE
+    use_mmap = config.HASH_USE_MMAP if use_mmap is None else use_mmap
+    hash_md5 = hashlib.md5()
+    with open(path, "rb", buffering=0) as f:
+        if use_mmap and os.fstat(f.fileno()).st_size > 0:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm)
+                try:
+                    for offset in range(0, len(mm), buffer_size):
+                        hash_md5.update(view[offset : offset + buffer_size])
+                finally:
+                    view.release()
+        else:
+            buffer = _get_buffer(buffer_size)
+            while True:
+                n = f.readinto(buffer)
+                if not n:
+                    break
+                hash_md5.update(buffer[:n])
+    return hash_md5.hexdigest()
+
+
+def md5_files(paths, max_workers: int = None, hasher=md5_file) -> dict:
+    """Compute the md5 of many files on a bounded thread pool
+
+    Arguments:
+        paths -- iterable of file paths
+
+    Keyword Arguments:
+        max_workers -- threads to hash with (default: {config.HASH_WORKERS})
+        hasher -- function of a path returning its md5 (default: {md5_file})
+
+    Returns:
+        dict of path to hex digest, in the order of paths
+    """
+    paths = list(paths)
+    if not paths:
+        return {}
+    max_workers = min(max_workers or config.HASH_WORKERS, len(paths))
+    if max_workers <= 1:
+        return {path: hasher(path) for path in paths}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(paths, executor.map(hasher, paths)))
@@ -0,0 +1,123 @@
+"""Run the validation workflow inside the preval worker.
+
+The nextflow workflow (workflows/process_submission.nf) runs two steps per
+study, each as a SLURM job in a container: copying the submitted file to
+the storage path, then validating it. For small submissions the JVM,
+nextflow, container and scheduler start-up dominate, so with
+VALIDATION_ENGINE "local" (or "auto" and a payload of at most
+VALIDATION_LOCAL_MAX_MB) the same two steps run on a process pool here.
+Each study writes <VALIDATED_PATH>/<callback_id>/<study_id>.json exactly
+as validate-study does, so results are collected the same way.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import current_process
+
+import sumstats_service.resources.validate_study as vs
+from sumstats_service import config
+
+
+def payload_size(content: dict) -> int:
+    """Total size in bytes of the submitted files of a payload
+
+    Arguments:
+        content -- validation payload
+
+    Returns:
+        size in bytes, or None if a file cannot be found from here
+    """
+    total = 0
+    for entry in content.get("requestEntries", []):
+        try:
+            path = os.path.join(config.DEPO_PATH, entry["entryUUID"], entry["filePath"])
+            total += os.path.getsize(path)
+        except (KeyError, TypeError, OSError):
+            return None
+    return total
+
+
+def select_engine(content: dict, engine: str = None) -> str:
+    """Validation engine for a payload, "local" or "nextflow".
+    In "auto" mode payloads whose size cannot be determined, e.g. because
+    the deposition area is not mounted on this worker, go to nextflow.
+
+    Keyword Arguments:
+        engine -- configured engine (default: {config.VALIDATION_ENGINE})
+    """
+    engine = engine or config.VALIDATION_ENGINE
+    if engine != "auto":
+        return "local" if engine == "local" else "nextflow"
+    size = payload_size(content)
+    if size is not None and size <= config.VALIDATION_LOCAL_MAX_MB * 1024 * 1024:
+        return "local"
+    return "nextflow"
+
+
+def validate_study(callback_id, study_id, content, minrows=None, forcevalid=False):
+    """Copy and validate one study of a payload, as the two nextflow
+    processes do, and write its result json.
+
+    Returns:
+        result dict, or None if the study is not in the payload
+    """
+    parsed = vs.parse_payload(content, study_id, callback_id)
+    if parsed is False:
+        return None
+    filepath, md5, assembly, readme, entryUUID = parsed
+    entry = next(e for e in content["requestEntries"] if e.get("id") == study_id)
+    zero_p_values = bool(entry.get("analysisSoftware"))
+
+    study = vs.run_copy(callback_id, study_id, filepath, entryUUID, md5, assembly)
+    if study.retrieved == 1:
+        study = vs.run_validation(
+            callback_id,
+            study_id,
+            filepath,
+            md5,
+            assembly,
+            readme,
+            entryUUID,
+            minrows=minrows,
+            forcevalid=forcevalid,
+            zero_p_values=zero_p_values,
+        )
+    out = os.path.join(config.VALIDATED_PATH, callback_id, f"{study_id}.json")
+    vs.write_result(study, out)
+    return {
+        "id": study.study_id,
+        "retrieved": study.retrieved,
+        "dataValid": study.data_valid,
+        "errorCode": study.error_code,
+    }
+
+
+def validate_payload(
+    callback_id, content, minrows=None, forcevalid=False, max_workers=None
+) -> list:
+    """Validate every study of a payload on a process pool
+
+    Arguments:
+        callback_id -- callback id
+        content -- validation payload
+
+    Keyword Arguments:
+        minrows -- minimum number of rows (default: {None})
+        forcevalid -- force the data to be valid (default: {False})
+        max_workers -- worker processes (default: {config})
+
+    Returns:
+        list of result dicts
+    """
+    max_workers = max_workers or config.VALIDATION_LOCAL_WORKERS
+    study_ids = [e.get("id") for e in content.get("requestEntries", [])]
+    args = [(callback_id, i, content, minrows, forcevalid) for i in study_ids]
+    # daemonic processes, e.g. some celery pool workers, cannot have children
+    if max_workers > 1 and len(study_ids) > 1 and not current_process().daemon:
+        with ProcessPoolExecutor(
+            max_workers=min(max_workers, len(study_ids))
+        ) as executor:
+            results = list(executor.map(validate_study, *zip(*args)))
+    else:
+        results = [validate_study(*a) for a in args]
+    return [r for r in results if r]
@@ -1,16 +1,216 @@
+import os
+import threading
+import uuid
 from datetime import datetime
 
 from pymongo import MongoClient as pymc
+from pymongo import ReturnDocument, UpdateOne, monitoring
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 
 from sumstats_service import config
 
 
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Count connection pool events across all registered pymongo clients
+    so that connection churn can be observed per process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.counts = {
+            "pools_created": 0,
+            "pools_cleared": 0,
+            "connections_created": 0,
+            "connections_closed": 0,
+            "checkouts": 0,
+            "checkout_failures": 0,
+        }
+
+    def _incr(self, key):
+        with self._lock:
+            self.counts[key] += 1
+
+    def pool_created(self, event):
+        self._incr("pools_created")
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._incr("pools_cleared")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._incr("connections_created")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._incr("connections_closed")
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._incr("checkout_failures")
+
+    def connection_checked_out(self, event):
+        self._incr("checkouts")
+
+    def connection_checked_in(self, event):
+        pass
+
+
+# Process-wide registry of pymongo clients. A pymongo client owns a
+# connection pool and monitor threads, so we only ever want one per
+# server/credentials in each process. The registry is reset in forked
+# children (celery prefork, gunicorn workers) because pymongo clients
+# must not be shared across a fork.
+_registry_lock = threading.Lock()
+_pymongo_clients = {}
+_mongo_clients = {}
+_pool_stats = PoolStatsListener()
+_registry_stats = {"clients_created": 0, "lookups": 0}
+
+
+def _reset_registry_after_fork():
+    global _registry_lock
+    _registry_lock = threading.Lock()
+    _pymongo_clients.clear()
+    _mongo_clients.clear()
+    _pool_stats.reset()
+    _registry_stats.update({"clients_created": 0, "lookups": 0})
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_registry_after_fork)
+
+
+def get_pymongo_client(uri, username, password) -> pymc:
+    """Return the shared pymongo client for the given server and credentials,
+    creating it on first use.
+    """
+    key = (uri, username, password)
+    with _registry_lock:
+        _registry_stats["lookups"] += 1
+        client = _pymongo_clients.get(key)
+        if client is None:
+            client = pymc(
+                uri,
+                username=username,
+                password=password,
+                event_listeners=[_pool_stats],
+            )
+            _pymongo_clients[key] = client
+            _registry_stats["clients_created"] += 1
+    return client
+
+
+def get_mongo_client(
+    uri=None, username=None, password=None, database=None
+) -> "MongoClient":
+    """Return the shared MongoClient for a URI/database.
+    Arguments default to the service config.
+
+    Returns:
+        MongoClient
+    """
+    uri = uri if uri is not None else config.MONGO_URI
+    username = username if username is not None else config.MONGO_USER
+    password = password if password is not None else config.MONGO_PASSWORD
+    database = database if database is not None else config.MONGO_DB
+    key = (uri, username, password, database)
+    mdb = _mongo_clients.get(key)
+    if mdb is None:
+        mdb = MongoClient(uri, username, password, database)
+        with _registry_lock:
+            mdb = _mongo_clients.setdefault(key, mdb)
+    return mdb
+
+
+def pool_stats() -> dict:
+    """Connection pool statistics for this process
+
+    Returns:
+        dict of registry and pool event counters
+    """
+    with _registry_lock:
+        stats = dict(_registry_stats)
+        stats["pid"] = os.getpid()
+        stats["active_clients"] = len(_pymongo_clients)
+    stats.update(_pool_stats.counts)
+    return stats
+
+
+def close_all_clients() -> None:
+    with _registry_lock:
+        for client in _pymongo_clients.values():
+            client.close()
+        _pymongo_clients.clear()
+        _mongo_clients.clear()
+
+
+class FieldUpdateBatch:
+    """Collect $set changes for documents of one collection, keyed by a
+    field (e.g. studyID), and apply them with a single bulk_write.
+    Changes made to the same key are merged into one update.
+    """
+
+    def __init__(self, collection, key_field):
+        self.collection = collection
+        self.key_field = key_field
+        self._updates = {}
+
+    def __len__(self):
+        return len(self._updates)
+
+    def set(self, key, fields: dict) -> "FieldUpdateBatch":
+        self._updates.setdefault(key, {}).update(fields)
+        return self
+
+    def execute(self) -> dict:
+        """Apply the collected changes
+
+        Returns:
+            dict with matched and modified counts and the list of
+            keys that did not match any document
+        """
+        result = {"matched": 0, "modified": 0, "missing": []}
+        if not self._updates:
+            return result
+        operations = [
+            UpdateOne({self.key_field: key}, {"$set": fields})
+            for key, fields in self._updates.items()
+        ]
+        bulk_result = self.collection.bulk_write(operations, ordered=False)
+        result["matched"] = bulk_result.matched_count
+        result["modified"] = bulk_result.modified_count
+        if bulk_result.matched_count < len(operations):
+            # only pay for a lookup when something did not match
+            found = set(
+                self.collection.distinct(
+                    self.key_field, {self.key_field: {"$in": list(self._updates)}}
+                )
+            )
+            result["missing"] = [k for k in self._updates if k not in found]
+        self._updates = {}
+        return result
+
+
 class MongoClient:
     def __init__(self, uri, username, password, database):
         self.uri = uri
         self.username = username
         self.password = password
-        self.client = pymc(self.uri, username=self.username, password=self.password)
+        self.client = get_pymongo_client(
+            self.uri, username=self.username, password=self.password
+        )
         self.database = self.client[database]
         self.study_collection = self.database["sumstats-study-meta"]
         self.error_collection = self.database["sumstats-errors"]
@@ -20,6 +220,16 @@ class MongoClient:
         self.metadata_yaml_collection = self.database["sumstats-metadata-yaml"]
         self.studies_collection = self.database["studies"]
         self.payload_collection = self.database["sumstats-validation-payload"]
+        self.job_collection = self.database["sumstats-jobs"]
+        self.md5_cache_collection = self.database["sumstats-md5-cache"]
+        self.ftp_index_collection = self.database["sumstats-ftp-index"]
+        self.transfer_event_collection = self.database[
+            "sumstats-globus-transfer-events"
+        ]
+        self.sync_state_collection = self.database["sumstats-sync-state"]
+        self.guest_collection_collection = self.database["sumstats-globus-collections"]
+        self.warm_pool_collection = self.database["sumstats-globus-warm-pool"]
+        self.validation_queue_collection = self.database["sumstats-validation-queue"]
 
     """ generic methods"""
 
@@ -36,25 +246,83 @@ class MongoClient:
     # Specific Methods
     ######################
 
+    STUDY_FIELDS = [
+        "studyID",
+        "callbackID",
+        "filePath",
+        "md5",
+        "assembly",
+        "readme",
+        "entryUUID",
+        "rawSS",
+        "fileType",
+    ]
+
     def insert_new_study(self, data):
-        fields = [
-            "studyID",
-            "callbackID",
-            "filePath",
-            "md5",
-            "assembly",
-            "readme",
-            "entryUUID",
-            "rawSS",
-            "fileType",
-        ]
-        study_data_dict = dict(zip(fields, data))
+        study_data_dict = dict(zip(self.STUDY_FIELDS, data))
         self.insert(self.study_collection, study_data_dict)
 
+    def insert_new_studies(self, data_list, batch_size=None) -> dict:
+        """Insert many studies with unordered insert_many calls.
+        If a batch fails, every study inserted by this call is deleted
+        again, so the payload is registered all or nothing.
+
+        studyID is not unique-indexed: duplicate and existing study IDs are
+        rejected beforehand by Payload.check_study_ids_valid, so write
+        errors here come from the server, e.g. a failed document validation.
+
+        Arguments:
+            data_list -- list of study field lists, as for insert_new_study
+
+        Keyword Arguments:
+            batch_size -- studies per insert_many
+            (default: {config.MONGO_INSERT_BATCH_SIZE})
+
+        Returns:
+            dict with the number inserted and a dict of failed study ID to
+            error message. Nothing is inserted if anything failed.
+        """
+        batch_size = batch_size or config.MONGO_INSERT_BATCH_SIZE
+        docs = [dict(zip(self.STUDY_FIELDS, data)) for data in data_list]
+        try:
+            for start in range(0, len(docs), batch_size):
+                batch = docs[start : start + batch_size]
+                try:
+                    self.study_collection.insert_many(batch, ordered=False)
+                except BulkWriteError as error:
+                    failed = {
+                        batch[e["index"]]["studyID"]: e.get("errmsg")
+                        for e in error.details.get("writeErrors", [])
+                    }
+                    print(f"Failed to insert studies {failed}, rolling back.")
+                    self._remove_inserted_studies(docs)
+                    return {"inserted": 0, "failed": failed}
+        except Exception:
+            self._remove_inserted_studies(docs)
+            raise
+        return {"inserted": len(docs), "failed": {}}
+
+    def _remove_inserted_studies(self, docs):
+        # insert_many sets _id on each document it was given
+        object_ids = [doc["_id"] for doc in docs if "_id" in doc]
+        if object_ids:
+            self.study_collection.delete_many({"_id": {"$in": object_ids}})
+
     def get_study_metadata(self, study):
         meta_dict = self.study_collection.find_one({"studyID": study})
         return meta_dict
 
+    def get_existing_study_ids(self, study_ids) -> set:
+        """Return the subset of study_ids that already have an entry,
+        using a single index-covered $in query.
+        """
+        if not study_ids:
+            return set()
+        cursor = self.study_collection.find(
+            {"studyID": {"$in": list(study_ids)}}, {"studyID": 1, "_id": 0}
+        )
+        return {doc["studyID"] for doc in cursor}
+
     def get_study_metadata_by_gcst(self, gcst):
         # meta_dict = self.study_collection.find_one({"gcst": gcst})
         # Note that we use .find() rather than .find_one() as above. The reason
@@ -68,73 +336,121 @@ class MongoClient:
         return meta_dict
 
     def update_study_metadata(self, study, retrieved_status, valid_status, error_code):
-        data = self.get_study_metadata(study)
-        objectid = data["_id"]
-        data["retrieved"] = retrieved_status
-        data["dataValid"] = valid_status
-        data["errorCode"] = error_code
-        self.replace_one(self.study_collection, objectid, data)
+        return self.update_study_fields(
+            study,
+            {
+                "retrieved": retrieved_status,
+                "dataValid": valid_status,
+                "errorCode": error_code,
+            },
+        )
 
     def bulk_update_study_metadata(self, operations):
         if operations:
             self.study_collection.bulk_write(operations)
 
+    def set_fields(self, collection, query, fields) -> dict:
+        """Atomically $set fields on the first document matching query
+
+        Returns:
+            dict with matched and modified counts
+        """
+        result = collection.update_one(query, {"$set": fields})
+        return {"matched": result.matched_count, "modified": result.modified_count}
+
+    def update_study_fields(self, study, fields) -> dict:
+        return self.set_fields(self.study_collection, {"studyID": study}, fields)
+
+    def update_callback_fields(self, callback_id, fields) -> dict:
+        return self.set_fields(
+            self.callback_collection, {"callbackID": callback_id}, fields
+        )
+
+    def study_update_batch(self) -> "FieldUpdateBatch":
+        return FieldUpdateBatch(self.study_collection, "studyID")
+
     def update_retrieved_status(self, study, status):
-        data = self.get_study_metadata(study)
-        objectid = data["_id"]
-        data["retrieved"] = status
-        self.replace_one(self.study_collection, objectid, data)
+        return self.update_study_fields(study, {"retrieved": status})
 
     def update_data_valid_status(self, study, status):
-        data = self.get_study_metadata(study)
-        objectid = data["_id"]
-        data["dataValid"] = status
-        self.replace_one(self.study_collection, objectid, data)
+        return self.update_study_fields(study, {"dataValid": status})
 
     def update_error_code(self, study, error_code):
-        data = self.get_study_metadata(study)
-        objectid = data["_id"]
-        data["errorCode"] = error_code
-        self.replace_one(self.study_collection, objectid, data)
+        return self.update_study_fields(study, {"errorCode": error_code})
 
     def update_file_type_by_study_id(self, study, file_type):
-        data = self.get_study_metadata(study)
-        objectid = data["_id"]
-        data["fileType"] = file_type
-        self.replace_one(self.study_collection, objectid, data)
+        return self.update_study_fields(study, {"fileType": file_type})
 
     def update_publication_details(self, study, author_name, pmid, gcst):
-        data = self.get_study_metadata(study)
-        objectid = data["_id"]
-        data["authorName"] = author_name
-        data["pmid"] = pmid
-        data["gcst"] = gcst
-        self.replace_one(self.study_collection, objectid, data)
-
-    def update_file_type(self, gcst_id, file_type):
-        study_data = self.get_study_metadata_by_gcst(gcst_id)
-        if study_data is None:
-            print(
-                f"""
-                Error: No study found with gcst_id '{gcst_id}'.
-                Cannot update file type.
-                """
-            )
-            raise ValueError(f"No study found with gcst_id '{gcst_id}'")
+        return self.update_study_fields(
+            study, {"authorName": author_name, "pmid": pmid, "gcst": gcst}
+        )
 
-        object_id = study_data["_id"]
-        filter_criteria = {"_id": object_id}
+    def reset_validation_status_for_callback_id(self, callback_id):
+        result = self.study_collection.update_many(
+            {"callbackID": callback_id},
+            {"$set": {"retrieved": None, "dataValid": None, "errorCode": None}},
+        )
+        return {"matched": result.matched_count, "modified": result.modified_count}
 
-        # Define the update operation to set the fileType field
-        # The $set operator adds the field if it doesn't exist,
-        # or updates it if it does.
-        update_operation = {"$set": {"fileType": file_type}}
-        self.study_collection.update_one(filter_criteria, update_operation)
+    def bulk_update_file_type(self, gcst_ids, file_type) -> list:
+        """Set the fileType on the latest study entry of each gcst_id.
+        The latest entries are resolved with one aggregation and all
+        updates are applied with one bulk_write.
 
-        return {
-            "success": True,
-            "message": f"File type updated successfully for gcst_id '{gcst_id}'.",
+        Arguments:
+            gcst_ids -- list of GCST IDs
+            file_type -- file type
+
+        Returns:
+            list of result dicts with gcst_id, success and message,
+            in the order of gcst_ids
+        """
+        pipeline = [
+            {"$match": {"gcst": {"$in": list(gcst_ids)}}},
+            {"$sort": {"gcst": 1, "_id": -1}},
+            {"$group": {"_id": "$gcst", "latest_id": {"$first": "$_id"}}},
+        ]
+        latest_ids = {
+            doc["_id"]: doc["latest_id"]
+            for doc in self.study_collection.aggregate(pipeline)
         }
+        found_gcst_ids = [gcst_id for gcst_id in gcst_ids if gcst_id in latest_ids]
+        failed = {}
+        if found_gcst_ids:
+            operations = [
+                UpdateOne(
+                    {"_id": latest_ids[gcst_id]}, {"$set": {"fileType": file_type}}
+                )
+                for gcst_id in found_gcst_ids
+            ]
+            try:
+                self.study_collection.bulk_write(operations, ordered=False)
+            except BulkWriteError as error:
+                for write_error in error.details.get("writeErrors", []):
+                    failed[found_gcst_ids[write_error["index"]]] = write_error.get(
+                        "errmsg"
+                    )
+
+        results = []
+        for gcst_id in gcst_ids:
+            if gcst_id not in latest_ids:
+                print(f"Error: No study found with gcst_id '{gcst_id}'.")
+                message = f"No study found with gcst_id '{gcst_id}'"
+                results.append(
+                    {"gcst_id": gcst_id, "success": False, "message": message}
+                )
+            elif gcst_id in failed:
+                message = f"Update failed for gcst_id '{gcst_id}': {failed[gcst_id]}"
+                results.append(
+                    {"gcst_id": gcst_id, "success": False, "message": message}
+                )
+            else:
+                message = f"File type updated successfully for gcst_id '{gcst_id}'."
+                results.append(
+                    {"gcst_id": gcst_id, "success": True, "message": message}
+                )
+        return results
 
     def get_study_count(self):
         return self.study_collection.count_documents({})
@@ -157,18 +473,14 @@ class MongoClient:
         self.callback_collection.delete_many({"callbackID": callback_id})
 
     def update_metadata_errors(self, callback_id, error_list):
-        data = self.callback_collection.find_one({"callbackID": callback_id})
-        objectid = data["_id"]
-        data["metadataErrors"] = error_list
-        self.replace_one(self.callback_collection, objectid, data)
+        return self.update_callback_fields(callback_id, {"metadataErrors": error_list})
 
     def update_bypass_validation_status(
         self, callback_id: str, bypass_validation: bool
-    ) -> None:
-        data = self.callback_collection.find_one({"callbackID": callback_id})
-        objectid = data["_id"]
-        data["bypassValidation"] = bypass_validation
-        self.replace_one(self.callback_collection, objectid, data)
+    ) -> dict:
+        return self.update_callback_fields(
+            callback_id, {"bypassValidation": bypass_validation}
+        )
 
     def get_bypass_validation_status(self, callback_id: str) -> bool:
         data = self.callback_collection.find_one({"callbackID": callback_id})
@@ -188,14 +500,18 @@ class MongoClient:
         return data if data else None
 
     def get_error_message_from_code(self, code):
-        if self.error_collection.count_documents({}) == 0:
+        # Prefer error_catalogue.get_error_text, which caches the catalogue
+        error = self.error_collection.find_one({"id": code})
+        if error is None and self.error_collection.count_documents({}) == 0:
             self.create_error_table()
-        error_text = self.error_collection.find_one({"id": code})["errorText"]
-        return error_text
+            error = self.error_collection.find_one({"id": code})
+        return error["errorText"]
 
     def create_error_table(self):
-        for error in config.VALIDATION_ERRORS:
-            self.insert(self.error_collection, error)
+        # insert copies, insert_one adds an _id to the document it is given
+        self.error_collection.insert_many(
+            [dict(error) for error in config.VALIDATION_ERRORS]
+        )
 
     def delete_study_entry(self, study):
         self.study_collection.delete_many({"studyID": study})
@@ -306,3 +622,437 @@ class MongoClient:
     def get_payload(self, callback_id):
         _ = self.payload_collection.find_one({"callback_id": callback_id})
         return _["payload"]
+
+    def create_job(
+        self,
+        job_id,
+        job_type,
+        callback_id=None,
+        items=None,
+        status=config.JobStatus.PENDING,
+    ):
+        """Register a background job. Items are the units of work that
+        must each report a result before the job is complete, duplicates
+        are counted once.
+        """
+        items = list(dict.fromkeys(items or []))
+        now = datetime.now()
+        self.insert(
+            self.job_collection,
+            {
+                "job_id": job_id,
+                "job_type": job_type,
+                "callback_id": callback_id,
+                "status": status.value,
+                "items": {
+                    item: {"status": config.JobStatus.PENDING.value} for item in items
+                },
+                "pending": len(items),
+                "created": now,
+                "updated": now,
+            },
+        )
+        return job_id
+
+    def update_job_status(self, job_id, status, **fields):
+        fields.update({"status": status.value, "updated": datetime.now()})
+        return self.set_fields(self.job_collection, {"job_id": job_id}, fields)
+
+    def record_job_item_result(self, job_id, item, success, message=None):
+        """Atomically record the outcome of one job item. The update that
+        records the last pending item also sets the final job status.
+
+        Returns:
+            the job document after the update, or None if not found
+        """
+        item_status = config.JobStatus.COMPLETED if success else config.JobStatus.FAILED
+        job = self.job_collection.find_one_and_update(
+            {
+                "job_id": job_id,
+                f"items.{item}.status": config.JobStatus.PENDING.value,
+            },
+            {
+                "$set": {
+                    f"items.{item}": {"status": item_status.value, "message": message},
+                    "updated": datetime.now(),
+                },
+                "$inc": {"pending": -1},
+            },
+            return_document=ReturnDocument.AFTER,
+        )
+        if job and job["pending"] == 0:
+            failed = any(
+                i["status"] == config.JobStatus.FAILED.value
+                for i in job["items"].values()
+            )
+            final_status = (
+                config.JobStatus.FAILED if failed else config.JobStatus.COMPLETED
+            )
+            self.update_job_status(job_id, final_status)
+            job["status"] = final_status.value
+        return job
+
+    def get_job(self, job_id):
+        return self.job_collection.find_one({"job_id": job_id}, {"_id": 0})
+
+    def get_cached_md5(self, path, inode, size, mtime_ns):
+        """md5 cached for this exact file identity, or None. A hit
+        refreshes last_used so that the entry is not evicted.
+        """
+        entry = self.md5_cache_collection.find_one_and_update(
+            {"path": path, "inode": inode, "size": size, "mtime_ns": mtime_ns},
+            {"$set": {"last_used": datetime.now()}},
+            projection={"_id": 0, "md5": 1},
+        )
+        return entry["md5"] if entry else None
+
+    def set_cached_md5(self, path, inode, size, mtime_ns, md5):
+        """Cache the md5 for a file, replacing any stale entry for the path"""
+        self.md5_cache_collection.update_one(
+            {"path": path},
+            {
+                "$set": {
+                    "inode": inode,
+                    "size": size,
+                    "mtime_ns": mtime_ns,
+                    "md5": md5,
+                    "last_used": datetime.now(),
+                }
+            },
+            upsert=True,
+        )
+
+    def evict_cached_md5(self, paths):
+        return self.md5_cache_collection.delete_many(
+            {"path": {"$in": list(paths)}}
+        ).deleted_count
+
+    def get_ftp_index_entry(self, gcst_id):
+        return self.ftp_index_collection.find_one({"gcst_id": gcst_id}, {"_id": 0})
+
+    def get_ftp_index_entries(self, bucket) -> dict:
+        """Index entries of a bucket, keyed by gcst_id"""
+        return {
+            entry["gcst_id"]: entry
+            for entry in self.ftp_index_collection.find({"bucket": bucket}, {"_id": 0})
+        }
+
+    def upsert_ftp_index_entries(self, entries) -> int:
+        """Insert or replace FTP index entries, keyed by gcst_id
+
+        Returns:
+            number of entries written
+        """
+        operations = [
+            UpdateOne({"gcst_id": entry["gcst_id"]}, {"$set": entry}, upsert=True)
+            for entry in entries
+        ]
+        if not operations:
+            return 0
+        self.ftp_index_collection.bulk_write(operations, ordered=False)
+        return len(operations)
+
+    def touch_ftp_index_entries(self, gcst_ids, checked) -> int:
+        return self.ftp_index_collection.update_many(
+            {"gcst_id": {"$in": list(gcst_ids)}}, {"$set": {"checked": checked}}
+        ).modified_count
+
+    def upsert_transfer_events(self, events) -> int:
+        """Store Globus transfer events, keyed by task and destination path
+
+        Returns:
+            number of new events
+        """
+        operations = [
+            UpdateOne(
+                {
+                    "task_id": event["task_id"],
+                    "destination_path": event["destination_path"],
+                },
+                {"$setOnInsert": event},
+                upsert=True,
+            )
+            for event in events
+        ]
+        if not operations:
+            return 0
+        return self.transfer_event_collection.bulk_write(
+            operations, ordered=False
+        ).upserted_count
+
+    def get_transferred_filenames(self, unique_id, filenames) -> set:
+        """Those of filenames that were transferred into unique_id"""
+        return set(
+            self.transfer_event_collection.distinct(
+                "filename",
+                {"path_parts": unique_id, "filename": {"$in": list(filenames)}},
+            )
+        )
+
+    def get_sync_watermark(self, name):
+        state = self.sync_state_collection.find_one({"name": name})
+        return state["watermark"] if state else None
+
+    def set_sync_watermark(self, name, watermark):
+        self.sync_state_collection.update_one(
+            {"name": name},
+            {"$set": {"watermark": watermark, "updated": datetime.now()}},
+            upsert=True,
+        )
+
+    def insert_guest_collection(
+        self, uid, collection_id, display_name=None, created=None, legacy=False
+    ):
+        """Record the Globus guest collection created for an upload uid"""
+        self.guest_collection_collection.update_one(
+            {"uid": uid},
+            {
+                "$set": {
+                    "collection_id": collection_id,
+                    "display_name": display_name,
+                    "created": created or datetime.now(),
+                    "deleted": None,
+                    "legacy": legacy,
+                }
+            },
+            upsert=True,
+        )
+
+    def get_guest_collection_id(self, uid):
+        """Collection ID of the live guest collection for a uid, or None"""
+        entry = self.guest_collection_collection.find_one(
+            {"uid": uid, "deleted": None}, {"collection_id": 1}
+        )
+        return entry["collection_id"] if entry else None
+
+    def mark_guest_collection_deleted(self, uid) -> dict:
+        return self.set_fields(
+            self.guest_collection_collection,
+            {"uid": uid, "deleted": None},
+            {"deleted": datetime.now()},
+        )
+
+    def reserve_warm_collections(self, size) -> list:
+        """Reserve the free pool slots 0..size-1 with provisioning
+        placeholders. The unique slot index lets each slot be taken once,
+        so concurrent refills cannot grow the pool past size. An entry
+        gives its slot up when it leaves provisioning or ready.
+
+        Returns:
+            list of pool tokens reserved
+        """
+        tokens = []
+        for slot in range(size):
+            token = uuid.uuid4().hex
+            try:
+                self.insert(
+                    self.warm_pool_collection,
+                    {
+                        "token": token,
+                        "slot": slot,
+                        "collection_id": None,
+                        "path": None,
+                        "status": config.WarmCollectionStatus.PROVISIONING.value,
+                        "created": datetime.now(),
+                    },
+                )
+            except DuplicateKeyError:
+                continue
+            tokens.append(token)
+        return tokens
+
+    def count_warm_collections(self) -> int:
+        return self.warm_pool_collection.count_documents(
+            {"status": config.WarmCollectionStatus.READY.value}
+        )
+
+    def take_warm_collection(
+        self, status, uid=None, created_before=None, from_status=None
+    ):
+        """Atomically move the oldest ready pool entry to status, so that
+        it cannot be handed out twice.
+
+        Keyword Arguments:
+            uid -- uid the entry is claimed for (default: {None})
+            created_before -- only take entries older than this (default: {None})
+            from_status -- take an entry in this status (default: {READY})
+
+        Returns:
+            the pool entry as it was before the update, or None
+        """
+        from_status = from_status or config.WarmCollectionStatus.READY
+        query = {"status": from_status.value}
+        if created_before:
+            query["created"] = {"$lt": created_before}
+        return self.warm_pool_collection.find_one_and_update(
+            query,
+            {
+                "$set": {"status": status.value, "uid": uid, "updated": datetime.now()},
+                "$unset": {"slot": ""},
+            },
+            projection={"_id": 0},
+            sort=[("created", 1)],
+        )
+
+    def set_warm_collection_status(self, token, status, **fields) -> dict:
+        fields.update({"status": status.value, "updated": datetime.now()})
+        update = {"$set": fields}
+        # only provisioning and ready entries hold a pool slot
+        if status not in (
+            config.WarmCollectionStatus.PROVISIONING,
+            config.WarmCollectionStatus.READY,
+        ):
+            update["$unset"] = {"slot": ""}
+        result = self.warm_pool_collection.update_one({"token": token}, update)
+        return {"matched": result.matched_count, "modified": result.modified_count}
+
+    def queue_validation(
+        self, callback_id, minrows=None, forcevalid=False, file_type=None, size=0
+    ) -> dict:
+        """Queue a callback for the next validation batch
+
+        Returns:
+            count and total size of the queued callbacks with the same
+            minrows and forcevalid
+        """
+        self.validation_queue_collection.update_one(
+            {
+                "callback_id": callback_id,
+                "status": config.ValidationBatchStatus.QUEUED.value,
+            },
+            {
+                "$set": {
+                    "minrows": minrows,
+                    "forcevalid": forcevalid,
+                    "file_type": file_type,
+                    "size": size,
+                    "batch_id": None,
+                    "queued": datetime.now(),
+                }
+            },
+            upsert=True,
+        )
+        queued = list(
+            self.validation_queue_collection.find(
+                {
+                    "status": config.ValidationBatchStatus.QUEUED.value,
+                    "minrows": minrows,
+                    "forcevalid": forcevalid,
+                },
+                {"_id": 0, "size": 1},
+            )
+        )
+        return {"count": len(queued), "size": sum(q["size"] for q in queued)}
+
+    def count_queued_validations(self) -> int:
+        return self.validation_queue_collection.count_documents(
+            {"status": config.ValidationBatchStatus.QUEUED.value}
+        )
+
+    def claim_validation_batch(self, batch_id, max_callbacks, max_size) -> list:
+        """Atomically move queued callbacks into a batch, oldest first.
+        The oldest callback is always taken, whatever its size, and fixes
+        the minrows and forcevalid of the batch. Further callbacks are
+        taken while they fit in the remaining size budget.
+
+        Arguments:
+            batch_id -- id of the batch
+            max_callbacks -- most callbacks in the batch
+            max_size -- size budget of the batch in bytes
+
+        Returns:
+            list of the claimed queue entries
+        """
+        queued = config.ValidationBatchStatus.QUEUED.value
+        update = {
+            "$set": {
+                "status": config.ValidationBatchStatus.BATCHED.value,
+                "batch_id": batch_id,
+                "updated": datetime.now(),
+            }
+        }
+        first = self.validation_queue_collection.find_one_and_update(
+            {"status": queued}, update, projection={"_id": 0}, sort=[("queued", 1)]
+        )
+        if first is None:
+            return []
+        batch = [first]
+        remaining = max_size - first["size"]
+        while len(batch) < max_callbacks:
+            entry = self.validation_queue_collection.find_one_and_update(
+                {
+                    "status": queued,
+                    "minrows": first["minrows"],
+                    "forcevalid": first["forcevalid"],
+                    "size": {"$lte": remaining},
+                },
+                update,
+                projection={"_id": 0},
+                sort=[("queued", 1)],
+            )
+            if entry is None:
+                break
+            batch.append(entry)
+            remaining -= entry["size"]
+        return batch
+
+    def reap_validation_batches(self, updated_before, max_requeues) -> dict:
+        """Take back callbacks that stayed batched since before updated_before,
+        e.g. because the worker running their batch died. Each is queued
+        again, unless it was already requeued max_requeues times, in which
+        case it is marked done.
+
+        Arguments:
+            updated_before -- datetime, batches claimed earlier are stale
+            max_requeues -- most times a callback is queued again
+
+        Returns:
+            dict of "requeued" and "failed" lists of queue entries
+        """
+        stale = {
+            "status": config.ValidationBatchStatus.BATCHED.value,
+            "updated": {"$lt": updated_before},
+        }
+        reaped = {"requeued": [], "failed": []}
+        while True:
+            entry = self.validation_queue_collection.find_one_and_update(
+                {**stale, "requeues": {"$gte": max_requeues}},
+                {
+                    "$set": {
+                        "status": config.ValidationBatchStatus.DONE.value,
+                        "updated": datetime.now(),
+                    }
+                },
+                projection={"_id": 0},
+            )
+            if entry is None:
+                break
+            reaped["failed"].append(entry)
+        while True:
+            entry = self.validation_queue_collection.find_one_and_update(
+                {**stale, "requeues": {"$not": {"$gte": max_requeues}}},
+                {
+                    "$set": {
+                        "status": config.ValidationBatchStatus.QUEUED.value,
+                        "batch_id": None,
+                        "updated": datetime.now(),
+                    },
+                    "$inc": {"requeues": 1},
+                },
+                projection={"_id": 0},
+            )
+            if entry is None:
+                break
+            reaped["requeued"].append(entry)
+        return reaped
+
+    def finish_validation_batch(self, batch_id) -> None:
+        self.validation_queue_collection.update_many(
+            {"batch_id": batch_id},
+            {
+                "$set": {
+                    "status": config.ValidationBatchStatus.DONE.value,
+                    "updated": datetime.now(),
+                }
+            },
+        )
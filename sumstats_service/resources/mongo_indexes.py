@@ -0,0 +1,212 @@
+"""Declarative index definitions for the service collections.
+
+Indexes are created with ensure_indexes(), which only creates the ones that
+are missing so it is safe to call from every process. It runs when a celery
+worker starts and from the command line, before the web app is started:
+
+    python -m sumstats_service.resources.mongo_indexes
+collscan_queries() explains the hot queries and reports any that would fall
+back to a collection scan.
+"""
+
+import logging
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from sumstats_service import config
+from sumstats_service.resources.mongo_client import MongoClient, get_mongo_client
+
+logger = logging.getLogger(__name__)
+
+
+INDEXES = {
+    "sumstats-study-meta": [
+        IndexModel([("studyID", ASCENDING)], name="studyID_1"),
+        IndexModel([("callbackID", ASCENDING)], name="callbackID_1"),
+        IndexModel([("gcst", ASCENDING), ("_id", DESCENDING)], name="gcst_1__id_-1"),
+    ],
+    "sumstats-errors": [
+        IndexModel([("id", ASCENDING)], name="id_1"),
+    ],
+    "sumstats-callback-tracking": [
+        IndexModel([("callbackID", ASCENDING)], name="callbackID_1"),
+    ],
+    "sumstats-metadata-yaml": [
+        IndexModel(
+            [("gcst_id", ASCENDING), ("is_harmonised", ASCENDING)],
+            name="gcst_id_1_is_harmonised_1",
+        ),
+    ],
+    "sumstats-validation-payload": [
+        IndexModel([("callback_id", ASCENDING)], name="callback_id_1"),
+    ],
+    "studies": [
+        IndexModel([("accession", ASCENDING)], name="accession_1"),
+    ],
+    "sumstats-jobs": [
+        IndexModel([("job_id", ASCENDING)], name="job_id_1", unique=True),
+    ],
+    "sumstats-ftp-index": [
+        IndexModel([("gcst_id", ASCENDING)], name="gcst_id_1", unique=True),
+        IndexModel([("bucket", ASCENDING)], name="bucket_1"),
+    ],
+    "sumstats-globus-transfer-events": [
+        IndexModel(
+            [("task_id", ASCENDING), ("destination_path", ASCENDING)],
+            name="task_id_1_destination_path_1",
+            unique=True,
+        ),
+        IndexModel(
+            [("path_parts", ASCENDING), ("filename", ASCENDING)],
+            name="path_parts_1_filename_1",
+        ),
+    ],
+    "sumstats-globus-collections": [
+        IndexModel([("uid", ASCENDING)], name="uid_1", unique=True),
+    ],
+    "sumstats-globus-warm-pool": [
+        IndexModel([("token", ASCENDING)], name="token_1", unique=True),
+        # pool slots, see MongoClient.reserve_warm_collections
+        IndexModel([("slot", ASCENDING)], name="slot_1", unique=True, sparse=True),
+        IndexModel(
+            [("status", ASCENDING), ("created", ASCENDING)], name="status_1_created_1"
+        ),
+    ],
+    "sumstats-validation-queue": [
+        IndexModel(
+            [("status", ASCENDING), ("queued", ASCENDING)], name="status_1_queued_1"
+        ),
+        IndexModel([("batch_id", ASCENDING)], name="batch_id_1"),
+    ],
+    "sumstats-sync-state": [
+        IndexModel([("name", ASCENDING)], name="name_1", unique=True),
+    ],
+    "sumstats-md5-cache": [
+        IndexModel([("path", ASCENDING)], name="path_1", unique=True),
+        IndexModel(
+            [("last_used", ASCENDING)],
+            name="last_used_1",
+            expireAfterSeconds=config.MD5_CACHE_TTL_DAYS * 24 * 60 * 60,
+        ),
+    ],
+}
+
+
+# (collection, filter, sort) for the queries the service runs most often.
+HOT_QUERIES = [
+    ("sumstats-study-meta", {"studyID": "x"}, None),
+    ("sumstats-study-meta", {"callbackID": "x"}, None),
+    ("sumstats-study-meta", {"gcst": "x"}, [("_id", DESCENDING)]),
+    ("sumstats-errors", {"id": 1}, None),
+    ("sumstats-callback-tracking", {"callbackID": "x"}, None),
+    ("sumstats-metadata-yaml", {"gcst_id": "x", "is_harmonised": False}, None),
+    ("sumstats-metadata-yaml", {"gcst_id": "x"}, None),
+    ("sumstats-validation-payload", {"callback_id": "x"}, None),
+    ("studies", {"accession": "x"}, None),
+    ("sumstats-jobs", {"job_id": "x"}, None),
+    ("sumstats-ftp-index", {"gcst_id": "x"}, None),
+    ("sumstats-ftp-index", {"bucket": "x"}, None),
+    ("sumstats-globus-transfer-events", {"path_parts": "x", "filename": "x"}, None),
+    ("sumstats-sync-state", {"name": "x"}, None),
+    ("sumstats-globus-collections", {"uid": "x", "deleted": None}, None),
+    ("sumstats-globus-warm-pool", {"status": "x"}, [("created", ASCENDING)]),
+    ("sumstats-validation-queue", {"status": "x"}, [("queued", ASCENDING)]),
+    ("sumstats-validation-queue", {"batch_id": "x"}, None),
+    ("sumstats-md5-cache", {"path": "x", "inode": 1, "size": 1, "mtime_ns": 1}, None),
+]
+
+
+# index options that make two indexes with the same name differ
+INDEX_OPTIONS = ["unique", "sparse", "expireAfterSeconds", "partialFilterExpression"]
+
+
+def _same_index(declared: dict, existing: dict) -> bool:
+    """Whether an existing index, from index_information(), matches a
+    declared IndexModel document in keys and options
+    """
+    if list(declared["key"].items()) != [tuple(k) for k in existing["key"]]:
+        return False
+    return all(declared.get(opt) == existing.get(opt) for opt in INDEX_OPTIONS)
+
+
+def missing_indexes(mdb: MongoClient = None) -> dict:
+    """Find the declared indexes that do not exist yet, or that exist with
+    other keys or options. Creating the latter fails with a conflict, which
+    is then reported instead of being ignored.
+
+    Keyword Arguments:
+        mdb -- mongo client (default: {shared client})
+
+    Returns:
+        dict of collection name to list of missing IndexModels
+    """
+    mdb = mdb if mdb else get_mongo_client()
+    missing = {}
+    for collection_name, indexes in INDEXES.items():
+        existing = mdb.database[collection_name].index_information()
+        absent = [
+            i
+            for i in indexes
+            if i.document["name"] not in existing
+            or not _same_index(i.document, existing[i.document["name"]])
+        ]
+        if absent:
+            missing[collection_name] = absent
+    return missing
+
+
+def ensure_indexes(mdb: MongoClient = None) -> list:
+    """Create any declared indexes that are missing. Idempotent.
+
+    Keyword Arguments:
+        mdb -- mongo client (default: {shared client})
+
+    Returns:
+        list of "collection.index" names that were created
+    """
+    mdb = mdb if mdb else get_mongo_client()
+    created = []
+    for collection_name, indexes in missing_indexes(mdb).items():
+        names = mdb.database[collection_name].create_indexes(indexes)
+        created.extend(f"{collection_name}.{name}" for name in names)
+    if created:
+        logger.info(f"Created mongo indexes: {created}")
+    return created
+
+
+def _plan_stages(plan: dict):
+    yield plan.get("stage")
+    if "inputStage" in plan:
+        yield from _plan_stages(plan["inputStage"])
+    for stage in plan.get("inputStages", []):
+        yield from _plan_stages(stage)
+    # SBE plans nest the classic plan under queryPlan
+    if "queryPlan" in plan:
+        yield from _plan_stages(plan["queryPlan"])
+
+
+def collscan_queries(mdb: MongoClient = None) -> list:
+    """Explain every hot query and return the ones whose winning
+    plan is a collection scan.
+
+    Keyword Arguments:
+        mdb -- mongo client (default: {shared client})
+
+    Returns:
+        list of (collection, filter) tuples
+    """
+    mdb = mdb if mdb else get_mongo_client()
+    collscans = []
+    for collection_name, query, sort in HOT_QUERIES:
+        cursor = mdb.database[collection_name].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        winning_plan = cursor.explain()["queryPlanner"]["winningPlan"]
+        if "COLLSCAN" in _plan_stages(winning_plan):
+            collscans.append((collection_name, query))
+    return collscans
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(ensure_indexes())
@@ -1,10 +1,12 @@
+from collections import Counter
+
 import shortuuid
 
 import sumstats_service.resources.file_handler as fh
 import sumstats_service.resources.study_service as st
 from sumstats_service import config
 from sumstats_service.resources.error_classes import BadUserRequest, RequestedNotFound
-from sumstats_service.resources.mongo_client import MongoClient
+from sumstats_service.resources.mongo_client import MongoClient, get_mongo_client
 
 
 class Payload:
@@ -18,14 +20,12 @@ class Payload:
         self.file_type = file_type
 
     def _mongo_client(self) -> MongoClient:
-        """Return a mongo db client
+        """Return the shared mongo db client
 
         Returns:
             MongoClient
         """
-        return MongoClient(
-            config.MONGO_URI, config.MONGO_USER, config.MONGO_PASSWORD, config.MONGO_DB
-        )
+        return get_mongo_client()
 
     def payload_to_db(self, file_type=None):
         if self.check_basic_content_present() is True:
@@ -175,30 +175,41 @@ class Payload:
         return True
 
     def check_study_ids_valid(self):
+        """Check all study IDs in one pass, reporting every invalid,
+        already registered and duplicated ID.
+
+        Returns:
+            True if all study IDs are valid
+        """
+        valid = True
+        id_counts = Counter(study.study_id for study in self.study_obj_list)
+        well_formed_ids = {}
         for study in self.study_obj_list:
             if not study.valid_study_id():
                 self.metadata_errors.append(
                     "Study ID: {} is invalid".format(study.study_id)
                 )
-                # raise BadUserRequest("Study ID: {} is invalid".format(study.study_id))
-                return False
-            if study.study_id_exists_in_db():
+                valid = False
+            else:
+                well_formed_ids.setdefault(study.study_id)
+
+        existing_ids = self._mongo_client().get_existing_study_ids(well_formed_ids)
+        for study_id in well_formed_ids:
+            if study_id in existing_ids:
                 self.metadata_errors.append(
-                    "Study ID: {} exists already".format(study.study_id)
+                    "Study ID: {} exists already".format(study_id)
                 )
-                # raise BadUserRequest("Study ID: {} exists already"
-                # .format(study.study_id))
-                return False
-            if study.study_id not in self.study_ids:
-                self.study_ids.append(study.study_id)
-            else:
+                valid = False
+
+        for study_id, count in id_counts.items():
+            if count > 1:
                 self.metadata_errors.append(
-                    "Study ID: {} duplicated in payload".format(study.study_id)
+                    "Study ID: {} duplicated in payload".format(study_id)
                 )
-                # raise BadUserRequest("Study ID: {} duplicated in payload"
-                # .format(study.study_id))
-                return False
-        return True
+                valid = False
+
+        self.study_ids = list(id_counts)
+        return valid
 
     def generate_callback_id(self):
         randid = shortuuid.uuid()[:8]
@@ -222,17 +233,24 @@ class Payload:
             study.store_validation_statuses()
 
     def create_entry_for_studies(self):
-        for study in self.study_obj_list:
-            study.create_entry_for_study()
+        """Register all studies of the payload in bulk.
+        Failures are added to the metadata errors.
+
+        Returns:
+            True if all studies were registered
+        """
+        result = self._mongo_client().insert_new_studies(
+            [study.entry_data() for study in self.study_obj_list],
+            batch_size=config.MONGO_INSERT_BATCH_SIZE,
+        )
+        for study_id in result["failed"]:
+            self.metadata_errors.append(
+                "Study ID: {} could not be registered".format(study_id)
+            )
+        return not result["failed"]
 
     def reset_validation_status(self) -> None:
-        mdb = self._mongo_client()
-        data = mdb.get_data_from_callback_id(self.callback_id)
-        for i in data:
-            i["retrieved"] = None
-            i["dataValid"] = None
-            i["errorCode"] = None
-            mdb.study_collection.replace_one({"_id": i["_id"]}, i)
+        self._mongo_client().reset_validation_status_for_callback_id(self.callback_id)
 
     @staticmethod
     def parse_new_study_json(study_dict):
@@ -0,0 +1,177 @@
+"""Read access to the public FTP tree, over FTP or through a local mount.
+
+The harmonised metadata generation only needs to list directories and get
+md5 checksums under config.FTP_PREFIX. get_remote_tree() returns the backend
+chosen by config.REMOTE_TREE_BACKEND:
+
+- "ftp": FTPTree, through the pooled FTP sessions and the FTP index,
+- "local": LocalTree on config.FTP_MIRROR_PATH, a filesystem mount of
+  FTP_PREFIX, using os.scandir and the local checksum engine. Anything that
+  cannot be read from the mount falls back to FTP.
+
+Paths are always given as FTP paths, e.g.
+/pub/databases/gwas/summary_statistics/GCST000001-GCST001000/GCST000001.
+"""
+
+import logging
+import os
+from abc import ABC, abstractmethod
+
+from sumstats_service import config
+from sumstats_service.resources import checksum_cache
+from sumstats_service.resources.ftp_checksums import (
+    MANIFEST_NAMES,
+    ftp_md5_checksums,
+    parse_md5_manifest,
+)
+from sumstats_service.resources.ftp_index import get_ftp_index
+from sumstats_service.resources.ftp_pool import get_ftp_pool
+from sumstats_service.resources.utils import generate_path
+
+logger = logging.getLogger(__name__)
+
+
+class RemoteTree(ABC):
+    """Interface of the remote tree backends"""
+
+    def harmonised_dir(self, gcst_id: str) -> str:
+        return (
+            f"{config.FTP_PREFIX.rstrip('/')}/{generate_path(gcst_id)}"
+            f"/{gcst_id}/harmonised"
+        )
+
+    @abstractmethod
+    def list_directory(self, directory: str) -> dict:
+        """Files of a directory
+
+        Returns:
+            dict of filename to (size, mtime_ns), or to None when unknown
+        """
+
+    @abstractmethod
+    def harmonised_listing(self, gcst_id: str) -> dict:
+        """list_directory() of an accession's harmonised directory,
+        empty if there is none
+        """
+
+    @abstractmethod
+    def md5_checksums(self, directory: str, select=None, listing=None) -> dict:
+        """md5 checksums of the files in a directory, see
+        ftp_checksums.ftp_md5_checksums for select and listing.
+
+        Returns:
+            dict of filename to md5, for the files whose checksum is known
+        """
+
+
+class FTPTree(RemoteTree):
+    def __init__(self, ftp_server: str = None):
+        self.ftp_server = ftp_server or config.FTP_SERVER_EBI
+        self.pool = get_ftp_pool(self.ftp_server)
+
+    def list_directory(self, directory: str) -> dict:
+        return self.pool.list_directory(directory)
+
+    def harmonised_listing(self, gcst_id: str) -> dict:
+        return get_ftp_index().harmonised_listing(gcst_id)
+
+    def md5_checksums(self, directory: str, select=None, listing=None) -> dict:
+        def checksums(ftp):
+            known_listing = listing
+            if not known_listing or (select and not select(known_listing)):
+                known_listing = self.pool.list_directory(directory, ftp=ftp)
+            return ftp_md5_checksums(
+                ftp, self.ftp_server, directory, select=select, listing=known_listing
+            )
+
+        return self.pool.run(checksums)
+
+
+class LocalTree(RemoteTree):
+    def __init__(self, mirror_path: str = None, prefix: str = None):
+        self.mirror_path = mirror_path or config.FTP_MIRROR_PATH
+        self.prefix = (prefix if prefix is not None else config.FTP_PREFIX).rstrip("/")
+
+    def local_path(self, path: str) -> str:
+        """Path on the mount for an FTP path under the prefix"""
+        if path != self.prefix and not path.startswith(self.prefix + "/"):
+            raise ValueError(f"{path} is not under {self.prefix}")
+        return os.path.join(self.mirror_path, path[len(self.prefix) :].lstrip("/"))
+
+    def list_directory(self, directory: str) -> dict:
+        listing = {}
+        with os.scandir(self.local_path(directory)) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    stat = entry.stat()
+                    listing[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        return listing
+
+    def harmonised_listing(self, gcst_id: str) -> dict:
+        try:
+            return self.list_directory(self.harmonised_dir(gcst_id))
+        except FileNotFoundError:
+            return {}
+
+    def md5_checksums(self, directory: str, select=None, listing=None) -> dict:
+        local_dir = self.local_path(directory)
+        # the listing may come from elsewhere, list the mount to be sure
+        names = [n for n in self.list_directory(directory) if not n.startswith(".")]
+        needed = set(names if select is None else select(names)) & set(names)
+
+        checksums = {}
+        for manifest in MANIFEST_NAMES:
+            if manifest in names:
+                with open(os.path.join(local_dir, manifest)) as f:
+                    manifest_checksums = parse_md5_manifest(f.read())
+                checksums = {
+                    n: manifest_checksums[n] for n in names if n in manifest_checksums
+                }
+                break
+
+        for name in names:
+            if name not in checksums:
+                cached = checksum_cache.lookup(
+                    checksum_cache.file_identity(os.path.join(local_dir, name))
+                )
+                if cached:
+                    checksums[name] = cached
+
+        missing = [os.path.join(local_dir, n) for n in sorted(needed - set(checksums))]
+        for path, md5 in checksum_cache.md5_many(missing).items():
+            checksums[os.path.basename(path)] = md5
+        return {name: checksums[name] for name in names if name in checksums}
+
+
+class FallbackTree(RemoteTree):
+    """Read from primary, and from fallback whatever primary cannot read"""
+
+    def __init__(self, primary: RemoteTree, fallback: RemoteTree):
+        self.primary = primary
+        self.fallback = fallback
+
+    def _call(self, method, *args, **kwargs):
+        try:
+            return getattr(self.primary, method)(*args, **kwargs)
+        except (OSError, ValueError) as e:
+            logger.warning(f"{method}{args} failed on the local mirror, using FTP: {e}")
+            return getattr(self.fallback, method)(*args, **kwargs)
+
+    def list_directory(self, directory: str) -> dict:
+        return self._call("list_directory", directory)
+
+    def harmonised_listing(self, gcst_id: str) -> dict:
+        listing = self._call("harmonised_listing", gcst_id)
+        return listing if listing else self.fallback.harmonised_listing(gcst_id)
+
+    def md5_checksums(self, directory: str, select=None, listing=None) -> dict:
+        return self._call("md5_checksums", directory, select=select, listing=listing)
+
+
+def get_remote_tree() -> RemoteTree:
+    """Remote tree backend chosen by config.REMOTE_TREE_BACKEND"""
+    if config.REMOTE_TREE_BACKEND == "local":
+        if config.FTP_MIRROR_PATH and os.path.isdir(config.FTP_MIRROR_PATH):
+            return FallbackTree(LocalTree(), FTPTree())
+        logger.warning(f"FTP mirror {config.FTP_MIRROR_PATH} is not mounted, using FTP")
+    return FTPTree()
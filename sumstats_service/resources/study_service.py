@@ -3,7 +3,8 @@ import re
 import sumstats_service.resources.api_utils as au
 import sumstats_service.resources.file_handler as fh
 from sumstats_service import config
-from sumstats_service.resources.mongo_client import MongoClient
+from sumstats_service.resources import error_catalogue
+from sumstats_service.resources.mongo_client import get_mongo_client
 
 
 class Study:
@@ -90,50 +91,46 @@ class Study:
         self.error_code = error_code
 
     def remove(self):
-        mdb = MongoClient(
-            config.MONGO_URI, config.MONGO_USER, config.MONGO_PASSWORD, config.MONGO_DB
-        )
+        mdb = get_mongo_client()
         mdb.delete_study_entry(self.study_id)
 
     def store_validation_statuses(self, is_force_valid=False):
-        self.store_study_metadata()
-        # self.store_retrieved_status()
-        # self.store_data_valid_status()
-        # self.store_error_code()
+        fields = self.validation_status_fields(is_force_valid=is_force_valid)
+        return get_mongo_client().update_study_fields(self.study_id, fields)
+
+    def validation_status_fields(self, is_force_valid=False) -> dict:
+        fields = {
+            "retrieved": self.retrieved,
+            "dataValid": self.data_valid,
+            "errorCode": self.error_code,
+        }
         if is_force_valid:
-            self.update_file_type()
+            fields["fileType"] = au.determine_file_type(
+                is_in_file=True, is_force_valid=True
+            )
+        return fields
 
     def store_retrieved_status(self):
-        mdb = MongoClient(
-            config.MONGO_URI, config.MONGO_USER, config.MONGO_PASSWORD, config.MONGO_DB
-        )
+        mdb = get_mongo_client()
         mdb.update_retrieved_status(self.study_id, self.retrieved)
 
     def store_data_valid_status(self):
-        mdb = MongoClient(
-            config.MONGO_URI, config.MONGO_USER, config.MONGO_PASSWORD, config.MONGO_DB
-        )
+        mdb = get_mongo_client()
         mdb.update_data_valid_status(self.study_id, self.data_valid)
 
     def store_error_code(self):
         # error codes are in the error table (see the DB_SCHEMA)
-        mdb = MongoClient(
-            config.MONGO_URI, config.MONGO_USER, config.MONGO_PASSWORD, config.MONGO_DB
-        )
+        mdb = get_mongo_client()
         mdb.update_error_code(self.study_id, self.error_code)
 
     def update_file_type(self):
-        mdb = MongoClient(
-            config.MONGO_URI, config.MONGO_USER, config.MONGO_PASSWORD, config.MONGO_DB
-        )
+        mdb = get_mongo_client()
         mdb.update_file_type_by_study_id(
             self.study_id, au.determine_file_type(is_in_file=True, is_force_valid=True)
         )
 
     def store_publication_details(self):
-        mdb = MongoClient(
-            config.MONGO_URI, config.MONGO_USER, config.MONGO_PASSWORD, config.MONGO_DB
-        )
+        mdb = get_mongo_client()
         mdb.update_publication_details(
             self.study_id, self.author_name, self.pmid, self.gcst
         )
@@ -143,17 +140,11 @@ class Study:
         return self.md5.isalnum()
 
     def study_id_exists_in_db(self):
-        if self.get_study_from_db():
-            return True
-        return False
+        mdb = get_mongo_client()
+        return self.study_id in mdb.get_existing_study_ids([self.study_id])
 
     def get_study_from_db(self):
-        mdb = MongoClient(
-            config.MONGO_URI,
-            config.MONGO_USER,
-            config.MONGO_PASSWORD,
-            config.MONGO_DB,
-        )
+        mdb = get_mongo_client()
         study_metadata = mdb.get_study_metadata(self.study_id)
 
         if study_metadata:
@@ -176,19 +167,15 @@ class Study:
         return study_metadata
 
     def set_error_text(self):
-        mdb = MongoClient(
-            config.MONGO_URI, config.MONGO_USER, config.MONGO_PASSWORD, config.MONGO_DB
-        )
-
         if self.error_code:
-            self.error_text = mdb.get_error_message_from_code(self.error_code)
-            # We may want a catch if the code is not seen in the database
+            # served from the process-local catalogue, no db round-trip
+            self.error_text = error_catalogue.get_error_text(self.error_code)
         else:
             self.error_text = None
 
-    def create_entry_for_study(self):
-        # Order here matters
-        data = [
+    def entry_data(self) -> list:
+        # Order here matters, see MongoClient.STUDY_FIELDS
+        return [
             self.study_id,
             self.callback_id,
             self.file_path,
@@ -199,13 +186,10 @@ class Study:
             self.raw_ss,
             self.file_type,
         ]
-        mdb = MongoClient(
-            config.MONGO_URI,
-            config.MONGO_USER,
-            config.MONGO_PASSWORD,
-            config.MONGO_DB,
-        )
-        mdb.insert_new_study(data)
+
+    def create_entry_for_study(self):
+        mdb = get_mongo_client()
+        mdb.insert_new_study(self.entry_data())
 
     def valid_assembly(self):
         if self.assembly not in config.VALID_ASSEMBLIES:
@@ -293,16 +277,8 @@ class Study:
         )
         return ssf.move_file_to_staging()
 
-    def bulk_store_validation_statuses(self, operations):
-        mdb = MongoClient(
-            config.MONGO_URI, config.MONGO_USER, config.MONGO_PASSWORD, config.MONGO_DB
-        )
-        mdb.bulk_update_study_metadata(operations)
-
     def store_study_metadata(self):
-        mdb = MongoClient(
-            config.MONGO_URI, config.MONGO_USER, config.MONGO_PASSWORD, config.MONGO_DB
-        )
+        mdb = get_mongo_client()
         mdb.update_study_metadata(
             self.study_id, self.retrieved, self.data_valid, self.error_code
         )
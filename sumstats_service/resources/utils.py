@@ -1,5 +1,7 @@
 import logging
 import smtplib
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 
@@ -65,3 +67,72 @@ def send_mail(
     msg.attach(MIMEText(message, "plain"))
     with smtplib.SMTP(server, port) as server:
         server.send_message(msg)
+
+
+def generate_path(gcst_id):
+    if not gcst_id.startswith("GCST"):
+        raise ValueError("Invalid GCST ID format.")
+
+    # Note that -1 required for edge cases,
+    # e.g., 'GCST90427001-GCST90428000/GCST90428000'
+    num_part = int(gcst_id[4:]) - 1
+
+    lower_bound = (num_part // 1000) * 1000 + 1
+    upper_bound = lower_bound + 999
+    num_digits = len(gcst_id) - 4
+
+    # Do zero-padding accordingly
+    return f"GCST{lower_bound:0{num_digits}d}-GCST{upper_bound:0{num_digits}d}"
+
+
+def run_steps(steps: dict, timings: dict = None, max_workers: int = 4) -> dict:
+    """Run a dependency graph of steps on a thread pool. Each step starts
+    as soon as the steps it depends on have finished.
+
+    Arguments:
+        steps -- dict of step name to (func, [dependency names]). func is
+        called with the dict of results of the steps that finished so far.
+
+    Keyword Arguments:
+        timings -- dict filled with the duration of each step in ms
+        (default: {None})
+        max_workers -- max steps running at once (default: {4})
+
+    Returns:
+        dict of step name to result. The first exception raised by a step is
+        re-raised once the running steps have finished, and steps that have
+        not started by then are skipped.
+    """
+    timings = {} if timings is None else timings
+    results = {}
+    pending = dict(steps)
+
+    def _timed(name, func):
+        start = time.perf_counter()
+        try:
+            return func(results)
+        finally:
+            timings[name] = round((time.perf_counter() - start) * 1000, 1)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        running = {}
+        while pending or running:
+            for name, (func, deps) in list(pending.items()):
+                if all(dep in results for dep in deps):
+                    running[executor.submit(_timed, name, func)] = name
+                    del pending[name]
+            if not running:
+                raise ValueError(f"Unresolvable step dependencies: {list(pending)}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                if future.exception():
+                    wait(running)
+                    raise future.exception()
+                results[name] = future.result()
+    return results
+
+
+def server_timing(timings: dict) -> str:
+    """Server-Timing header value for a dict of step name to ms"""
+    return ", ".join(f"{name};dur={dur}" for name, dur in timings.items())
@@ -42,6 +42,38 @@ def validate_study(
     forcevalid=False,
     zero_p_values=False,
 ):
+    study = run_validation(
+        callback_id,
+        study_id,
+        filepath,
+        md5,
+        assembly,
+        readme,
+        entryUUID,
+        minrows=minrows,
+        forcevalid=forcevalid,
+        zero_p_values=zero_p_values,
+    )
+    write_result(study, out)
+    if study.data_valid != 1:
+        sys.exit(1)
+    else:
+        sys.exit(0)
+
+
+def run_validation(
+    callback_id,
+    study_id,
+    filepath,
+    md5,
+    assembly,
+    readme,
+    entryUUID,
+    minrows=None,
+    forcevalid=False,
+    zero_p_values=False,
+) -> "st.Study":
+    """Validate a retrieved study file, returns the study with its statuses"""
     logger.info("validating study data")
     study = st.Study(
         callback_id=callback_id,
@@ -57,16 +89,24 @@ def validate_study(
         forcevalid=forcevalid,
         zero_p_values=zero_p_values,
     )
-    write_result(study, out)
-    if study.data_valid != 1:
-        sys.exit(1)
-    else:
-        sys.exit(0)
+    return study
 
 
 def copy_file_for_validation(
     callback_id, study_id, filepath, entryUUID, md5, assembly, out=None
 ):
+    study = run_copy(callback_id, study_id, filepath, entryUUID, md5, assembly)
+    if study.retrieved != 1:
+        write_result(study, out)
+        sys.exit(1)
+    else:
+        sys.exit(0)
+
+
+def run_copy(callback_id, study_id, filepath, entryUUID, md5, assembly) -> "st.Study":
+    """Copy a submitted file to the storage path, returns the study
+    with its retrieved status
+    """
     study = st.Study(
         callback_id=callback_id,
         study_id=study_id,
@@ -76,11 +116,7 @@ def copy_file_for_validation(
         assembly=assembly,
     )
     study.retrieve_study_file()
-    if study.retrieved != 1:
-        write_result(study, out)
-        sys.exit(1)
-    else:
-        sys.exit(0)
+    return study
 
 
 def write_result(study, out):
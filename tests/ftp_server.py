@@ -0,0 +1,37 @@
+import threading
+
+from pyftpdlib.authorizers import DummyAuthorizer
+from pyftpdlib.handlers import FTPHandler
+from pyftpdlib.servers import FTPServer
+
+
+class LocalFTPServer:
+    """Anonymous pyftpdlib server serving root on a free local port,
+    run in a background thread."""
+
+    def __init__(self, root):
+        authorizer = DummyAuthorizer()
+        authorizer.add_anonymous(root)
+        handler = type("Handler", (FTPHandler,), {"authorizer": authorizer})
+        self.server = FTPServer(("127.0.0.1", 0), handler)
+        self.host, self.port = self.server.socket.getsockname()[:2]
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, kwargs={"timeout": 0.1}
+        )
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def drop_connections(self):
+        """Close all client connections but keep listening"""
+        ioloop = self.server.ioloop
+        for conn in list(ioloop.socket_map.values()):
+            if conn is not self.server:
+                ioloop.call_later(0, conn.close)
+
+    def stop(self):
+        # close from the serve thread, closing the sockets under its poll
+        # raises EBADF there
+        self.server.ioloop.call_later(0, self.server.close_all)
+        self.thread.join()
@@ -1,6 +1,7 @@
 import json
 import os
 import unittest
+from unittest import mock
 
 from pymongo import MongoClient
 
@@ -61,6 +62,14 @@ class TestAPIUtils(unittest.TestCase):
         results = json.loads(result_json)
         self.assertEqual(results["validationList"][0]["id"], self.sid)
 
+    def test_is_sorted_from_given_listing(self):
+        with mock.patch.object(au, "get_remote_tree") as get_remote_tree:
+            self.assertTrue(au.get_is_sorted("GCST1", {"a.tsv.gz": {}, "a.tbi": {}}))
+            self.assertFalse(au.get_is_sorted("GCST1", {"a.tsv.gz": {}}))
+            get_remote_tree.assert_not_called()
+            get_remote_tree.return_value.harmonised_listing.return_value = {"a.tbi": {}}
+            self.assertTrue(au.get_is_sorted("GCST1"))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,9 +1,13 @@
 import os
+from unittest import mock
 
 from pymongo import MongoClient
 
+import sumstats_service.resources.api_endpoints as endpoints
+import sumstats_service.resources.api_utils as au
 from sumstats_service import config
 from sumstats_service.app import app, celery
+from sumstats_service.resources.mongo_client import get_mongo_client
 
 
 class TestAPP:
@@ -109,6 +113,74 @@ class TestAPP:
         assert response.status_code == 200
         assert "duplicated" in response.get_json()["metadataErrors"][0]
 
+    def test_get_job_status(self):
+        tester = app.test_client(self)
+        mdb = get_mongo_client()
+        mdb.create_job("job1234", "publish", callback_id="abc", items=["GCST1"])
+        response = tester.get("/v1/sum-stats/jobs/job1234")
+        assert response.status_code == 200
+        assert response.get_json()["status"] == "pending"
+        mdb.record_job_item_result("job1234", "GCST1", True)
+        response = tester.get("/v1/sum-stats/jobs/job1234")
+        assert response.get_json()["status"] == "completed"
+        assert response.get_json()["items"]["GCST1"]["status"] == "completed"
+        response = tester.get("/v1/sum-stats/jobs/NOTINDB")
+        assert response.status_code == 404
+
+    def test_publish_job_records_failed_conversion(self):
+        tester = app.test_client(self)
+
+        def convert(gcst_id, *args):
+            if gcst_id == "GCST2":
+                raise ValueError("no metadata")
+            return True
+
+        studies = {"studyList": [{"gcst": "GCST1"}, {"gcst": "GCST2"}]}
+        with mock.patch.object(
+            endpoints, "update_sumstats", return_value=studies
+        ), mock.patch.object(
+            au, "move_files_to_staging", return_value={"globus_endpoint_id": None}
+        ), mock.patch.object(
+            au, "save_convert_metadata_to_yaml", side_effect=convert
+        ):
+            response = tester.put("/v1/sum-stats/abc", json={"studyList": []})
+        assert response.status_code == 202
+        job_id = response.get_json()["jobID"]
+        response = tester.get(f"/v1/sum-stats/jobs/{job_id}")
+        job = response.get_json()
+        assert job["status"] == "failed"
+        assert job["items"]["GCST1"]["status"] == "completed"
+        assert job["items"]["GCST2"]["status"] == "failed"
+
+    def test_publish_job_without_studies_completes(self):
+        tester = app.test_client(self)
+        with mock.patch.object(
+            endpoints, "update_sumstats", return_value={"studyList": []}
+        ), mock.patch.object(
+            au, "move_files_to_staging", return_value={"globus_endpoint_id": None}
+        ):
+            response = tester.put("/v1/sum-stats/abc", json={"studyList": []})
+        assert response.status_code == 202
+        job_id = response.get_json()["jobID"]
+        response = tester.get(f"/v1/sum-stats/jobs/{job_id}")
+        assert response.get_json()["status"] == "completed"
+
+    def test_publish_job_counts_duplicate_studies_once(self):
+        tester = app.test_client(self)
+        studies = {"studyList": [{"gcst": "GCST1"}, {"gcst": "GCST1"}]}
+        with mock.patch.object(
+            endpoints, "update_sumstats", return_value=studies
+        ), mock.patch.object(
+            au, "move_files_to_staging", return_value={"globus_endpoint_id": None}
+        ), mock.patch.object(
+            au, "save_convert_metadata_to_yaml", return_value=True
+        ) as convert:
+            response = tester.put("/v1/sum-stats/abc", json={"studyList": []})
+        assert convert.call_count == 1
+        job_id = response.get_json()["jobID"]
+        response = tester.get(f"/v1/sum-stats/jobs/{job_id}")
+        assert response.get_json()["status"] == "completed"
+
     def test_bad_callback_id(self):
         tester = app.test_client(self)
         callback_id = "NOTINDB"
@@ -0,0 +1,54 @@
+import os
+import shutil
+import unittest
+from unittest import mock
+
+from pymongo import MongoClient
+
+import sumstats_service.resources.checksum_cache as cc
+from sumstats_service import config
+from sumstats_service.resources.mongo_client import get_mongo_client
+
+
+class TestChecksumCache(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = "./tests/data_md5"
+        os.makedirs(self.test_dir, exist_ok=True)
+        self.file = os.path.join(self.test_dir, "file.tsv")
+        with open(self.file, "w") as f:
+            f.write("a\tb\n1\t2\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+        mongo_uri = os.getenv("MONGO_URI", config.MONGO_URI)
+        mongo_user = os.getenv("MONGO_USER", None)
+        mongo_password = os.getenv("MONGO_PASSWORD", None)
+        mongo_db = os.getenv("MONGO_DB", config.MONGO_DB)
+
+        client = MongoClient(mongo_uri, username=mongo_user, password=mongo_password)
+        client.drop_database(mongo_db)
+
+    def test_md5_is_cached_by_identity(self):
+        self.assertEqual(cc.md5(self.file), cc.hash_file(self.file))
+        with mock.patch.object(cc, "hash_file") as hash_file:
+            cc.md5(self.file)
+            hash_file.assert_not_called()
+        self.assertEqual(get_mongo_client().md5_cache_collection.count_documents({}), 1)
+
+    def test_changed_file_is_rehashed(self):
+        cc.md5(self.file)
+        with open(self.file, "a") as f:
+            f.write("3\t4\n")
+        self.assertEqual(cc.md5(self.file), cc.hash_file(self.file))
+        # the stale entry for the path is replaced
+        self.assertEqual(get_mongo_client().md5_cache_collection.count_documents({}), 1)
+
+    def test_record_and_evict(self):
+        cc.record(self.file, "recorded")
+        self.assertEqual(cc.md5(self.file), "recorded")
+        self.assertEqual(cc.evict([self.file]), 1)
+        self.assertEqual(cc.md5(self.file), cc.hash_file(self.file))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import unittest
+
+from pymongo import MongoClient
+
+import sumstats_service.resources.error_catalogue as ec
+from sumstats_service import config
+from sumstats_service.resources.mongo_client import close_all_clients, get_mongo_client
+
+
+class TestErrorCatalogue(unittest.TestCase):
+    def setUp(self):
+        # a client closed or a catalogue loaded by an earlier test must not
+        # leak in, and the tests seed the error collection from empty
+        close_all_clients()
+        ec.invalidate()
+        get_mongo_client().error_collection.delete_many({})
+        self.catalogue = ec.ErrorCatalogue()
+
+    def tearDown(self):
+        mongo_uri = os.getenv("MONGO_URI", config.MONGO_URI)
+        mongo_user = os.getenv("MONGO_USER", None)
+        mongo_password = os.getenv("MONGO_PASSWORD", None)
+        mongo_db = os.getenv("MONGO_DB", config.MONGO_DB)
+
+        client = MongoClient(mongo_uri, username=mongo_user, password=mongo_password)
+        client.drop_database(mongo_db)
+
+    def test_seeds_from_config_when_collection_empty(self):
+        self.assertEqual(
+            self.catalogue.get_text(1), "The summary statistics file cannot be found"
+        )
+        self.assertEqual(self.catalogue.source, "config")
+        mdb = get_mongo_client()
+        self.assertEqual(
+            mdb.error_collection.count_documents({}), len(config.VALIDATION_ERRORS)
+        )
+
+    def test_loads_once_until_invalidated(self):
+        self.catalogue.get_text(1)
+        get_mongo_client().error_collection.update_one(
+            {"id": 1}, {"$set": {"errorText": "changed"}}
+        )
+        self.assertNotEqual(self.catalogue.get_text(1), "changed")
+        self.assertEqual(self.catalogue.version, 1)
+        self.catalogue.invalidate()
+        self.assertEqual(self.catalogue.get_text(1), "changed")
+        self.assertEqual(self.catalogue.source, "mongo")
+        self.assertEqual(self.catalogue.version, 2)
+
+    def test_unknown_code(self):
+        self.assertIsNone(self.catalogue.get_text(999))
+
+
+if __name__ == "__main__":
+    unittest.main()
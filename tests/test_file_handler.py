@@ -56,6 +56,30 @@ class TestSumStatsFile(unittest.TestCase):
         md5_ok = ssf.md5_ok()
         self.assertTrue(md5_ok)
 
+    def test_retrieve_records_ingest_facts(self):
+        ssf = fh.SumStatFile(file_path=self.valid_file, callback_id=self.cid,
+                study_id=self.sid, md5exp=self.valid_file_md5, entryUUID=self.entryUUID)
+        ssf.retrieve()
+        self.assertTrue(ssf.store_path.endswith(".tsv"))
+        self.assertEqual(ssf.md5, self.valid_file_md5)
+        self.assertFalse(ssf.is_gzip)
+        self.assertEqual(ssf.delimiter, "\t")
+        # a fresh instance, as in a separate validation step, reuses the facts
+        other = fh.SumStatFile(file_path=self.valid_file, callback_id=self.cid,
+                study_id=self.sid, md5exp=self.valid_file_md5, entryUUID=self.entryUUID)
+        other.glob_store_path()
+        self.assertTrue(other.load_ingest_facts())
+        self.assertEqual(other.md5, self.valid_file_md5)
+
+    def test_ingest_file_gzip(self):
+        source = os.path.join(config.DEPO_PATH, self.entryUUID, "test_sumstats_file.gz")
+        dest = os.path.join(self.test_storepath, "ingested")
+        facts = fh.ingest_file(source, dest, chunk_size=64)
+        self.assertTrue(facts["is_gzip"])
+        self.assertEqual(facts["delimiter"], "\t")
+        self.assertEqual(facts["md5"], fh.md5_check(source))
+        self.assertEqual(facts["size"], os.path.getsize(dest))
+
     def test_validate_true_when_valid(self):        
         ssf = fh.SumStatFile(file_path=self.valid_file, callback_id=self.cid,
                 study_id=self.sid, md5exp=self.valid_file_md5, minrows=9, entryUUID=self.entryUUID)
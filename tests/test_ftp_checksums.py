@@ -0,0 +1,88 @@
+import hashlib
+import os
+import shutil
+import unittest
+from ftplib import FTP
+from unittest import mock
+
+import sumstats_service.resources.ftp_checksums as fc
+from sumstats_service import config
+from tests.ftp_server import LocalFTPServer
+
+
+class TestFTPChecksums(unittest.TestCase):
+    def setUp(self):
+        # fixture files are rewritten within mtime resolution of the
+        # listing, so a persistent cache would serve stale checksums
+        patch = mock.patch.object(config, "MD5_CACHE_ENABLED", False)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.ftp_root = os.path.abspath("./tests/data_ftp")
+        self.hm_dir = os.path.join(self.ftp_root, "GCST000001", "harmonised")
+        os.makedirs(self.hm_dir, exist_ok=True)
+        self.data_file = "GCST000001.h.tsv.gz"
+        self.contents = {
+            self.data_file: b"data" * 1000,
+            "GCST000001.h.tsv.gz.tbi": b"x",
+        }
+        for name, content in self.contents.items():
+            with open(os.path.join(self.hm_dir, name), "wb") as f:
+                f.write(content)
+
+        self.server = LocalFTPServer(self.ftp_root).start()
+        self.ftp = FTP()
+        self.ftp.connect(self.server.host, self.server.port)
+        self.ftp.login()
+
+    def tearDown(self):
+        self.ftp.close()
+        self.server.stop()
+        shutil.rmtree(self.ftp_root)
+
+    def md5(self, name):
+        return hashlib.md5(self.contents[name]).hexdigest()
+
+    def checksums(self, select=None):
+        return fc.ftp_md5_checksums(
+            self.ftp, "localhost", "/GCST000001/harmonised", select=select
+        )
+
+    def test_parse_md5_manifest(self):
+        text = f"{'a' * 32}  ./one.tsv\n{'B' * 32} *two.tsv\nnot a checksum line\n"
+        self.assertEqual(
+            fc.parse_md5_manifest(text), {"one.tsv": "a" * 32, "two.tsv": "b" * 32}
+        )
+
+    def test_manifest_is_used_without_downloading(self):
+        with open(os.path.join(self.hm_dir, "md5sum.txt"), "w") as f:
+            f.write(f"{'a' * 32} {self.data_file}\n")
+        with mock.patch.object(fc, "stream_md5") as stream_md5:
+            result = self.checksums(select=lambda names: [self.data_file])
+            stream_md5.assert_not_called()
+        self.assertEqual(result, {self.data_file: "a" * 32})
+
+    def test_only_selected_files_are_streamed(self):
+        with mock.patch.object(fc, "stream_md5", wraps=fc.stream_md5) as stream_md5:
+            result = self.checksums(select=lambda names: [self.data_file])
+            stream_md5.assert_called_once()
+        self.assertEqual(result, {self.data_file: self.md5(self.data_file)})
+
+    def test_all_files_streamed_by_default(self):
+        result = self.checksums()
+        self.assertEqual(result, {name: self.md5(name) for name in self.contents})
+
+    def test_cached_checksum_is_used(self):
+        with mock.patch.object(
+            fc.checksum_cache, "lookup", return_value="c" * 32
+        ) as lookup, mock.patch.object(fc, "stream_md5") as stream_md5:
+            result = self.checksums(select=lambda names: [self.data_file])
+            stream_md5.assert_not_called()
+        url, inode, size, mtime_ns = lookup.call_args_list[0].args[0]
+        self.assertTrue(url.startswith("ftp://localhost/GCST000001/harmonised/"))
+        self.assertEqual(inode, 0)
+        self.assertGreater(mtime_ns, 0)
+        self.assertEqual(result[self.data_file], "c" * 32)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import shutil
+import unittest
+from datetime import datetime
+
+from pymongo import MongoClient
+
+import sumstats_service.resources.ftp_index as fi
+from sumstats_service import config
+from sumstats_service.resources.ftp_pool import FTPPool
+from sumstats_service.resources.mongo_client import get_mongo_client
+from tests.ftp_server import LocalFTPServer
+
+
+class TestFTPIndex(unittest.TestCase):
+    def setUp(self):
+        self.ftp_root = os.path.abspath("./tests/data_ftp_index")
+        self.bucket = "GCST000001-GCST001000"
+        self.add_file("GCST000001", "harmonised/GCST000001.h.tsv.gz")
+        self.add_file("GCST000001", "harmonised/GCST000001.h.tsv.gz.tbi")
+        self.add_file("GCST000002", "GCST000002.tsv")
+        self.server = LocalFTPServer(self.ftp_root).start()
+        self.pool = FTPPool(self.server.host, port=self.server.port)
+        self.index = fi.FTPIndex(pool=self.pool, prefix="/")
+
+    def tearDown(self):
+        self.pool.close()
+        self.server.stop()
+        shutil.rmtree(self.ftp_root)
+        mongo_uri = os.getenv("MONGO_URI", config.MONGO_URI)
+        mongo_user = os.getenv("MONGO_USER", None)
+        mongo_password = os.getenv("MONGO_PASSWORD", None)
+        mongo_db = os.getenv("MONGO_DB", config.MONGO_DB)
+
+        client = MongoClient(mongo_uri, username=mongo_user, password=mongo_password)
+        client.drop_database(mongo_db)
+
+    def add_file(self, gcst_id, name):
+        path = os.path.join(self.ftp_root, self.bucket, gcst_id, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write("content")
+
+    def test_crawl_bucket(self):
+        result = self.index.crawl()
+        self.assertEqual(
+            result[self.bucket], {"accessions": 2, "listed": 2, "updated": 2}
+        )
+        entry = get_mongo_client().get_ftp_index_entry("GCST000001")
+        self.assertTrue(entry["harmonised"])
+        self.assertTrue(entry["has_tbi"])
+        self.assertEqual(len(entry["files"]), 2)
+        self.assertFalse(
+            get_mongo_client().get_ftp_index_entry("GCST000002")["harmonised"]
+        )
+
+    def test_crawl_is_incremental(self):
+        self.index.crawl_bucket(self.bucket)
+        result = self.index.crawl_bucket(self.bucket)
+        # only the accession with a harmonised directory is listed again
+        self.assertEqual(result, {"accessions": 2, "listed": 1, "updated": 0})
+        self.add_file("GCST000001", "harmonised/md5sum.txt")
+        result = self.index.crawl_bucket(self.bucket)
+        self.assertEqual(result["updated"], 1)
+
+    def test_lookups_use_index(self):
+        self.index.crawl_bucket(self.bucket)
+        self.pool.stats["connects"] = 0
+        self.pool.close()
+        self.assertTrue(self.index.is_sorted("GCST000001"))
+        self.assertFalse(self.index.is_sorted("GCST000002"))
+        listing = self.index.harmonised_listing("GCST000001")
+        self.assertEqual(listing["GCST000001.h.tsv.gz"][0], len("content"))
+        self.assertEqual(self.pool.stats["connects"], 0)
+
+    def test_old_entries_are_served_from_index(self):
+        self.index.crawl_bucket(self.bucket)
+        get_mongo_client().ftp_index_collection.update_many(
+            {}, {"$set": {"checked": datetime(2000, 1, 1)}}
+        )
+        self.pool.stats["connects"] = 0
+        self.pool.close()
+        self.assertTrue(self.index.is_sorted("GCST000001"))
+        self.assertEqual(self.pool.stats["connects"], 0)
+
+    def test_missing_entry_is_refreshed(self):
+        self.assertTrue(self.index.is_sorted("GCST000001"))
+        self.assertEqual(self.index.harmonised_listing("GCST000003"), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
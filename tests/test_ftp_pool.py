@@ -0,0 +1,85 @@
+import os
+import shutil
+import threading
+import time
+import unittest
+
+import sumstats_service.resources.ftp_pool as fp
+from tests.ftp_server import LocalFTPServer
+
+
+class TestFTPPool(unittest.TestCase):
+    def setUp(self):
+        self.ftp_root = os.path.abspath("./tests/data_ftp_pool")
+        self.directory = "/GCST000001/harmonised"
+        os.makedirs(self.ftp_root + self.directory, exist_ok=True)
+        with open(os.path.join(self.ftp_root + self.directory, "a.tsv.gz"), "w") as f:
+            f.write("a")
+        self.server = LocalFTPServer(self.ftp_root).start()
+        self.pool = fp.FTPPool(
+            self.server.host, port=self.server.port, max_connections=2
+        )
+
+    def tearDown(self):
+        self.pool.close()
+        fp.close_all_pools()
+        self.server.stop()
+        shutil.rmtree(self.ftp_root)
+
+    def test_sessions_are_reused(self):
+        for _ in range(3):
+            self.pool.run(lambda ftp: ftp.pwd())
+        self.assertEqual(self.pool.stats["connects"], 1)
+        self.assertEqual(self.pool.stats["reuses"], 2)
+
+    def test_listing_is_cached(self):
+        first = self.pool.list_directory(self.directory)
+        self.assertIn("a.tsv.gz", first)
+        self.assertEqual(first["a.tsv.gz"][0], 1)
+        self.assertEqual(self.pool.list_directory(self.directory), first)
+        self.assertEqual(self.pool.stats["listing_misses"], 1)
+        self.assertEqual(self.pool.stats["listing_hits"], 1)
+        self.pool.invalidate(self.directory)
+        self.pool.list_directory(self.directory)
+        self.assertEqual(self.pool.stats["listing_misses"], 2)
+
+    def test_concurrent_sessions_are_bounded(self):
+        in_use = []
+        peak = []
+        lock = threading.Lock()
+
+        def work(ftp):
+            with lock:
+                in_use.append(ftp)
+                peak.append(len(in_use))
+            time.sleep(0.05)
+            ftp.pwd()
+            with lock:
+                in_use.remove(ftp)
+
+        threads = [
+            threading.Thread(target=self.pool.run, args=(work,)) for _ in range(5)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(max(peak), 2)
+        self.assertLessEqual(self.pool.stats["connects"], 2)
+
+    def test_reconnects_after_dropped_connection(self):
+        self.pool.keepalive = 0
+        self.pool.run(lambda ftp: ftp.pwd())
+        self.server.drop_connections()
+        time.sleep(0.2)
+        self.assertEqual(self.pool.run(lambda ftp: ftp.pwd()), "/")
+        self.assertEqual(self.pool.stats["connects"], 2)
+        self.assertEqual(self.pool.stats["discarded"], 1)
+
+    def test_get_ftp_pool_is_shared(self):
+        pool = fp.get_ftp_pool(self.server.host, self.server.port)
+        self.assertIs(pool, fp.get_ftp_pool(self.server.host, self.server.port))
+
+
+if __name__ == "__main__":
+    unittest.main()
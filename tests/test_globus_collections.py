@@ -0,0 +1,144 @@
+import os
+import unittest
+from unittest import mock
+
+import requests
+from pymongo import MongoClient
+
+import sumstats_service.resources.globus as globus
+from sumstats_service import config
+from sumstats_service.resources.mongo_client import get_mongo_client
+
+
+class FakeTransferClient:
+    """Transfer client answering endpoint_search from a fixed list"""
+
+    def __init__(self, endpoints):
+        self.endpoints = endpoints
+        self.searches = []
+
+    def endpoint_search(self, filter_fulltext, filter_scope=None):
+        self.searches.append(filter_fulltext)
+        return {
+            "DATA": [e for e in self.endpoints if filter_fulltext in e["display_name"]]
+        }
+
+
+class FakeDeleteClient(FakeTransferClient):
+    """Transfer and GCS client recording delete submissions"""
+
+    def __init__(self, endpoints=(), failing=()):
+        super().__init__(list(endpoints))
+        self.submissions = []
+        self.deleted = []
+        self.failing = failing
+
+    def get_submission_id(self):
+        return {"value": f"sub-{len(self.submissions)}"}
+
+    def submit_delete(self, data):
+        self.submissions.append([item["path"] for item in data["DATA"]])
+        return {"task_id": "task"}
+
+    def delete_collection(self, collection_id):
+        if collection_id in self.failing:
+            response = requests.Response()
+            response.status_code = 409
+            response.request = requests.Request("DELETE", "https://gcs").prepare()
+            raise globus.GlobusAPIError(response)
+        self.deleted.append(collection_id)
+        return mock.Mock(http_status=200)
+
+
+class TestGuestCollectionMapping(unittest.TestCase):
+    def setUp(self):
+        self.mdb = get_mongo_client()
+        self.uid = "abcd1234-0000-0000-0000-000000000000"
+
+    def tearDown(self):
+        mongo_uri = os.getenv("MONGO_URI", config.MONGO_URI)
+        mongo_user = os.getenv("MONGO_USER", None)
+        mongo_password = os.getenv("MONGO_PASSWORD", None)
+        mongo_db = os.getenv("MONGO_DB", config.MONGO_DB)
+
+        client = MongoClient(mongo_uri, username=mongo_user, password=mongo_password)
+        client.drop_database(mongo_db)
+
+    def test_recorded_collection_skips_endpoint_search(self):
+        self.mdb.insert_guest_collection(self.uid, "col-1", "2024-01-01-abcd1234")
+        transfer = FakeTransferClient([])
+        endpoint_id = globus.get_endpoint_id_from_uid(
+            self.uid, transfer_client=transfer
+        )
+        self.assertEqual(endpoint_id, "col-1")
+        self.assertEqual(transfer.searches, [])
+
+    def test_legacy_collection_is_searched_and_recorded(self):
+        transfer = FakeTransferClient(
+            [
+                {"id": "other", "display_name": "2024-01-01-abcd1234-copy"},
+                {"id": "col-2", "display_name": "2024-01-01-abcd1234"},
+            ]
+        )
+        endpoint_id = globus.get_endpoint_id_from_uid(
+            self.uid, transfer_client=transfer
+        )
+        self.assertEqual(endpoint_id, "col-2")
+        self.assertEqual(self.mdb.get_guest_collection_id(self.uid), "col-2")
+        globus.get_endpoint_id_from_uid(self.uid, transfer_client=transfer)
+        self.assertEqual(len(transfer.searches), 1)
+
+    def test_deleted_collection_is_not_resolved(self):
+        self.mdb.insert_guest_collection(self.uid, "col-1", "2024-01-01-abcd1234")
+        self.mdb.mark_guest_collection_deleted(self.uid)
+        self.assertIsNone(self.mdb.get_guest_collection_id(self.uid))
+        transfer = FakeTransferClient([])
+        self.assertIsNone(
+            globus.get_endpoint_id_from_uid(self.uid, transfer_client=transfer)
+        )
+
+
+class TestBatchTeardown(unittest.TestCase):
+    def setUp(self):
+        self.mdb = get_mongo_client()
+        self.uids = [f"{i}bcd1234-0000" for i in range(3)]
+        for i, uid in enumerate(self.uids[:2]):
+            self.mdb.insert_guest_collection(uid, f"col-{i}")
+        self.client = FakeDeleteClient(failing=["col-1"])
+        patches = [
+            mock.patch.object(globus, name, return_value=self.client)
+            for name in ["init_transfer_client", "init_gcs_client"]
+        ]
+        patches.append(mock.patch.object(config, "MAPPED_COLLECTION_ID", "mapped"))
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        mongo_uri = os.getenv("MONGO_URI", config.MONGO_URI)
+        mongo_user = os.getenv("MONGO_USER", None)
+        mongo_password = os.getenv("MONGO_PASSWORD", None)
+        mongo_db = os.getenv("MONGO_DB", config.MONGO_DB)
+
+        client = MongoClient(mongo_uri, username=mongo_user, password=mongo_password)
+        client.drop_database(mongo_db)
+
+    def test_paths_are_deleted_in_one_submission(self):
+        outcomes = globus.remove_endpoints_and_all_contents(self.uids, max_workers=2)
+        self.assertEqual(self.client.submissions, [self.uids[:2]])
+        self.assertEqual(self.client.deleted, ["col-0"])
+        self.assertEqual(outcomes[self.uids[0]]["status"], 200)
+        self.assertIsNone(outcomes[self.uids[0]]["error"])
+        self.assertFalse(outcomes[self.uids[1]]["status"])
+        self.assertIsNotNone(outcomes[self.uids[1]]["error"])
+        self.assertEqual(outcomes[self.uids[2]]["error"], "endpoint not found")
+        self.assertIsNone(self.mdb.get_guest_collection_id(self.uids[0]))
+        self.assertEqual(self.mdb.get_guest_collection_id(self.uids[1]), "col-1")
+
+    def test_remove_paths_splits_batches(self):
+        globus.remove_paths(["a", "b", "c"], transfer_client=self.client, batch_size=2)
+        self.assertEqual(self.client.submissions, [["a", "b"], ["c"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+from unittest import mock
+
+import sumstats_service.resources.globus as globus
+from sumstats_service import config
+from sumstats_service.resources.globus_listing import ListingCache, normalise_path
+
+
+class FakeTransferClient:
+    """Transfer client with an in-memory directory tree"""
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.ls_calls = []
+
+    def operation_ls(self, collection_id, path=None):
+        self.ls_calls.append(path)
+        return [{"name": name} for name in self.tree[normalise_path(path)]]
+
+    def operation_rename(self, collection_id, source, dest):
+        directory, name = dest.rsplit("/", 1)
+        self.tree[directory].append(name)
+
+    def operation_mkdir(self, collection_id, path):
+        self.tree[path] = []
+
+
+class TestListingCache(unittest.TestCase):
+    def test_normalise_path(self):
+        self.assertEqual(normalise_path("/~/uid/"), "uid")
+        self.assertEqual(normalise_path("~/uid/a.tsv"), "uid/a.tsv")
+        self.assertEqual(normalise_path("/~/"), "")
+
+    def test_hits_misses_and_expiry(self):
+        cache = ListingCache(ttl=60)
+        loader = mock.Mock(return_value=["a", "b"])
+        self.assertEqual(cache.get("c", "uid", loader), {"a", "b"})
+        self.assertEqual(cache.get("c", "/~/uid", loader), {"a", "b"})
+        self.assertEqual(loader.call_count, 1)
+        self.assertEqual((cache.stats["hits"], cache.stats["misses"]), (1, 1))
+        cache.ttl = 0
+        cache.get("c", "uid", loader)
+        self.assertEqual(loader.call_count, 2)
+
+    def test_errors_are_not_cached(self):
+        cache = ListingCache(ttl=60)
+        with self.assertRaises(OSError):
+            cache.get("c", "uid", mock.Mock(side_effect=OSError))
+        self.assertEqual(cache.get("c", "uid", lambda: ["a"]), {"a"})
+
+    def test_invalidate_path_parent_and_children(self):
+        cache = ListingCache(ttl=60)
+        for path in ["", "uid", "uid/sub", "other"]:
+            cache.get("c", path, lambda: [])
+        cache.invalidate("c", "uid")
+        self.assertEqual(set(k[1] for k in cache._listings), {"other"})
+        cache.invalidate()
+        self.assertEqual(cache._listings, {})
+
+    def test_load_racing_an_invalidation_is_not_cached(self):
+        cache = ListingCache(ttl=60)
+
+        def loader():
+            # the directory changes while it is being listed
+            cache.invalidate("c", "uid")
+            return ["a"]
+
+        self.assertEqual(cache.get("c", "uid", loader), {"a"})
+        self.assertEqual(cache._listings, {})
+        self.assertEqual(cache.get("c", "uid", lambda: ["a", "b"]), {"a", "b"})
+
+
+class TestGlobusExistenceChecks(unittest.TestCase):
+    def setUp(self):
+        self.transfer = FakeTransferClient({"uid": ["a.tsv", "b.tsv"]})
+        self.cache = ListingCache(ttl=60)
+        patches = [
+            mock.patch.object(
+                globus, "init_transfer_client", return_value=self.transfer
+            ),
+            mock.patch.object(globus, "get_listing_cache", return_value=self.cache),
+            mock.patch.object(config, "MAPPED_COLLECTION_ID", "mapped"),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_directory_is_listed_once_per_callback(self):
+        self.assertTrue(globus.filepath_exists("uid/a.tsv"))
+        self.assertTrue(globus.filepath_exists("uid/b.tsv"))
+        self.assertFalse(globus.filepath_exists("uid/c.tsv"))
+        self.assertEqual(self.transfer.ls_calls, ["uid"])
+        self.assertEqual(globus.list_files("uid"), ["uid/a.tsv", "uid/b.tsv"])
+        self.assertEqual(len(self.transfer.ls_calls), 1)
+
+    def test_rename_and_mkdir_invalidate(self):
+        self.assertFalse(globus.filepath_exists("uid/c.tsv"))
+        globus.rename_file("uid", "uid/a.tsv", "uid/c.tsv")
+        self.assertTrue(globus.filepath_exists("uid/c.tsv"))
+        globus.create_dir(self.transfer, "uid/sub")
+        self.transfer.tree["uid"].append("sub")
+        self.assertTrue(globus.filepath_exists("uid/sub"))
+        self.assertEqual(self.cache.stats["invalidations"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
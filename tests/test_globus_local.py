@@ -0,0 +1,82 @@
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from globus_sdk import TransferAPIError
+
+import sumstats_service.resources.globus as globus
+from sumstats_service import config
+from sumstats_service.resources.globus_listing import get_listing_cache
+from sumstats_service.resources.globus_local import (
+    LocalGlobusBackend,
+    use_local_backend,
+)
+from sumstats_service.resources.globus_provider import get_provider, set_provider
+
+
+class TestLocalGlobusBackend(unittest.TestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.backend = use_local_backend(root.name)
+        self.addCleanup(set_provider, None)
+        get_listing_cache().clear()
+        patch = mock.patch.object(config, "MAPPED_COLLECTION_ID", "mapped")
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_directory_operations_through_globus_module(self):
+        self.assertIsNone(globus.list_dir("uid"))
+        globus.create_dir(globus.init_transfer_client(), "uid")
+        self.assertEqual(globus.list_dir("uid"), [])
+        self.backend.upload("uid/raw.tsv", b"a\tb\n")
+        self.assertTrue(globus.filepath_exists("uid/raw.tsv"))
+        globus.create_dir(globus.init_transfer_client(), "dest")
+        self.assertTrue(globus.rename_file("dest", "uid/raw.tsv", "dest/raw.tsv"))
+        self.assertEqual(globus.list_files("dest"), ["dest/raw.tsv"])
+        globus.remove_path("uid")
+        self.assertIsNone(globus.list_dir("uid"))
+
+    def test_paths_cannot_escape_root(self):
+        with self.assertRaises(TransferAPIError):
+            self.backend.operation_ls("mapped", path="/~/../")
+
+    def test_identities_are_stable(self):
+        first = globus.check_user("user@example.com")
+        self.assertEqual(first, globus.check_user("user@example.com"))
+        self.assertIsNone(globus.check_user(None))
+
+    def test_transfer_tasks(self):
+        globus.create_dir(globus.init_transfer_client(), "uid")
+        self.backend.upload("uid/a.tsv")
+        globus.remove_path("uid/a.tsv")
+        tasks = self.backend.task_list(filter="status:SUCCEEDED/type:TRANSFER")
+        self.assertEqual(len(tasks), 1)
+        events = self.backend.paginated.task_successful_transfers(tasks[0]["task_id"])
+        self.assertEqual(list(events.items()), [{"destination_path": "/~/uid/a.tsv"}])
+
+    def test_latency_and_failures(self):
+        backend = LocalGlobusBackend(self.backend.root, latency=0.02)
+        start = time.perf_counter()
+        backend.endpoint_autoactivate("mapped")
+        self.assertGreaterEqual(time.perf_counter() - start, 0.02)
+        backend.failures.add("create_role")
+        with self.assertRaises(globus.GlobusAPIError):
+            backend.create_role({})
+        self.assertEqual(backend.calls["create_role"], 1)
+
+    def test_configured_backend(self):
+        set_provider(None)
+        patches = [
+            mock.patch.object(config, "GLOBUS_BACKEND", "local"),
+            mock.patch.object(config, "GLOBUS_LOCAL_ROOT", self.backend.root),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.assertEqual(get_provider().transfer_client().root, self.backend.root)
+
+
+if __name__ == "__main__":
+    unittest.main()
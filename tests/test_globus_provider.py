@@ -0,0 +1,68 @@
+import time
+import unittest
+from unittest import mock
+
+import sumstats_service.resources.globus as globus
+import sumstats_service.resources.globus_provider as gp
+
+
+class FakeAuthorizer(gp.RenewingClientCredentialsAuthorizer):
+    """Authorizer whose token responses are generated locally"""
+
+    lifetime = 3600
+
+    def _get_token_response(self):
+        return None
+
+    def _extract_token_data(self, res):
+        return {
+            "access_token": f"token-{time.monotonic()}",
+            "expires_at_seconds": int(time.time()) + self.lifetime,
+        }
+
+
+class TestGlobusClientProvider(unittest.TestCase):
+    def setUp(self):
+        patches = [
+            mock.patch.object(
+                gp, "RenewingClientCredentialsAuthorizer", FakeAuthorizer
+            ),
+            mock.patch.object(gp, "ConfidentialAppAuthClient"),
+            mock.patch.object(gp, "TransferClient"),
+            mock.patch.object(gp, "GCSClient"),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.provider = gp.GlobusClientProvider("id", "secret", refresh_margin=60)
+        gp.set_provider(self.provider)
+        self.addCleanup(gp.set_provider, None)
+
+    def test_clients_and_tokens_are_cached(self):
+        for _ in range(5):
+            globus.init_transfer_client()
+            globus.init_gcs_client()
+        self.assertEqual(self.provider.stats["token_requests"], 2)
+        self.assertEqual(self.provider.stats["autoactivations"], 1)
+        self.assertEqual(self.provider.stats["clients_created"], 2)
+        gp.ConfidentialAppAuthClient.assert_called_once()
+
+    def test_token_renewed_before_expiry(self):
+        authorizer = self.provider.get_authorizer("scope")
+        self.assertIs(authorizer, self.provider.get_authorizer("scope"))
+        authorizer.get_authorization_header()
+        self.assertEqual(self.provider.auth_round_trips(), 1)
+        authorizer.expires_at = int(time.time()) + 30
+        authorizer.get_authorization_header()
+        self.assertEqual(self.provider.auth_round_trips(), 2)
+
+    def test_identity_lookups_are_counted(self):
+        self.provider.auth_client().get_identities.return_value = mock.Mock(
+            data={"identities": [{"id": "user-id"}]}
+        )
+        self.assertEqual(globus.check_user("user@example.org"), "user-id")
+        self.assertEqual(gp.auth_round_trips(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import unittest
+from unittest import mock
+
+from pymongo import MongoClient
+
+import sumstats_service.resources.globus as globus
+from sumstats_service import config
+from sumstats_service.resources.mongo_client import get_mongo_client
+
+
+class FakePaginator:
+    def __init__(self, pages):
+        self.pages = pages
+
+    def __iter__(self):
+        return iter(self.pages)
+
+    def items(self):
+        return (item for page in self.pages for item in page)
+
+
+class FakeTransferClient:
+    """Transfer client serving task_list and task_successful_transfers
+    from memory, two tasks per page."""
+
+    def __init__(self):
+        self.tasks = []
+        self.events = {}
+        self.task_list_filters = []
+        self.paginated = self
+
+    def add_task(self, task_id, completion_time, paths):
+        self.tasks.append({"task_id": task_id, "completion_time": completion_time})
+        self.events[task_id] = [{"destination_path": path} for path in paths]
+
+    def task_list(self, filter=None, query_params=None):
+        self.task_list_filters.append(filter)
+        since = None
+        if "completion_time:" in filter:
+            since = filter.split("completion_time:")[1].rstrip(",")
+        tasks = sorted(
+            (t for t in self.tasks if since is None or t["completion_time"] >= since),
+            key=lambda t: t["completion_time"],
+        )
+        return FakePaginator([tasks[i : i + 2] for i in range(0, len(tasks), 2)])
+
+    def task_successful_transfers(self, task_id):
+        return FakePaginator([self.events[task_id]])
+
+
+class TestTransferEvents(unittest.TestCase):
+    def setUp(self):
+        self.mdb = get_mongo_client()
+        self.transfer = FakeTransferClient()
+        self.transfer.add_task(
+            "t1", "2024-01-01T10:00:00", ["/~/uid1/file%201.tsv", "/~/uid1/b.tsv"]
+        )
+        self.transfer.add_task("t2", "2024-01-02T10:00:00", ["/~/uid2/c.tsv"])
+        self.transfer.add_task("t3", "2024-01-03T10:00:00", ["/~/uid1/d.tsv"])
+        patcher = mock.patch.object(config, "GLOBUS_TRANSFER_SYNC_LOOKBACK_DAYS", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        mongo_uri = os.getenv("MONGO_URI", config.MONGO_URI)
+        mongo_user = os.getenv("MONGO_USER", None)
+        mongo_password = os.getenv("MONGO_PASSWORD", None)
+        mongo_db = os.getenv("MONGO_DB", config.MONGO_DB)
+
+        client = MongoClient(mongo_uri, username=mongo_user, password=mongo_password)
+        client.drop_database(mongo_db)
+
+    def test_sync_is_incremental(self):
+        result = globus.sync_transfer_events(self.transfer, mdb=self.mdb)
+        self.assertEqual(result, {"tasks": 3, "events": 4})
+        self.assertEqual(
+            self.mdb.get_sync_watermark(globus.TRANSFER_EVENTS_SYNC),
+            "2024-01-03T10:00:00",
+        )
+        self.transfer.add_task("t4", "2024-01-04T10:00:00", ["/~/uid2/e.tsv"])
+        result = globus.sync_transfer_events(self.transfer, mdb=self.mdb)
+        # t3 is read again at the watermark but not stored twice
+        self.assertEqual(result, {"tasks": 2, "events": 1})
+        self.assertTrue(
+            self.transfer.task_list_filters[-1].endswith(
+                "completion_time:2024-01-03T10:00:00,"
+            )
+        )
+        self.assertEqual(self.mdb.transfer_event_collection.count_documents({}), 5)
+
+    def test_first_sync_is_bounded_by_lookback(self):
+        with mock.patch.object(config, "GLOBUS_TRANSFER_SYNC_LOOKBACK_DAYS", 30):
+            result = globus.sync_transfer_events(self.transfer, mdb=self.mdb)
+        self.assertEqual(result, {"tasks": 0, "events": 0})
+        self.assertIn("completion_time:", self.transfer.task_list_filters[-1])
+
+    def test_get_upload_status(self):
+        globus.sync_transfer_events(self.transfer, mdb=self.mdb)
+        status = globus.get_upload_status(
+            self.transfer, "uid1", ["file 1.tsv", "d.tsv", "c.tsv"], mdb=self.mdb
+        )
+        self.assertEqual(status, {"file 1.tsv": True, "d.tsv": True, "c.tsv": False})
+
+
+if __name__ == "__main__":
+    unittest.main()
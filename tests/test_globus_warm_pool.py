@@ -0,0 +1,142 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from unittest import mock
+
+from pymongo import MongoClient
+
+import sumstats_service.resources.globus as globus
+from sumstats_service import config
+from sumstats_service.resources.globus_listing import get_listing_cache
+from sumstats_service.resources.globus_local import use_local_backend
+from sumstats_service.resources.globus_provider import set_provider
+from sumstats_service.resources.mongo_client import get_mongo_client
+from sumstats_service.resources.mongo_indexes import ensure_indexes
+
+
+class TestWarmPool(unittest.TestCase):
+    def setUp(self):
+        self.mdb = get_mongo_client()
+        # pool slots rely on the unique slot index
+        ensure_indexes(self.mdb)
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.fake = use_local_backend(root.name)
+        self.addCleanup(set_provider, None)
+        get_listing_cache().clear()
+        patches = [
+            mock.patch.object(config, "MAPPED_COLLECTION_ID", "mapped"),
+            mock.patch.object(config, "GLOBUS_WARM_POOL_ENABLED", True),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.uid = "abcd1234-0000"
+
+    def tearDown(self):
+        mongo_uri = os.getenv("MONGO_URI", config.MONGO_URI)
+        mongo_user = os.getenv("MONGO_USER", None)
+        mongo_password = os.getenv("MONGO_PASSWORD", None)
+        mongo_db = os.getenv("MONGO_DB", config.MONGO_DB)
+
+        client = MongoClient(mongo_uri, username=mongo_user, password=mongo_password)
+        client.drop_database(mongo_db)
+
+    def acls(self):
+        return [rule["endpoint_id"] for rule in self.fake.acl_rules]
+
+    def test_refill_only_below_low_water(self):
+        self.assertEqual(globus.refill_warm_pool(low_water=2, size=3), 3)
+        self.assertEqual(globus.refill_warm_pool(low_water=2, size=3), 0)
+        self.assertEqual(self.mdb.count_warm_collections(), 3)
+        self.assertEqual(len(self.fake.collections), 3)
+        # admin and group roles are in place before any claim
+        self.assertEqual(len(self.fake.roles), 6)
+
+    def test_concurrent_refills_share_the_deficit(self):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            provisioned = list(
+                executor.map(
+                    lambda _: globus.refill_warm_pool(low_water=3, size=3), range(4)
+                )
+            )
+        self.assertEqual(sum(provisioned), 3)
+        self.assertEqual(self.mdb.count_warm_collections(), 3)
+        self.assertEqual(len(self.fake.collections), 3)
+
+    def test_claimed_slot_is_refilled(self):
+        globus.refill_warm_pool(low_water=2, size=2)
+        globus.mkdir(self.uid, "user@example.com")
+        self.assertEqual(globus.refill_warm_pool(low_water=2, size=2), 1)
+        self.assertEqual(self.mdb.count_warm_collections(), 2)
+
+    def test_failed_provisioning_frees_its_slot(self):
+        self.fake.failures.add("create_role")
+        self.assertEqual(globus.refill_warm_pool(low_water=1, size=1), 0)
+        self.fake.failures.clear()
+        self.assertEqual(globus.refill_warm_pool(low_water=1, size=1), 1)
+        self.assertEqual(len(globus.reap_warm_pool()), 1)
+        self.assertEqual(len(self.fake.collections), 1)
+
+    def test_stuck_placeholder_is_reaped_and_refilled(self):
+        self.mdb.reserve_warm_collections(1)
+        self.assertEqual(globus.refill_warm_pool(low_water=1, size=1), 0)
+        self.mdb.warm_pool_collection.update_many(
+            {}, {"$set": {"created": datetime.now() - timedelta(hours=1)}}
+        )
+        with mock.patch.object(
+            config, "GLOBUS_WARM_POOL_PROVISIONING_TIMEOUT_MINUTES", 30
+        ):
+            self.assertEqual(globus.refill_warm_pool(low_water=1, size=1), 1)
+        self.assertEqual(self.mdb.count_warm_collections(), 1)
+
+    def test_mkdir_claims_from_pool(self):
+        globus.refill_warm_pool(low_water=1, size=1)
+        collection_id = globus.mkdir(self.uid, "user@example.com")
+        collection = self.fake.collections[collection_id]
+        self.assertEqual(collection["collection_base_path"], "/~/" + self.uid)
+        self.assertTrue(collection["display_name"].endswith(self.uid[0:8]))
+        self.assertTrue(os.path.isdir(os.path.join(self.fake.root, self.uid)))
+        self.assertEqual(self.acls(), [collection_id])
+        self.assertEqual(self.mdb.get_guest_collection_id(self.uid), collection_id)
+        self.assertEqual(self.mdb.count_warm_collections(), 0)
+
+    def test_mkdir_falls_back_when_pool_is_empty(self):
+        timings = {}
+        collection_id = globus.mkdir(self.uid, "user@example.com", timings=timings)
+        collection = self.fake.collections[collection_id]
+        self.assertEqual(collection["collection_base_path"], "/~/" + self.uid)
+        self.assertEqual(self.mdb.get_guest_collection_id(self.uid), collection_id)
+        self.assertEqual(len(self.fake.roles), 2)
+        self.assertEqual(self.acls(), [collection_id])
+        self.assertTrue(os.path.isdir(os.path.join(self.fake.root, self.uid)))
+        self.assertEqual(
+            set(timings),
+            {"warm_claim", "identity", "dir", "collection"}
+            | {"admin_role", "group_role", "acl", "record"},
+        )
+
+    def test_failed_claim_falls_back_and_is_reaped(self):
+        globus.refill_warm_pool(low_water=1, size=1)
+        self.fake.failures.add("operation_rename")
+        collection_id = globus.mkdir(self.uid, "user@example.com")
+        self.assertEqual(len(self.fake.collections), 2)
+        self.assertEqual(self.mdb.get_guest_collection_id(self.uid), collection_id)
+        self.assertEqual(len(globus.reap_warm_pool()), 1)
+        self.assertEqual(list(self.fake.collections), [collection_id])
+
+    def test_reap_stale_entries(self):
+        globus.refill_warm_pool(low_water=2, size=2)
+        self.assertEqual(globus.reap_warm_pool(max_age_days=1), [])
+        self.mdb.warm_pool_collection.update_many(
+            {}, {"$set": {"created": datetime.now() - timedelta(days=2)}}
+        )
+        self.assertEqual(len(globus.reap_warm_pool(max_age_days=1)), 2)
+        self.assertEqual(self.fake.collections, {})
+        self.assertEqual(self.mdb.count_warm_collections(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import hashlib
+import os
+import shutil
+import unittest
+
+from sumstats_service.resources import hashing
+
+
+class TestHashing(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = "./tests/data_hashing"
+        os.makedirs(self.test_dir, exist_ok=True)
+        self.paths = []
+        for i, size in enumerate([0, 1, 4096, 100001]):
+            path = os.path.join(self.test_dir, f"file_{i}")
+            with open(path, "wb") as f:
+                f.write(os.urandom(size))
+            self.paths.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def expected(self, path):
+        with open(path, "rb") as f:
+            return hashlib.md5(f.read()).hexdigest()
+
+    def test_md5_file(self):
+        for path in self.paths:
+            for buffer_size in [1000, 4096, 1024 * 1024]:
+                for use_mmap in [False, True]:
+                    self.assertEqual(
+                        hashing.md5_file(path, buffer_size, use_mmap),
+                        self.expected(path),
+                    )
+
+    def test_md5_files(self):
+        result = hashing.md5_files(self.paths, max_workers=3)
+        self.assertEqual(list(result), self.paths)
+        self.assertEqual(result, {p: self.expected(p) for p in self.paths})
+        self.assertEqual(hashing.md5_files([]), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
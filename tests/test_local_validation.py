@@ -0,0 +1,85 @@
+import json
+import os
+import shutil
+import unittest
+from unittest import mock
+
+import sumstats_service.resources.api_utils as au
+import sumstats_service.resources.local_validation as lv
+from sumstats_service import config
+
+
+class TestLocalValidation(unittest.TestCase):
+    def setUp(self):
+        self.test_storepath = "./tests/data"
+        self.callback_id = "abc123xyz"
+        patches = [
+            mock.patch.object(config, "STORAGE_PATH", self.test_storepath),
+            mock.patch.object(config, "DEPO_PATH", "./tests"),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.test_validate_path = os.path.join(config.VALIDATED_PATH, self.callback_id)
+        os.makedirs(self.test_validate_path, exist_ok=True)
+        self.content = {
+            "requestEntries": [
+                {
+                    "id": "study1",
+                    "filePath": "test_sumstats_file.tsv",
+                    "md5": "9b5f307016408b70cde2c9342648aa9b",
+                    "assembly": "GRCh38",
+                    "entryUUID": "ABC1234",
+                },
+                {
+                    "id": "study2",
+                    "filePath": "test_sumstats_file.tsv",
+                    "md5": "00000000000000000000000000000000",
+                    "assembly": "GRCh38",
+                    "entryUUID": "ABC1234",
+                },
+            ]
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.test_storepath, ignore_errors=True)
+        shutil.rmtree(self.test_validate_path)
+
+    def test_select_engine(self):
+        size = lv.payload_size(self.content)
+        self.assertEqual(
+            size, 2 * os.path.getsize("./tests/ABC1234/test_sumstats_file.tsv")
+        )
+        self.assertEqual(lv.select_engine(self.content, "nextflow"), "nextflow")
+        self.assertEqual(lv.select_engine(self.content, "local"), "local")
+        self.assertEqual(lv.select_engine(self.content, "auto"), "local")
+        with mock.patch.object(config, "VALIDATION_LOCAL_MAX_MB", 0):
+            self.assertEqual(lv.select_engine(self.content, "auto"), "nextflow")
+        self.content["requestEntries"][0]["filePath"] = "missing.tsv"
+        self.assertIsNone(lv.payload_size(self.content))
+        self.assertEqual(lv.select_engine(self.content, "auto"), "nextflow")
+
+    def test_validate_payload_writes_results(self):
+        results = lv.validate_payload(
+            self.callback_id, self.content, forcevalid=True, max_workers=2
+        )
+        by_id = {r["id"]: r for r in results}
+        self.assertEqual(by_id["study1"]["retrieved"], 1)
+        self.assertEqual(by_id["study1"]["dataValid"], 1)
+        self.assertEqual(by_id["study2"]["dataValid"], 0)
+        self.assertEqual(by_id["study2"]["errorCode"], 2)
+        with open(os.path.join(self.test_validate_path, "study2.json")) as f:
+            self.assertEqual(json.load(f), by_id["study2"])
+
+    def test_local_engine_skips_nextflow_setup(self):
+        with mock.patch.object(config, "VALIDATION_ENGINE", "local"):
+            results = au.validate_files(self.callback_id, self.content, forcevalid=True)
+        self.assertEqual(len(json.loads(results)["validationList"]), 2)
+        files = os.listdir(self.test_validate_path)
+        self.assertIn("payload.json", files)
+        self.assertNotIn("nextflow.config", files)
+        self.assertNotIn("validate_submission.nf", files)
+
+
+if __name__ == "__main__":
+    unittest.main()
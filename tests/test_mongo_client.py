@@ -0,0 +1,112 @@
+import os
+import unittest
+
+from pymongo import MongoClient
+
+import sumstats_service.resources.mongo_client as mc
+from sumstats_service import config
+
+
+class TestMongoClientRegistry(unittest.TestCase):
+    def setUp(self):
+        # clients registered by earlier tests would skew the counts
+        mc.close_all_clients()
+        self.uri = config.MONGO_URI or "mongodb://127.0.0.1:27017"
+        self.database = config.MONGO_DB or "mongotest"
+
+    def tearDown(self):
+        mc.close_all_clients()
+
+    def test_get_mongo_client_is_shared(self):
+        first = mc.get_mongo_client(uri=self.uri, database=self.database)
+        second = mc.get_mongo_client(uri=self.uri, database=self.database)
+        self.assertIs(first, second)
+
+    def test_clients_share_pymongo_pool_across_databases(self):
+        first = mc.get_mongo_client(uri=self.uri, database=self.database)
+        other = mc.get_mongo_client(uri=self.uri, database=self.database + "_other")
+        self.assertIsNot(first, other)
+        self.assertIs(first.client, other.client)
+
+    def test_direct_construction_reuses_registry(self):
+        shared = mc.get_mongo_client(uri=self.uri, database=self.database)
+        direct = mc.MongoClient(
+            self.uri, config.MONGO_USER, config.MONGO_PASSWORD, self.database
+        )
+        self.assertIs(shared.client, direct.client)
+
+    def test_pool_stats(self):
+        created = mc.pool_stats()["clients_created"]
+        mc.get_mongo_client(uri=self.uri, database=self.database)
+        mc.get_mongo_client(uri=self.uri, database=self.database)
+        stats = mc.pool_stats()
+        self.assertEqual(stats["clients_created"], created + 1)
+        self.assertEqual(stats["active_clients"], 1)
+        self.assertIn("connections_created", stats)
+
+    def test_registry_reset_after_fork(self):
+        mdb = mc.get_mongo_client(uri=self.uri, database=self.database)
+        mc._reset_registry_after_fork()
+        self.assertEqual(mc.pool_stats()["active_clients"], 0)
+        self.assertIsNot(mc.get_mongo_client(uri=self.uri, database=self.database), mdb)
+        mdb.client.close()
+
+
+class TestMongoClientUpdates(unittest.TestCase):
+    def setUp(self):
+        mc.close_all_clients()
+        self.mdb = mc.get_mongo_client()
+        self.mdb.study_collection.delete_many({})
+        self.mdb.insert_new_study(["abc123", "cid123", "file.tsv", "md5"])
+        self.mdb.insert_new_study(["xyz321", "cid123", "file.tsv", "md5"])
+
+    def tearDown(self):
+        mongo_uri = os.getenv("MONGO_URI", config.MONGO_URI)
+        mongo_user = os.getenv("MONGO_USER", None)
+        mongo_password = os.getenv("MONGO_PASSWORD", None)
+        mongo_db = os.getenv("MONGO_DB", config.MONGO_DB)
+
+        client = MongoClient(mongo_uri, username=mongo_user, password=mongo_password)
+        client.drop_database(mongo_db)
+
+    def test_update_fields_returns_counts(self):
+        result = self.mdb.update_retrieved_status("abc123", 1)
+        self.assertEqual(result, {"matched": 1, "modified": 1})
+        self.assertEqual(self.mdb.get_study_metadata("abc123")["retrieved"], 1)
+        self.assertEqual(self.mdb.get_study_metadata("abc123")["filePath"], "file.tsv")
+        result = self.mdb.update_retrieved_status("NOTINDB", 1)
+        self.assertEqual(result["matched"], 0)
+
+    def test_study_update_batch(self):
+        batch = self.mdb.study_update_batch()
+        batch.set("abc123", {"retrieved": 1}).set("abc123", {"dataValid": 1})
+        batch.set("xyz321", {"dataValid": 0, "errorCode": 3})
+        batch.set("NOTINDB", {"dataValid": 0})
+        self.assertEqual(len(batch), 3)
+        result = batch.execute()
+        self.assertEqual(result["matched"], 2)
+        self.assertEqual(result["missing"], ["NOTINDB"])
+        study = self.mdb.get_study_metadata("abc123")
+        self.assertEqual((study["retrieved"], study["dataValid"]), (1, 1))
+        self.assertEqual(self.mdb.get_study_metadata("xyz321")["errorCode"], 3)
+
+    def test_bulk_update_file_type_updates_latest_entry(self):
+        self.mdb.update_publication_details("abc123", "BlogsJ", "123", "GCST0001")
+        self.mdb.update_publication_details("xyz321", "BlogsJ", "123", "GCST0001")
+        results = self.mdb.bulk_update_file_type(["GCST0001", "GCST0002"], "FT")
+        self.assertEqual([r["success"] for r in results], [True, False])
+        self.assertEqual(results[1]["gcst_id"], "GCST0002")
+        latest = self.mdb.get_study_metadata_by_gcst("GCST0001")
+        self.assertEqual(latest["studyID"], "xyz321")
+        self.assertEqual(self.mdb.get_study_metadata("xyz321")["fileType"], "FT")
+        self.assertNotIn("fileType", self.mdb.get_study_metadata("abc123"))
+
+    def test_reset_validation_status_for_callback_id(self):
+        self.mdb.update_study_metadata("abc123", 1, 1, None)
+        result = self.mdb.reset_validation_status_for_callback_id("cid123")
+        self.assertEqual(result["matched"], 2)
+        self.assertIsNone(self.mdb.get_study_metadata("abc123")["retrieved"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import unittest
+
+from pymongo import MongoClient
+
+import sumstats_service.resources.mongo_indexes as mi
+from sumstats_service import config
+from sumstats_service.resources.mongo_client import get_mongo_client
+
+
+class TestMongoIndexes(unittest.TestCase):
+    def setUp(self):
+        self.mdb = get_mongo_client()
+
+    def tearDown(self):
+        mongo_uri = os.getenv("MONGO_URI", config.MONGO_URI)
+        mongo_user = os.getenv("MONGO_USER", None)
+        mongo_password = os.getenv("MONGO_PASSWORD", None)
+        mongo_db = os.getenv("MONGO_DB", config.MONGO_DB)
+
+        client = MongoClient(mongo_uri, username=mongo_user, password=mongo_password)
+        client.drop_database(mongo_db)
+
+    def test_ensure_indexes_is_idempotent(self):
+        mi.ensure_indexes(self.mdb)
+        self.assertEqual(mi.missing_indexes(self.mdb), {})
+        self.assertEqual(mi.ensure_indexes(self.mdb), [])
+
+    def test_index_with_other_options_is_missing(self):
+        self.mdb.database["sumstats-jobs"].create_index("job_id", name="job_id_1")
+        missing = mi.missing_indexes(self.mdb)
+        self.assertEqual(
+            [i.document["name"] for i in missing["sumstats-jobs"]], ["job_id_1"]
+        )
+
+    def test_hot_queries_do_not_collscan(self):
+        mi.ensure_indexes(self.mdb)
+        self.mdb.insert_new_study(["abc123", "cid123", "file.tsv", "md5"])
+        self.assertEqual(mi.collscan_queries(self.mdb), [])
+
+    def test_collscan_detected_without_indexes(self):
+        self.mdb.insert_new_study(["abc123", "cid123", "file.tsv", "md5"])
+        self.assertIn(
+            ("sumstats-study-meta", {"studyID": "x"}), mi.collscan_queries(self.mdb)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
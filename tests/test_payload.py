@@ -1,7 +1,9 @@
 import os
 import unittest
+from unittest import mock
 
 from pymongo import MongoClient
+from pymongo.errors import BulkWriteError
 
 import sumstats_service.resources.payload as pl
 from sumstats_service import config
@@ -95,6 +97,76 @@ class TestPayload(unittest.TestCase):
         payload.create_study_obj_list()
         self.assertFalse(payload.check_study_ids_valid())
 
+    def test_check_study_ids_valid_reports_all_errors(self):
+        payload = pl.Payload(payload=VALID_POST)
+        payload.payload_to_db()
+        content = {
+            "requestEntries": [
+                {"id": "abc123"},
+                {"id": "bad id"},
+                {"id": "new123"},
+                {"id": "new123"},
+                {"id": "xyz321"},
+            ]
+        }
+        payload = pl.Payload(payload=content)
+        payload.create_study_obj_list()
+        self.assertFalse(payload.check_study_ids_valid())
+        self.assertEqual(
+            payload.metadata_errors,
+            [
+                "Study ID: bad id is invalid",
+                "Study ID: abc123 exists already",
+                "Study ID: xyz321 exists already",
+                "Study ID: new123 duplicated in payload",
+            ],
+        )
+
+    def test_create_entry_for_studies_in_batches(self):
+        content = {
+            "requestEntries": [
+                {"id": "study{}".format(i), "filePath": "file.tsv"} for i in range(5)
+            ]
+        }
+        payload = pl.Payload(payload=content, callback_id="abcd1234")
+        payload.create_study_obj_list()
+        payload.set_callback_id_for_studies()
+        with mock.patch.object(config, "MONGO_INSERT_BATCH_SIZE", 2):
+            self.assertTrue(payload.create_entry_for_studies())
+        payload_new = pl.Payload(callback_id="abcd1234")
+        self.assertEqual(len(payload_new.get_data_for_callback_id()), 5)
+
+    def test_create_entry_for_studies_rolls_back(self):
+        content = {
+            "requestEntries": [
+                {"id": "study{}".format(i), "filePath": "file.tsv"} for i in range(5)
+            ]
+        }
+        payload = pl.Payload(payload=content, callback_id="abcd1234")
+        payload.create_study_obj_list()
+        payload.set_callback_id_for_studies()
+        collection = payload._mongo_client().study_collection
+        insert_many = collection.insert_many
+        calls = []
+
+        def fail_second_batch(docs, **kwargs):
+            calls.append(docs)
+            if len(calls) == 2:
+                raise BulkWriteError(
+                    {"writeErrors": [{"index": 1, "errmsg": "failed validation"}]}
+                )
+            return insert_many(docs, **kwargs)
+
+        with mock.patch.object(config, "MONGO_INSERT_BATCH_SIZE", 2), mock.patch.object(
+            collection, "insert_many", side_effect=fail_second_batch
+        ):
+            self.assertFalse(payload.create_entry_for_studies())
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(
+            payload.metadata_errors, ["Study ID: study3 could not be registered"]
+        )
+        self.assertEqual(collection.count_documents({"callbackID": "abcd1234"}), 0)
+
     def test_get_data_for_callback_id(self):
         payload = pl.Payload(payload=VALID_POST)
         payload.payload_to_db()
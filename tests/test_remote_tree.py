@@ -0,0 +1,100 @@
+import hashlib
+import os
+import shutil
+import unittest
+from unittest import mock
+
+from pymongo import MongoClient
+
+import sumstats_service.resources.remote_tree as rt
+from sumstats_service import config
+
+
+class TestRemoteTree(unittest.TestCase):
+    def setUp(self):
+        self.mirror = os.path.abspath("./tests/data_mirror")
+        self.prefix = "/pub/databases/gwas/summary_statistics"
+        self.tree = rt.LocalTree(mirror_path=self.mirror, prefix=self.prefix)
+        self.gcst = "GCST000001"
+        self.hm_dir = self.tree.harmonised_dir(self.gcst)
+        self.data_file = "GCST000001.h.tsv.gz"
+        self.write(self.data_file, b"data")
+        self.write(self.data_file + ".tbi", b"tbi")
+
+    def tearDown(self):
+        shutil.rmtree(self.mirror)
+        mongo_uri = os.getenv("MONGO_URI", config.MONGO_URI)
+        mongo_user = os.getenv("MONGO_USER", None)
+        mongo_password = os.getenv("MONGO_PASSWORD", None)
+        mongo_db = os.getenv("MONGO_DB", config.MONGO_DB)
+
+        client = MongoClient(mongo_uri, username=mongo_user, password=mongo_password)
+        client.drop_database(mongo_db)
+
+    def write(self, name, content):
+        path = os.path.join(self.tree.local_path(self.hm_dir), name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(content)
+
+    def test_local_path(self):
+        self.assertEqual(
+            self.tree.local_path(self.hm_dir),
+            os.path.join(self.mirror, "GCST000001-GCST001000/GCST000001/harmonised"),
+        )
+        with self.assertRaises(ValueError):
+            self.tree.local_path("/elsewhere")
+
+    def test_harmonised_listing(self):
+        listing = self.tree.harmonised_listing(self.gcst)
+        self.assertEqual(sorted(listing), [self.data_file, self.data_file + ".tbi"])
+        self.assertEqual(listing[self.data_file][0], 4)
+        self.assertEqual(self.tree.harmonised_listing("GCST000002"), {})
+
+    def test_md5_checksums_hashes_only_selected_files(self):
+        result = self.tree.md5_checksums(
+            self.hm_dir, select=lambda names: [self.data_file]
+        )
+        self.assertEqual(result, {self.data_file: hashlib.md5(b"data").hexdigest()})
+
+    def test_md5_checksums_uses_manifest(self):
+        self.write("md5sum.txt", f"{'a' * 32} {self.data_file}\n".encode())
+        with mock.patch.object(rt.checksum_cache, "md5_many") as md5_many:
+            md5_many.return_value = {}
+            result = self.tree.md5_checksums(
+                self.hm_dir, select=lambda names: [self.data_file]
+            )
+            md5_many.assert_called_once_with([])
+        self.assertEqual(result, {self.data_file: "a" * 32})
+
+    def test_fallback_tree(self):
+        fallback = mock.Mock(spec=rt.RemoteTree)
+        fallback.list_directory.return_value = {"remote.tsv": None}
+        tree = rt.FallbackTree(self.tree, fallback)
+        self.assertIn(self.data_file, tree.list_directory(self.hm_dir))
+        fallback.list_directory.assert_not_called()
+        missing = self.tree.harmonised_dir("GCST000002")
+        self.assertEqual(tree.list_directory(missing), {"remote.tsv": None})
+        fallback.list_directory.assert_called_once_with(missing)
+
+    def test_incomplete_backend_cannot_be_built(self):
+        class ListingOnlyTree(rt.RemoteTree):
+            def list_directory(self, directory):
+                return {}
+
+        with self.assertRaises(TypeError):
+            ListingOnlyTree()
+
+    def test_get_remote_tree(self):
+        with mock.patch.multiple(
+            config, REMOTE_TREE_BACKEND="local", FTP_MIRROR_PATH=self.mirror
+        ), mock.patch.object(rt, "FTPTree"):
+            self.assertIsInstance(rt.get_remote_tree(), rt.FallbackTree)
+        with mock.patch.multiple(
+            config, REMOTE_TREE_BACKEND="local", FTP_MIRROR_PATH="/not/mounted"
+        ), mock.patch.object(rt, "FTPTree") as ftp_tree:
+            self.assertIs(rt.get_remote_tree(), ftp_tree.return_value)
+
+
+if __name__ == "__main__":
+    unittest.main()
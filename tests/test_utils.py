@@ -0,0 +1,48 @@
+import threading
+import unittest
+
+from sumstats_service.resources.utils import run_steps, server_timing
+
+
+class TestRunSteps(unittest.TestCase):
+    def test_independent_steps_overlap(self):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def _step(name):
+            # only returns once both independent steps are running
+            barrier.wait()
+            return name
+
+        steps = {
+            "a": (lambda r: _step("a"), []),
+            "b": (lambda r: _step("b"), []),
+            "c": (lambda r: r["a"] + r["b"], ["a", "b"]),
+        }
+        timings = {}
+        results = run_steps(steps, timings=timings)
+        self.assertEqual(results["c"], "ab")
+        self.assertEqual(set(timings), {"a", "b", "c"})
+
+    def test_failure_skips_dependants(self):
+        called = []
+        steps = {
+            "a": (lambda r: 1 / 0, []),
+            "b": (lambda r: called.append("b"), ["a"]),
+        }
+        with self.assertRaises(ZeroDivisionError):
+            run_steps(steps)
+        self.assertEqual(called, [])
+
+    def test_unresolvable_dependencies(self):
+        with self.assertRaises(ValueError):
+            run_steps({"a": (lambda r: 1, ["missing"])})
+
+    def test_server_timing(self):
+        self.assertEqual(
+            server_timing({"identity": 12.5, "dir": 3.0}),
+            "identity;dur=12.5, dir;dur=3.0",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
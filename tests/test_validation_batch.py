@@ -0,0 +1,162 @@
+import json
+import os
+import shutil
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from pymongo import MongoClient
+
+import sumstats_service.resources.api_utils as au
+from sumstats_service import config
+from sumstats_service.resources.mongo_client import get_mongo_client
+
+
+class TestValidationQueue(unittest.TestCase):
+    def setUp(self):
+        self.mdb = get_mongo_client()
+        self.mdb.validation_queue_collection.delete_many({})
+
+    def tearDown(self):
+        mongo_uri = os.getenv("MONGO_URI", config.MONGO_URI)
+        mongo_user = os.getenv("MONGO_USER", None)
+        mongo_password = os.getenv("MONGO_PASSWORD", None)
+        mongo_db = os.getenv("MONGO_DB", config.MONGO_DB)
+
+        client = MongoClient(mongo_uri, username=mongo_user, password=mongo_password)
+        client.drop_database(mongo_db)
+
+    def test_queue_reports_count_and_size(self):
+        self.mdb.queue_validation("cid1", size=10)
+        self.mdb.queue_validation("cid1", size=15)
+        queued = self.mdb.queue_validation("cid2", size=5)
+        self.assertEqual(queued, {"count": 2, "size": 20})
+        queued = self.mdb.queue_validation("cid3", forcevalid=True, size=5)
+        self.assertEqual(queued, {"count": 1, "size": 5})
+
+    def test_claim_respects_budget_and_options(self):
+        self.mdb.queue_validation("big", size=100)
+        self.mdb.queue_validation("small", size=10)
+        self.mdb.queue_validation("forced", forcevalid=True, size=1)
+        self.mdb.queue_validation("medium", size=50)
+        self.mdb.queue_validation("tiny", size=1)
+
+        batch = self.mdb.claim_validation_batch("b1", max_callbacks=5, max_size=60)
+        # the oldest is always taken, however big
+        self.assertEqual([e["callback_id"] for e in batch], ["big"])
+
+        batch = self.mdb.claim_validation_batch("b2", max_callbacks=5, max_size=60)
+        self.assertEqual([e["callback_id"] for e in batch], ["small", "medium"])
+
+        batch = self.mdb.claim_validation_batch("b3", max_callbacks=1, max_size=60)
+        self.assertEqual([e["callback_id"] for e in batch], ["forced"])
+        self.assertEqual(self.mdb.count_queued_validations(), 1)
+
+        self.mdb.finish_validation_batch("b2")
+        statuses = {
+            e["callback_id"]: e["status"]
+            for e in self.mdb.validation_queue_collection.find({})
+        }
+        self.assertEqual(statuses["small"], config.ValidationBatchStatus.DONE.value)
+        self.assertEqual(statuses["big"], config.ValidationBatchStatus.BATCHED.value)
+        self.assertEqual(statuses["tiny"], config.ValidationBatchStatus.QUEUED.value)
+
+    def test_stale_batches_are_requeued_then_failed(self):
+        self.mdb.queue_validation("cid1", size=1)
+        self.mdb.claim_validation_batch("b1", max_callbacks=5, max_size=10)
+        reaped = self.mdb.reap_validation_batches(
+            updated_before=datetime.now() - timedelta(hours=1), max_requeues=1
+        )
+        # the batch is recent, so it may still be running
+        self.assertEqual(reaped, {"requeued": [], "failed": []})
+
+        later = datetime.now() + timedelta(hours=1)
+        reaped = self.mdb.reap_validation_batches(updated_before=later, max_requeues=1)
+        self.assertEqual([e["callback_id"] for e in reaped["requeued"]], ["cid1"])
+        self.assertEqual(self.mdb.count_queued_validations(), 1)
+
+        batch = self.mdb.claim_validation_batch("b2", max_callbacks=5, max_size=10)
+        self.assertEqual([e["callback_id"] for e in batch], ["cid1"])
+        reaped = self.mdb.reap_validation_batches(updated_before=later, max_requeues=1)
+        self.assertEqual(reaped["requeued"], [])
+        self.assertEqual([e["callback_id"] for e in reaped["failed"]], ["cid1"])
+        entry = self.mdb.validation_queue_collection.find_one({"callback_id": "cid1"})
+        self.assertEqual(entry["status"], config.ValidationBatchStatus.DONE.value)
+
+
+class TestValidateFilesBatch(unittest.TestCase):
+    def setUp(self):
+        self.test_storepath = "./tests/data"
+        patch = mock.patch.object(config, "STORAGE_PATH", self.test_storepath)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.callbacks = [
+            {
+                "callback_id": cid,
+                "file_type": None,
+                "content": {
+                    "requestEntries": [
+                        {
+                            "id": f"{cid}-study{i}",
+                            "filePath": "test_sumstats_file.tsv",
+                            "md5": "9b5f307016408b70cde2c9342648aa9b",
+                            "assembly": "GRCh38",
+                            "entryUUID": "ABC1234",
+                        }
+                        for i in range(2)
+                    ]
+                },
+            }
+            for cid in ("batchcid1", "batchcid2")
+        ]
+        self.commands = []
+
+    def tearDown(self):
+        shutil.rmtree(self.test_storepath, ignore_errors=True)
+        for cid in ("batchcid1", "batchcid2", "batches"):
+            shutil.rmtree(os.path.join(config.VALIDATED_PATH, cid), ignore_errors=True)
+
+    def fake_nextflow(self, cmd, **kwargs):
+        """Write a result for every study in the manifest but the last"""
+        self.commands.append(cmd)
+        manifest = cmd.split("--payload ")[1].split(" ")[0]
+        with open(manifest) as f:
+            entries = json.load(f)
+        for entry in entries[:-1]:
+            out = os.path.join(config.VALIDATED_PATH, entry["cid"], entry["id"])
+            with open(f"{out}.json", "w") as f:
+                json.dump(
+                    {
+                        "id": entry["id"],
+                        "retrieved": 1,
+                        "dataValid": 1,
+                        "errorCode": None,
+                    },
+                    f,
+                )
+        return mock.Mock(returncode=0)
+
+    def test_one_run_fans_out_results(self):
+        with mock.patch.object(au.subprocess, "run", side_effect=self.fake_nextflow):
+            results = au.validate_files_batch("b1", self.callbacks, forcevalid=True)
+
+        self.assertEqual(len(self.commands), 1)
+        self.assertIn("validate_submission_batch.nf --payload", self.commands[0])
+        self.assertIn("--forcevalid True", self.commands[0])
+        self.assertEqual(set(results), {"batchcid1", "batchcid2"})
+        first = json.loads(results["batchcid1"])
+        self.assertEqual(first["callbackID"], "batchcid1")
+        self.assertEqual(
+            sorted(s["id"] for s in first["validationList"]),
+            ["batchcid1-study0", "batchcid1-study1"],
+        )
+        # the study without a result is reported missing
+        second = {
+            s["id"]: s for s in json.loads(results["batchcid2"])["validationList"]
+        }
+        self.assertEqual(second["batchcid2-study0"]["dataValid"], 1)
+        self.assertNotEqual(second["batchcid2-study1"].get("errorCode"), None)
+
+
+if __name__ == "__main__":
+    unittest.main()
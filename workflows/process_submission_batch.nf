@@ -0,0 +1,68 @@
+nextflow.enable.dsl=2
+
+// Validate the studies of several callbacks in one run. The batch manifest
+// is a json list of {cid, id, payload, analysisSoftware}, one per study,
+// where payload is the payload.json of the study's callback.
+
+// Parameters with default values
+params.storePath = params.storePath ?: ''
+params.cid = params.cid ?: ''
+params.payload = params.payload ?: ''
+params.minrows = params.minrows ?: '10'
+params.forcevalid = params.forcevalid ?: 'False'
+params.validatedPath = params.validatedPath ?: 'test_depo_validated'
+params.depo_data = params.depo_data ?: ''
+
+// Parse JSON manifest
+import groovy.json.JsonSlurper
+def jsonSlurper = new JsonSlurper()
+manifest = jsonSlurper.parse(new File("$params.payload"))
+
+studies = Channel.from(manifest.collect {
+    tuple(it.cid, it.id, it.payload, it.analysisSoftware ? 'True' : 'False')
+})
+
+process get_submitted_files {
+    queue 'datamover'
+    containerOptions "--bind $params.storePath"
+    containerOptions "--bind $params.depo_data"
+    memory { 4.GB }
+    time { 4.hour * task.attempt }
+    maxRetries 5
+    errorStrategy { task.exitStatus in 130..255 ? 'retry' : 'ignore' }
+
+    input:
+    tuple val(cid), val(id), val(payload), val(softwareFlag)
+
+    output:
+    tuple val(cid), val(id), val(payload), val(softwareFlag)
+
+    script:
+    """
+    validate-study -cid $cid -id $id -payload $payload -storepath $params.storePath -validated_path $params.validatedPath -depo_path $params.depo_data --copy_only True -out "${id}.json"
+    """
+}
+
+process validate_study {
+    queue 'short'
+    containerOptions "--bind $params.storePath"
+    memory { 8.GB * task.attempt }
+    time { 4.hour * task.attempt }
+    maxRetries 5
+    errorStrategy { task.exitStatus in 130..255 ? 'retry' : 'ignore' }
+
+    input:
+    tuple val(cid), val(id), val(payload), val(softwareFlag)
+
+    output:
+    stdout
+
+    script:
+    """
+    validate-study -cid $cid -id $id -payload $payload -storepath $params.storePath -minrows $params.minrows -zero_p $softwareFlag -forcevalid $params.forcevalid -out "${id}.json" -validated_path $params.validatedPath
+    """
+}
+
+workflow {
+    get_submitted_files(studies) | validate_study
+}